@@ -0,0 +1,81 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Compare two benchmark results and flag regressions.
+
+    python -m benchmarks.compare base.json new.json --threshold 10
+
+A phase regresses when its time, peak RSS, CPU per file or (for the memory
+phase) allocation per file grows by more than the threshold (in percent).
+Metrics a result doesn't have, such as those of older runs, show as n/a. Exits 1 if any phase regressed, so it can gate CI.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import pathlib
+import sys
+from typing import Dict, List, Tuple
+
+METRICS = ("seconds", "peak_rss_mb", "cpu_ms_per_file", "kb_per_file")  # higher is worse for all
+
+def _change(old, new) -> float | None:
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+def compare(base: Dict, new: Dict, threshold: float) -> Tuple[List[str], List[str]]:
+    """Table lines and the list of regressions."""
+    lines = [f"{'phase':<7} {'metric':<15} {'base':>10} {'new':>10} {'change':>8}"]
+    regressions = []
+    for phase, old in base["phases"].items():
+        cur = new["phases"].get(phase)
+        if cur is None:
+            continue
+        for metric in METRICS:
+            if metric not in old and metric not in cur:
+                continue
+            change = _change(old.get(metric), cur.get(metric))
+            flag = ""
+            if change is not None and change > threshold:
+                flag = "  REGRESSION"
+                regressions.append(f"{phase} {metric} +{change:.1f}%")
+            shown = f"{change:+.1f}%" if change is not None else "n/a"
+            lines.append(f"{phase:<7} {metric:<15} {old.get(metric)!s:>10} {cur.get(metric)!s:>10} {shown:>8}{flag}")
+    return lines, regressions
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Compare two benchmark results")
+    ap.add_argument("base", help="Result of the reference run")
+    ap.add_argument("new", help="Result of the run to check")
+    ap.add_argument("--threshold", type=float, default=10.0, help="Allowed growth in percent (default=10)")
+    args = ap.parse_args(argv)
+    base = json.loads(pathlib.Path(args.base).read_text(encoding="utf-8"))
+    new = json.loads(pathlib.Path(args.new).read_text(encoding="utf-8"))
+    for key in ("params", "engine"):
+        if base.get(key) != new.get(key):
+            print(f"[WARN] runs differ in {key}: {base.get(key)} vs {new.get(key)}", file=sys.stderr)
+    for phase in set(base["phases"]) & set(new["phases"]):
+        if base["phases"][phase]["findings"] != new["phases"][phase]["findings"]:
+            print(f"[WARN] {phase}: finding count changed ({base['phases'][phase]['findings']} -> "
+                  f"{new['phases'][phase]['findings']})", file=sys.stderr)
+    lines, regressions = compare(base, new, args.threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:g}%: " + ", ".join(regressions))
+        sys.exit(1)
+    print(f"\nNo regressions above {args.threshold:g}%.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic synthetic Lambda repositories.
+
+The same parameters and seed always produce byte-identical trees, so two
+benchmark runs on different commits scan the same input:
+
+    python -m benchmarks.generate /tmp/bench-repo --files 2000 --lines 200 \\
+        --hazard-density 0.05 --vendored 0.3 --seed 1
+
+Application modules go under `src/`, vendored dependencies (as installed by
+`pip install -t .`) under `vendor/`, plus a `handler.py` at the root. The
+parameters are recorded in `benchmark.json` at the repo root.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import pathlib
+import random
+import shutil
+from dataclasses import asdict, dataclass
+from typing import List
+
+MANIFEST = "benchmark.json"
+
+# the import-time patterns of example_lambda/handler.py, one per rule
+HAZARDS = (
+    'r{n} = requests.get("https://example.com/{n}")',
+    's3_{n} = boto3.client("s3")',
+    'bg{n} = threading.Thread(target=lambda: None)\nbg{n}.start()',
+    'sock{n} = socket.socket()',
+    'seed{n} = random.random()',
+    'uid{n} = uuid.uuid4()',
+    'now{n} = datetime.now()',
+    'tmp{n} = tempfile.NamedTemporaryFile()',
+    'DATA{n} = []',
+)
+
+HEADER = ("import requests, boto3, threading, socket, random, uuid, tempfile\n"
+          "import json, logging, os\n"
+          "from datetime import datetime\n\n"
+          "logger = logging.getLogger(__name__)\n")
+
+# benign module-level code, so most statements exercise the rules without matching
+BENIGN = (
+    'LIMIT_{n} = {v}',
+    'NAME_{n} = "value-{v}"',
+    'CHOICES_{n} = ("a", "b", "{v}")',
+    'TABLE_{n} = os.environ.get("TABLE_{n}", "default")',
+    'def helper_{n}(event, limit={v}):\n    items = [x for x in event.get("items", []) if x]\n'
+    '    total = sum(len(str(x)) for x in items)\n    return {{"count": len(items), "total": total, "limit": limit}}',
+    'class Model{n}:\n    fields = ("id", "name")\n\n    def __init__(self, data):\n        self.data = data\n\n'
+    '    def to_json(self):\n        return json.dumps(self.data)',
+    'if os.environ.get("DEBUG_{n}"):\n    logger.setLevel(logging.DEBUG)',
+)
+
+@dataclass
+class Params:
+    files: int = 500
+    lines: int = 150
+    hazard_density: float = 0.05
+    vendored: float = 0.3
+    seed: int = 1
+
+def _module(rng: random.Random, lines: int, density: float) -> str:
+    out: List[str] = [HEADER]
+    count = HEADER.count("\n")
+    n = 0
+    while count < lines:
+        n += 1
+        template = rng.choice(HAZARDS) if rng.random() < density else rng.choice(BENIGN)
+        stmt = template.format(n=n, v=rng.randrange(1000)) + "\n"
+        out.append(stmt)
+        count += stmt.count("\n")
+    return "".join(out)
+
+def generate(out_dir: pathlib.Path, params: Params) -> pathlib.Path:
+    """Write a repo described by `params` into `out_dir`.
+
+    An existing `out_dir` is replaced only if it is empty or was generated
+    here (it holds the MANIFEST); anything else raises ValueError.
+    """
+    if out_dir.exists():
+        if not out_dir.is_dir() or (any(out_dir.iterdir()) and read_params(out_dir) is None):
+            raise ValueError(f"{out_dir} exists and is not a generated benchmark repo ({MANIFEST} missing); "
+                             "not replacing it")
+        shutil.rmtree(out_dir)
+    rng = random.Random(params.seed)
+    vendored = round(params.files * params.vendored)
+    for i in range(params.files):
+        if i < vendored:
+            # vendored code rarely does work at import time
+            path = out_dir / "vendor" / f"pkg{i % 25}" / f"mod{i}.py"
+            code = _module(rng, params.lines, params.hazard_density / 4)
+        else:
+            path = out_dir / "src" / f"app{i % 40}" / f"mod{i}.py"
+            code = _module(rng, params.lines, params.hazard_density)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(code, encoding="utf-8")
+    handler = pathlib.Path(__file__).resolve().parent.parent / "example_lambda" / "handler.py"
+    (out_dir / "handler.py").write_text(handler.read_text(encoding="utf-8"), encoding="utf-8")
+    (out_dir / MANIFEST).write_text(json.dumps(asdict(params), indent=2) + "\n", encoding="utf-8")
+    return out_dir
+
+def read_params(repo: pathlib.Path) -> dict | None:
+    try:
+        return json.loads((repo / MANIFEST).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Generate a synthetic Lambda repository for benchmarks")
+    ap.add_argument("out", help=f"Directory to create (replaced only if empty or generated before, with {MANIFEST})")
+    ap.add_argument("--files", type=int, default=Params.files, help="Number of .py files (default=500)")
+    ap.add_argument("--lines", type=int, default=Params.lines, help="Approximate lines per file (default=150)")
+    ap.add_argument("--hazard-density", type=float, default=Params.hazard_density,
+                    help="Share of module-level statements that are hazards (default=0.05)")
+    ap.add_argument("--vendored", type=float, default=Params.vendored,
+                    help="Share of files under vendor/ (default=0.3)")
+    ap.add_argument("--seed", type=int, default=Params.seed)
+    args = ap.parse_args(argv)
+    params = Params(args.files, args.lines, args.hazard_density, args.vendored, args.seed)
+    try:
+        out = generate(pathlib.Path(args.out), params)
+    except ValueError as e:
+        ap.error(str(e))
+    print(f"Generated {params.files} files in {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Time the scanner phase by phase.
+
+    python -m benchmarks.run /tmp/bench-repo --engine ast --repeat 3 --out result.json
+
+Phases:
+    walk    list the .py files to scan
+    parse   read and parse every file (no prefilter)
+    visit   run the rules over each parsed file; parsing is not timed
+    memory  peak memory the rules allocate per parsed file (tracemalloc)
+    report  render json, jsonl, sarif and html for the repo's findings
+    scan    end to end as the cli runs it in-process (prefilter, no cache)
+
+Each phase runs in its own interpreter so its peak RSS is its own. With
+--repeat the median time and the highest peak RSS are kept. CPU time is
+also reported per file, so engine changes can be compared independently
+of the size of the repo.
+"""
+
+from __future__ import annotations
+import argparse
+import io
+import json
+import pathlib
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+PHASES = ("walk", "parse", "visit", "memory", "report", "scan")
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB elsewhere
+
+def _files(repo: pathlib.Path, cfg) -> List[pathlib.Path]:
+    from snapstart_py_scanner.walker import iter_python_files
+    return list(iter_python_files(repo, ignore_paths=cfg.ignore_paths))
+
+def _parse(engine: str, code: str):
+    if engine == "ast":
+        import ast
+        return ast.parse(code)
+    import libcst as cst
+    return cst.parse_module(code)
+
+def _visit(engine: str, tree, filename: str, code: str, cfg) -> int:
+    if engine == "ast":
+        from snapstart_py_scanner.ast_engine import AstModuleVisitor
+        visitor = AstModuleVisitor(filename, cfg.severity, cfg.hook_names, source_text=code)
+    else:
+        from snapstart_py_scanner.cst_engine import ModuleLevelVisitor
+        visitor = ModuleLevelVisitor(filename, cfg.severity, cfg.hook_names, source_text=code)
+    visitor.run(tree)
+    return len(visitor.findings)
+
+def run_phase(phase: str, repo: pathlib.Path, engine: str) -> Dict:
+    """Run one phase in this process; returns seconds, file and finding counts."""
+    from snapstart_py_scanner.config import load_config
+    cfg = load_config(repo)
+    cfg.engine = engine
+    files = findings = 0
+    elapsed = 0.0
+    cpu = None  # CPU seconds of the timed work; of the whole phase if left unset
+    extra = {}
+    c0 = time.process_time()
+    if phase == "walk":
+        t0 = time.perf_counter()
+        files = len(_files(repo, cfg))
+        elapsed = time.perf_counter() - t0
+    elif phase in ("parse", "visit"):
+        cpu = 0.0
+        for path in _files(repo, cfg):
+            t0, p0 = time.perf_counter(), time.process_time()
+            code = path.read_text(encoding="utf-8", errors="replace")
+            tree = _parse(engine, code)
+            if phase == "visit":
+                t0, p0 = time.perf_counter(), time.process_time()
+                findings += _visit(engine, tree, str(path), code, cfg)
+            elapsed += time.perf_counter() - t0
+            cpu += time.process_time() - p0
+            files += 1
+    elif phase == "memory":
+        import tracemalloc
+        peaks = []
+        tracemalloc.start()
+        for path in _files(repo, cfg):
+            code = path.read_text(encoding="utf-8", errors="replace")
+            tree = _parse(engine, code)
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            t0 = time.perf_counter()
+            findings += _visit(engine, tree, str(path), code, cfg)
+            elapsed += time.perf_counter() - t0
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+            del tree
+            files += 1
+        tracemalloc.stop()
+        extra = {"kb_per_file": statistics.mean(peaks) / 1024 if peaks else 0.0,
+                 "kb_max_file": max(peaks, default=0) / 1024}
+    elif phase == "report":
+        from snapstart_py_scanner.report import render_html_report
+        from snapstart_py_scanner.scanner import scan_paths
+        from snapstart_py_scanner.writers import make_writer
+        paths = _files(repo, cfg)
+        found = scan_paths(repo, paths, jobs=1, cfg=cfg)
+        files, findings = len(paths), len(found)
+        with tempfile.TemporaryDirectory() as tmp:
+            t0 = time.perf_counter()
+            found.write_json(io.StringIO(), indent=2)
+            for fmt in ("jsonl", "sarif"):
+                writer = make_writer(fmt, io.StringIO(), repo)
+                for f in found:
+                    writer.write(f)
+                writer.close()
+            render_html_report(found, repo, pathlib.Path(tmp) / "report.html", str(ROOT / "templates"))
+            elapsed = time.perf_counter() - t0
+    elif phase == "scan":
+        from snapstart_py_scanner.scanner import iter_findings
+        t0 = time.perf_counter()
+        paths = _files(repo, cfg)
+        for _ in iter_findings(repo, paths, jobs=1, cfg=cfg):
+            findings += 1
+        elapsed = time.perf_counter() - t0
+        files = len(paths)
+    else:
+        raise ValueError(f"unknown phase {phase!r}")
+    cpu = cpu if cpu is not None else time.process_time() - c0
+    return {"seconds": elapsed, "cpu_seconds": cpu, "files": files, "findings": findings,
+            "peak_rss_mb": _peak_rss_mb(), **extra}
+
+def _spawn(phase: str, repo: pathlib.Path, engine: str) -> Dict:
+    proc = subprocess.run([sys.executable, "-m", "benchmarks.run", str(repo), "--engine", engine, "--phase", phase],
+                          cwd=str(ROOT), stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    if proc.returncode != 0:
+        sys.stderr.write(proc.stderr)
+        raise RuntimeError(f"phase {phase} failed with exit code {proc.returncode}")
+    # the scanner's own messages may precede the result line
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def summarize(runs: List[Dict]) -> Dict:
+    seconds = statistics.median(r["seconds"] for r in runs)
+    cpu = statistics.median(r["cpu_seconds"] for r in runs)
+    files, findings = runs[0]["files"], runs[0]["findings"]
+    out = {
+        "seconds": round(seconds, 4),
+        "files": files,
+        "findings": findings,
+        "files_per_sec": round(files / seconds, 1) if seconds else None,
+        "findings_per_sec": round(findings / seconds, 1) if seconds and findings else None,
+        "cpu_ms_per_file": round(cpu / files * 1000, 3) if files and cpu else None,
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+        "runs": [round(r["seconds"], 4) for r in runs],
+    }
+    if "kb_per_file" in runs[0]:
+        out["kb_per_file"] = round(statistics.median(r["kb_per_file"] for r in runs), 1)
+        out["kb_max_file"] = round(max(r["kb_max_file"] for r in runs), 1)
+    return out
+
+def benchmark(repo: pathlib.Path, engine: str, phases=PHASES, repeat: int = 1) -> Dict:
+    from benchmarks.generate import read_params
+    from snapstart_py_scanner import __version__
+    results = {}
+    for phase in phases:
+        results[phase] = summarize([_spawn(phase, repo, engine) for _ in range(repeat)])
+        r = results[phase]
+        line = (f"{phase:<7} {r['seconds']:>9.3f}s  {r['files_per_sec'] or 0:>10.1f} files/s  "
+                f"{r['findings_per_sec'] or 0:>10.1f} findings/s  {r['cpu_ms_per_file'] or 0:>8.2f} cpu ms/file  "
+                f"{r['peak_rss_mb']:>7.1f} MB")
+        if "kb_per_file" in r:
+            line += f"  {r['kb_per_file']:>8.1f} KB/file (max {r['kb_max_file']:.1f})"
+        print(line, file=sys.stderr)
+    return {
+        "version": 1,
+        "scanner_version": __version__,
+        "repo": str(repo),
+        "params": read_params(repo),
+        "engine": engine,
+        "repeat": repeat,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "phases": results,
+    }
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Benchmark the scanner phase by phase")
+    ap.add_argument("repo", help="Repository to scan, e.g. one made by benchmarks.generate")
+    ap.add_argument("--engine", choices=["cst", "ast"], default="cst")
+    ap.add_argument("--phases", default=",".join(PHASES), help=f"Comma-separated phases (default: {','.join(PHASES)})")
+    ap.add_argument("--repeat", type=int, default=1, help="Runs per phase; the median time is kept (default=1)")
+    ap.add_argument("--out", help="Write the JSON result here (default: stdout)")
+    ap.add_argument("--phase", help=argparse.SUPPRESS)  # worker mode: run one phase, print raw JSON
+    args = ap.parse_args(argv)
+    repo = pathlib.Path(args.repo).resolve()
+    if args.phase:
+        print(json.dumps(run_phase(args.phase, repo, args.engine)))
+        return
+    phases = [p.strip() for p in args.phases.split(",") if p.strip()]
+    unknown = [p for p in phases if p not in PHASES]
+    if unknown:
+        ap.error(f"unknown phase(s): {', '.join(unknown)}")
+    result = json.dumps(benchmark(repo, args.engine, phases, max(1, args.repeat)), indent=2)
+    if args.out:
+        pathlib.Path(args.out).write_text(result + "\n", encoding="utf-8")
+        print(f"Benchmark written to: {pathlib.Path(args.out).resolve()}", file=sys.stderr)
+    else:
+        print(result)
+
+if __name__ == "__main__":
+    main()
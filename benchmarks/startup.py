@@ -0,0 +1,83 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Check the cli's startup cost against a budget.
+
+    python -m benchmarks.startup --budget-ms 150
+
+Imports `cli` in fresh interpreters under `python -X importtime` and takes
+the median of the cumulative import time. Fails (exit 1) when that is over
+the budget, or when a dependency that only some outputs need (libcst,
+jinja2, yaml, ...) is imported up front.
+"""
+
+from __future__ import annotations
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+ROOT = pathlib.Path(__file__).resolve().parent.parent
+# loaded on first use: by the cst engine, html reports, config files and templates,
+# process pools and archive scans
+LAZY = ("libcst", "jinja2", "yaml", "rich", "multiprocessing", "concurrent.futures", "zipfile", "subprocess")
+DEFAULT_BUDGET_MS = 150
+
+def import_ms() -> float:
+    """Cumulative import time of `cli` in a fresh interpreter, in milliseconds."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import cli"], cwd=str(ROOT),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=True)
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == "cli":
+            return int(parts[1]) / 1000
+    raise RuntimeError("no import time reported for cli")
+
+def eager_modules() -> List[str]:
+    """The LAZY modules `import cli` loads anyway."""
+    code = "import cli, json, sys; print(json.dumps(sorted(sys.modules)))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=str(ROOT), stdout=subprocess.PIPE, text=True, check=True)
+    loaded = set(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return [name for name in LAZY if name in loaded]
+
+def check(budget_ms: float, repeat: int) -> Dict:
+    runs = [import_ms() for _ in range(repeat)]
+    median = statistics.median(runs)
+    eager = eager_modules()
+    return {"import_ms": round(median, 1), "runs": [round(r, 1) for r in runs], "budget_ms": budget_ms,
+            "eager": eager, "ok": median <= budget_ms and not eager}
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Check the cli's import time against a budget")
+    ap.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                    help=f"Largest allowed median import time of cli (default={DEFAULT_BUDGET_MS})")
+    ap.add_argument("--repeat", type=int, default=5, help="Interpreters to time; the median is kept (default=5)")
+    ap.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = ap.parse_args(argv)
+    result = check(args.budget_ms, max(1, args.repeat))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import cli: {result['import_ms']:.1f} ms (budget {args.budget_ms:g} ms)")
+        if result["eager"]:
+            print(f"imported at startup but should be lazy: {', '.join(result['eager'])}")
+    if not result["ok"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
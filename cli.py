@@ -14,15 +14,22 @@
 
 #!/usr/bin/env python3
 import argparse
-import json, sys
+import atexit
+import json, os, sys
 import pathlib
 from pathlib import Path
-from rich.console import Console
-from rich.text import Text
-from snapstart_py_scanner.scanner import gather_python_files, scan_paths
-from snapstart_py_scanner.findings import exit_code_from_findings
-from snapstart_py_scanner.config import load_config
-from snapstart_py_scanner.report import render_html_report
+from snapstart_py_scanner.scanner import ScanStats, iter_findings
+from snapstart_py_scanner.walker import PathMatcher, iter_python_files
+from snapstart_py_scanner.cache import CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache
+from snapstart_py_scanner.findings import FindingStore, exit_code_from_counts, exit_code_from_findings
+from snapstart_py_scanner.config import ENGINES, load_config
+from snapstart_py_scanner.budget import DEFAULT_PARSE_KB, DEFAULT_SECONDS, TRANSIENT
+from snapstart_py_scanner.report import render_html_report, render_paged_report
+from snapstart_py_scanner.imports import ImportGraph, format_graph_text, graph_report, scan_graph
+from snapstart_py_scanner.writers import WRITERS, make_writer
+from snapstart_py_scanner.profiling import Profiler, phase
+from snapstart_py_scanner.archives import is_archive
+from snapstart_py_scanner.knowledge import KB_FILE, KnowledgeBase, known_records
 
 def comma_list(value: str | None) -> list[str]:
     """Split comma-separated CLI values into a clean list."""
@@ -48,59 +55,420 @@ def format_context(lines, lineno, context=2):
         snippet.append(f"{prefix}{i+1:4d} | {lines[i].rstrip()}")
     return "\n".join(snippet)
 
+def template_dir():
+    path = pathlib.Path(__file__).parent.parent / "templates"
+    # fallback: templates next to cli.py if project layout differs
+    if not path.exists():
+        path = pathlib.Path("templates").resolve()
+    return path
+
+def html_out_path(out):
+    return pathlib.Path(out or "snapstart_report.html").resolve()
+
+def stream_findings(findings, fmt, out_path, repo_root, statuses=()):
+    """Write findings as they arrive; returns finding counts per level.
+
+    `statuses` fills up while `findings` is consumed; it is read once they are done.
+    """
+    out = open(out_path, "w", encoding="utf-8") if out_path else sys.stdout
+    try:
+        writer = make_writer(fmt, out, repo_root)
+        for f in findings:
+            writer.write(f)
+        writer.close(statuses)
+    finally:
+        if out_path:
+            out.close()
+    return writer.counts
+
+def write_profile(profiler, path, trace_path, top):
+    """Runs at exit, so the profile covers whichever output path the scan took."""
+    print(profiler.format_text(min(top, 10)), file=sys.stderr)
+    if path:
+        pathlib.Path(path).write_text(json.dumps({"profile": profiler.report(top)}, indent=2), encoding="utf-8")
+        print(f"Profile written to: {pathlib.Path(path).resolve()}", file=sys.stderr)
+    if trace_path:
+        pathlib.Path(trace_path).write_text(json.dumps(profiler.chrome_trace()), encoding="utf-8")
+        print(f"Chrome trace written to: {pathlib.Path(trace_path).resolve()}", file=sys.stderr)
+
+def run_fix(args, repo_root, cfg, includes, excludes):
+    """--fix: rewrite fixable hazards in place, or print the diff with --dry-run."""
+    from snapstart_py_scanner.fixer import fix_paths, write_fix
+    files = iter_python_files(repo_root, includes=includes, excludes=excludes, ignore_paths=cfg.ignore_paths)
+    out = open(args.out, "w", encoding="utf-8") if args.out and args.dry_run else sys.stdout
+    applied = skipped = changed = 0
+    try:
+        for fix in fix_paths(files, cfg, jobs=args.jobs, root=repo_root):
+            if fix.error:
+                print(f"[WARN] Could not fix {fix.filename}: {fix.error}", file=sys.stderr)
+                continue
+            for rule_id, lineno, reason in fix.skipped:
+                print(f"[INFO] {fix.filename}:{lineno} {rule_id} left as is: {reason}", file=sys.stderr)
+            applied += len(fix.applied)
+            skipped += len(fix.skipped)
+            if fix.fixed is None:
+                continue
+            changed += 1
+            if args.dry_run:
+                out.write(fix.diff(os.path.relpath(fix.filename, repo_root)))
+            else:
+                write_fix(fix)
+                print(f"Fixed {fix.filename}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    verb = "Would fix" if args.dry_run else "Fixed"
+    print(f"{verb} {applied} finding(s) in {changed} file(s); {skipped} left for review", file=sys.stderr)
+    return 0
+
+def run_probes(args, cfg, repo_root, graph, scopes, site_packages):
+    """--probe: (finding, chain or function names) for what importing each handler does."""
+    from snapstart_py_scanner.probe import ProbeError, probe_findings, run_probe
+    if graph is not None:
+        own = [graph.handler.parent] + ([repo_root] if repo_root != graph.handler.parent else [])
+        names = {os.path.realpath(n.path): n.name for n in graph.modules.values() if n.path is not None}
+        targets = [(graph.root, graph.handler, own, site_packages, None)]
+    else:
+        # --site-packages stands in for what the Lambda runtime provides, such as boto3
+        targets = [(s.function.handler.rpartition(".")[0], s.handler_file, [s.function.code_dir],
+                    s.function.layers + site_packages, s) for s in scopes if s.handler_file is not None]
+    out = []
+    for module, handler, own, deps, scope in targets:
+        try:
+            result = run_probe(module, handler, own + list(deps), own, deps, timeout=args.probe_timeout)
+        except ProbeError as e:
+            print(f"[WARN] Could not probe {handler}: {e}", file=sys.stderr)
+            continue
+        for f in probe_findings(result, cfg, args.probe_min_ms):
+            if scope is not None:
+                scope.findings.append(f)
+                out.append((f, [scope.function.name]))
+            else:
+                out.append((f, graph.chain(names.get(f.filename, graph.root))))
+    return out
+
+def serve(argv):
+    from snapstart_py_scanner.daemon import Server
+    ap = argparse.ArgumentParser(prog="snapstart-scan serve", description="Keep a scanner running and answer queries over a Unix socket")
+    ap.add_argument("path", nargs="?", default=".", help="Path to project (repo) root")
+    ap.add_argument("--socket", help="Socket path (default: <repo>/.snapstartpy_cache/serve.sock)")
+    ap.add_argument("--engine", choices=list(ENGINES), help="Analysis backend (default: from config)")
+    ap.add_argument("--poll", action="store_true", help="Watch the tree by polling file stats instead of inotify")
+    args = ap.parse_args(argv)
+    try:
+        Server(Path(args.path), Path(args.socket) if args.socket else None, args.engine, args.poll).serve_forever()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        sys.exit(3)
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        return serve(sys.argv[2:])
+    if len(sys.argv) > 1 and sys.argv[1] == "query":
+        from snapstart_py_scanner.client import main as query
+        sys.exit(query(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from snapstart_py_scanner.batch import main as batch
+        sys.exit(batch(sys.argv[2:]))
     ap = argparse.ArgumentParser(description="SnapStart Bug Scanner for Python (libcst-based)")
-    ap.add_argument("path", nargs="?", default=".", help="Path to project (repo) root")
+    ap.add_argument("path", nargs="?", default=".", help="Path to project (repo) root, or a deployment package / layer .zip")
     ap.add_argument("--repo", help="Explicit repo root path (alias of positional PATH)")
     ap.add_argument("--include", help="Comma-separated glob patterns to include (e.g., 'src/**/*.py,lambda/**/*.py')")
     ap.add_argument("--exclude", help="Comma-separated glob patterns to exclude (in addition to config ignores)")
-    ap.add_argument("--format", choices=["json","text","html"], help="Output format override")  # <-- add html
+    ap.add_argument("--format", choices=["json","text","html"] + list(WRITERS), help="Output format override; jsonl and sarif stream findings as files finish")
     ap.add_argument("--out", help="Output path for HTML/JSON report (default: ./snapstart_report.html or stdout for text)")
+    ap.add_argument("--paged", action="store_true", help="HTML report rendered page by page in the browser from a compressed data sidecar (for very large scans)")
     ap.add_argument("--context", type=int, default=2, help="Number of context lines in HTML report (default=2)")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the on-disk result cache")
+    ap.add_argument("--cache-dir", help="Directory holding the result cache (default: <repo>/.snapstartpy_cache)")
+    ap.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Evict least recently used cache entries above this size (default=64)")
+    ap.add_argument("--engine", choices=list(ENGINES), help="Analysis backend: libcst (cst, default) or the faster stdlib ast")
+    ap.add_argument("--no-prefilter", action="store_true", help="Parse every file, even those without any hazard trigger tokens")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Number of worker processes (default: CPU count; 1 disables the process pool)")
+    ap.add_argument("--handler", help="Scan only what this handler file imports at init, with import chains and cost per package")
+    ap.add_argument("--template", help="Scan every Python function of this SAM/CloudFormation template in one run, with a summary and exit code per function")
+    ap.add_argument("--site-packages", help="Comma-separated site-packages directories to resolve --handler imports in")
+    ap.add_argument("--probe", action="store_true", help="With --handler/--template, also import each handler in a sandboxed subprocess and report what init measurably does")
+    ap.add_argument("--probe-timeout", type=float, default=60.0, help="Give up on a handler's init after this many seconds (default=60)")
+    ap.add_argument("--probe-min-ms", type=float, default=10.0, help="Report handler imports that take at least this long (default=10)")
+    ap.add_argument("--changed-since", metavar="REF", help="Only scan .py files changed since the merge base with REF (plus local edits), and report findings on changed lines")
+    ap.add_argument("--staged", action="store_true", help="Like --changed-since, for the changes staged in the git index")
+    ap.add_argument("--baseline", metavar="PATH", help="Don't report findings recorded in this baseline file; only new findings count towards the exit code")
+    ap.add_argument("--update-baseline", action="store_true", help="Record every current finding in the baseline file (--baseline PATH, default: <repo>/.snapstart-baseline.json) and exit")
+    ap.add_argument("--knowledge-base", metavar="PATH", help="Knowledge base of installed distributions' findings (default: <cache-dir>/knowledge.json)")
+    ap.add_argument("--no-knowledge-base", action="store_true", help="Scan installed distributions file by file instead of looking them up")
+    ap.add_argument("--archives", action="store_true", help="Also scan the .py members of .zip files found under PATH (deployment packages, layers)")
+    ap.add_argument("--fix", action="store_true", help="Rewrite PY004/PY005/PY006 findings into lazy accessors and an after-restore hook")
+    ap.add_argument("--dry-run", action="store_true", help="With --fix, print a unified diff instead of writing files")
+    ap.add_argument("--max-file-seconds", type=float, help=f"Give up on a file after this many seconds (default: from config, {DEFAULT_SECONDS:g}; 0 = no limit)")
+    ap.add_argument("--max-parse-kb", type=int, help=f"Files larger than this get an outline scan of their module-level code only (default: from config, {DEFAULT_PARSE_KB}; 0 = never)")
+    ap.add_argument("--max-worker-mb", type=int, help="Memory limit of each worker process; files that exceed it are skipped (default: from config, 0 = no limit)")
+    ap.add_argument("--scan-generated", action="store_true", help="Also scan files that look machine-generated (protobuf stubs, '# Generated by', minified)")
+    ap.add_argument("--profile", metavar="PATH", help="Write wall/CPU time per phase and rule and the slowest files as JSON to PATH")
+    ap.add_argument("--profile-trace", metavar="PATH", help="Also write the profile in Chrome trace-event format (open in chrome://tracing or Perfetto)")
+    ap.add_argument("--profile-top", type=int, default=20, help="Number of slowest files in the profile (default=20)")
     args = ap.parse_args()
 
+    profiler = None
+    if args.profile or args.profile_trace:
+        profiler = Profiler()
+        atexit.register(write_profile, profiler, args.profile, args.profile_trace, args.profile_top)
+
     repo_root = pathlib.Path(args.repo or args.path).resolve()
-    cfg = load_config(repo_root)
+    archive = None
+    if repo_root.is_file() and is_archive(repo_root):
+        archive, repo_root = repo_root, repo_root.parent
+    with phase(profiler, "config", trace=True):
+        cfg = load_config(repo_root)
     if args.format:
         cfg.output_format = args.format
+    if args.engine:
+        cfg.engine = args.engine
+    if args.max_file_seconds is not None:
+        cfg.max_file_seconds = args.max_file_seconds
+    if args.max_parse_kb is not None:
+        cfg.max_parse_kb = args.max_parse_kb
+    if args.max_worker_mb is not None:
+        cfg.max_worker_mb = args.max_worker_mb
+    if args.scan_generated:
+        cfg.scan_generated = True
 
     includes = comma_list(args.include)
     excludes = comma_list(args.exclude)
 
-    pyfiles = gather_python_files(repo_root, includes=includes, excludes=excludes)
-    findings = scan_paths(repo_root, pyfiles, extra_excludes=excludes)
-
-    # --- HTML output path planning ---
-    if cfg.output_format == "html":
-        out = pathlib.Path(args.out or "snapstart_report.html").resolve()
-        template_dir = pathlib.Path(__file__).parent.parent / "templates"
-        # fallback: templates next to cli.py if project layout differs
-        if not template_dir.exists():
-            template_dir = pathlib.Path("templates").resolve()
-        render_html_report(findings, repo_root, out, template_dir, context_lines=args.context)
-        print(f"HTML report written to: {out}")
-        sys.exit(exit_code_from_findings(findings, cfg.exit_on))
-
-    # JSON (unchanged)
-    if cfg.output_format == "json":
-        if args.out:
-            pathlib.Path(args.out).write_text(json.dumps([f.to_dict() for f in findings], indent=2), encoding="utf-8")
-            print(f"JSON report written to: {pathlib.Path(args.out).resolve()}")
+    if args.handler and cfg.output_format not in ("text", "json"):
+        ap.error("--handler supports --format text or json")
+    if args.handler and not pathlib.Path(args.handler).is_file():
+        ap.error(f"--handler {args.handler}: no such file")
+    if args.handler and (args.changed_since or args.staged):
+        ap.error("--handler cannot be combined with --changed-since/--staged")
+    if archive is not None and (args.handler or args.changed_since or args.staged):
+        ap.error("a .zip PATH cannot be combined with --handler/--changed-since/--staged")
+    if args.template and cfg.output_format not in ("text", "json"):
+        ap.error("--template supports --format text or json")
+    if args.template and (args.handler or args.changed_since or args.staged or archive is not None):
+        ap.error("--template cannot be combined with --handler/--changed-since/--staged or a .zip PATH")
+
+    if args.probe and not (args.handler or args.template):
+        ap.error("--probe requires --handler or --template")
+
+    if args.update_baseline and (args.changed_since or args.staged or args.fix):
+        ap.error("--update-baseline cannot be combined with --changed-since/--staged/--fix")
+
+    if args.dry_run and not args.fix:
+        ap.error("--dry-run requires --fix")
+    if args.fix and (args.handler or args.template or args.changed_since or args.staged or archive is not None):
+        ap.error("--fix cannot be combined with --handler/--template/--changed-since/--staged or a .zip PATH")
+    if args.fix:
+        with phase(profiler, "fix", trace=True):
+            sys.exit(run_fix(args, repo_root, cfg, includes, excludes))
+
+    functions = None
+    if args.template:
+        import yaml
+        from snapstart_py_scanner.sam import find_functions
+        try:
+            functions = find_functions(pathlib.Path(args.template))
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            ap.error(f"--template: {e}")
+        if not functions:
+            ap.error(f"--template: no Python functions with local code in {args.template}")
+
+    changes = None
+    if args.changed_since or args.staged:
+        from snapstart_py_scanner.gitdiff import GitError, changed_python_files, on_changed_lines
+        try:
+            changes = changed_python_files(repo_root, ref=args.changed_since, staged=args.staged)
+        except GitError as e:
+            ap.error(f"git: {e}")
+
+    baseline = None
+    if args.baseline or args.update_baseline:
+        from snapstart_py_scanner.baseline import DEFAULT_FILE, Baseline
+        baseline_path = pathlib.Path(args.baseline).resolve() if args.baseline else repo_root / DEFAULT_FILE
+        if args.update_baseline:
+            baseline = Baseline(repo_root)
         else:
-            print(json.dumps([f.to_dict() for f in findings], indent=2))
-        sys.exit(exit_code_from_findings(findings, cfg.exit_on))
-
-    # TEXT (unchanged printing with snippet if present)
-    if not findings:
-        print("No findings.")
-    for f in findings:
-        code_line = getattr(f, "code", "") or ""
-        print(f"{f.level} {f.rule_id} {f.filename}:{f.lineno}:{f.col}")
-        if code_line:
-            print(f"→ {code_line}")
-        print(f"   {f.message}\n")
-
-    sys.exit(exit_code_from_findings(findings, cfg.exit_on))
+            try:
+                baseline = Baseline.load(baseline_path, repo_root)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                ap.error(f"--baseline: {e}")
+
+    stats = ScanStats()
+    cache = None
+    cache_dir = pathlib.Path(args.cache_dir).resolve() if args.cache_dir else repo_root / CACHE_DIR
+    if not args.no_cache:
+        cache = ResultCache(cache_dir, cfg, max_bytes=args.cache_max_mb * 1024 * 1024)
+    template_cache = cache_dir / "templates" if cache is not None else None  # compiled HTML templates
+    # looking distributions up needs a walk of the whole tree: not for diff or archive scans
+    kb = None
+    if not args.no_knowledge_base and changes is None and archive is None and (args.knowledge_base or cache is not None):
+        kb = KnowledgeBase(pathlib.Path(args.knowledge_base) if args.knowledge_base else cache_dir / KB_FILE, cfg)
+    site_packages = [pathlib.Path(p).resolve() for p in comma_list(args.site_packages)]
+    with phase(profiler, "scan", trace=True):
+        try:
+            graph = ImportGraph(pathlib.Path(args.handler), repo_root, site_packages).build() if args.handler else None
+            scopes = None
+            if functions:
+                from snapstart_py_scanner.sam import build_scopes, scan_functions, unique_files
+                scopes = build_scopes(functions, cfg)
+            known = None
+            if kb is not None:
+                with phase(profiler, "knowledge"):
+                    if scopes is not None:
+                        known = known_records(kb, sorted({s.function.code_dir for s in scopes}), cfg.ignore_paths,
+                                              extra_roots=sorted({p for s in scopes for p in s.function.layers}),
+                                              wanted=unique_files(scopes),
+                                              jobs=args.jobs, cache=cache, prefilter=not args.no_prefilter)
+                    else:
+                        known = known_records(kb, [repo_root], cfg.ignore_paths,
+                                              extra_roots=site_packages if graph else (), wanted=graph.files() if graph else None,
+                                              jobs=args.jobs, cache=cache, prefilter=not args.no_prefilter)
+            if scopes is not None or graph is not None:
+                if scopes is not None:
+                    hazards = scan_functions(scopes, repo_root, cfg, jobs=args.jobs, cache=cache, stats=stats,
+                                             prefilter=not args.no_prefilter, profiler=profiler, known=known)
+                else:
+                    hazards = scan_graph(graph, cfg, jobs=args.jobs, cache=cache, stats=stats,
+                                         prefilter=not args.no_prefilter, profiler=profiler, known=known)
+                if args.probe:
+                    with phase(profiler, "probe", trace=True):
+                        hazards.extend(run_probes(args, cfg, repo_root, graph, scopes, site_packages))
+                if baseline is not None and not args.update_baseline:
+                    hazards = [(f, names) for f, names in hazards if not baseline.suppress(f)]
+                    if scopes is not None:
+                        kept = {id(f) for f, _ in hazards}
+                        for scope in scopes:
+                            scope.findings = [f for f in scope.findings if id(f) in kept]
+            else:
+                if changes is not None:
+                    include = PathMatcher(includes)
+                    pyfiles = [p for p in changes if not include or include.match(p.as_posix())]
+                else:
+                    pyfiles = [archive] if archive is not None else iter_python_files(
+                        repo_root, includes=includes, excludes=excludes, ignore_paths=cfg.ignore_paths, archives=args.archives)
+                found = iter_findings(repo_root, pyfiles, extra_excludes=excludes, jobs=args.jobs, cache=cache,
+                                      stats=stats, prefilter=not args.no_prefilter, cfg=cfg, profiler=profiler,
+                                      known=known)
+                if changes is not None:
+                    found = on_changed_lines(found, changes)
+                if baseline is not None and not args.update_baseline:
+                    found = baseline.filter(found)
+                if args.update_baseline:
+                    findings = FindingStore.from_findings(found)
+                elif cfg.output_format in WRITERS:
+                    counts = stream_findings(found, cfg.output_format, args.out, repo_root, stats.statuses)
+                elif cfg.output_format == "html" and args.paged:
+                    counts = render_paged_report(found, repo_root, html_out_path(args.out), template_dir(),
+                                                 context_lines=args.context, cache_dir=template_cache)
+                else:
+                    findings = FindingStore.from_findings(found)
+        finally:
+            if cache is not None:
+                cache.close()
+            if kb is not None:
+                kb.save()
+
+    if args.update_baseline:
+        written = baseline.write(baseline_path, [f for f, _ in hazards] if graph or scopes else findings)
+        baseline.close()
+        print(f"Baseline of {written} finding(s) written to: {baseline_path}", file=sys.stderr)
+        sys.exit(0)
+
+    summary = (f"Scanned {stats.files_seen} files: {stats.files_parsed} parsed, {stats.files_cached} from cache, "
+               f"{stats.files_prefiltered} skipped by prefilter")
+    if stats.files_known:
+        summary += f", {stats.files_known} from the knowledge base"
+    if kb is not None and kb.learned:
+        summary += f" ({len(kb.learned)} new distribution(s) learned)"
+    if stats.files_skipped or stats.files_degraded:
+        summary += f"; {stats.files_skipped} skipped, {stats.files_degraded} only partly analysed"
+    if baseline is not None:
+        summary += f"; {baseline.suppressed} suppressed by baseline"
+        if baseline.fixed and changes is None:
+            summary += f" ({baseline.fixed} baseline entries no longer found)"
+        baseline.close()
+    if cfg.output_format != "text" or args.template or args.handler:
+        # the plain text report lists them itself
+        for s in stats.statuses:
+            print(f"[WARN] {s.status.capitalize()} {s.filename}: {s.reason}: {s.detail}", file=sys.stderr)
+    if cfg.output_format != "text":
+        # keep machine-readable outputs clean
+        print(summary, file=sys.stderr)
+    unfinished = sum(1 for s in stats.statuses if s.reason in TRANSIENT)
+    if unfinished and cfg.exit_on in ("ERROR", "WARN"):
+        print(f"[WARN] {unfinished} file(s) ran out of time or memory and were not fully checked; failing the run",
+              file=sys.stderr)
+
+    with phase(profiler, "report", trace=True):
+        if args.paged and cfg.output_format == "html" and not args.handler:
+            out = html_out_path(args.out)
+            print(f"HTML report written to: {out} (data: {out.stem}.data.js)")
+            sys.exit(exit_code_from_counts(counts, cfg.exit_on, unfinished))
+
+        if cfg.output_format in WRITERS and not args.handler:
+            if args.out:
+                print(f"{cfg.output_format.upper()} report written to: {pathlib.Path(args.out).resolve()}", file=sys.stderr)
+            sys.exit(exit_code_from_counts(counts, cfg.exit_on, unfinished))
+
+        if args.template:
+            from snapstart_py_scanner.sam import exit_code, format_template_text, template_report
+            report = template_report(pathlib.Path(args.template).resolve(), scopes, hazards, cfg.exit_on)
+            text = format_template_text(report) + f"\n{summary}" if cfg.output_format == "text" else json.dumps(report, indent=2)
+            if args.out:
+                pathlib.Path(args.out).write_text(text, encoding="utf-8")
+                print(f"Template report written to: {pathlib.Path(args.out).resolve()}")
+            else:
+                print(text)
+            sys.exit(max(exit_code(report), exit_code_from_counts({}, cfg.exit_on, unfinished)))
+
+        if args.handler:
+            findings = [f for f, _ in hazards]
+            report = graph_report(graph, hazards)
+            text = format_graph_text(report) + f"\n{summary}" if cfg.output_format == "text" else json.dumps(report, indent=2)
+            if args.out:
+                pathlib.Path(args.out).write_text(text, encoding="utf-8")
+                print(f"Import graph report written to: {pathlib.Path(args.out).resolve()}")
+            else:
+                print(text)
+            sys.exit(exit_code_from_findings(findings, cfg.exit_on, unfinished))
+
+        # --- HTML output path planning ---
+        if cfg.output_format == "html":
+            out = html_out_path(args.out)
+            render_html_report(findings, repo_root, out, template_dir(), context_lines=args.context,
+                               cache_dir=template_cache)
+            print(f"HTML report written to: {out}")
+            sys.exit(exit_code_from_findings(findings, cfg.exit_on, unfinished))
+
+        # JSON (unchanged)
+        if cfg.output_format == "json":
+            if args.out:
+                with open(args.out, "w", encoding="utf-8") as fh:
+                    findings.write_json(fh, indent=2)
+                print(f"JSON report written to: {pathlib.Path(args.out).resolve()}")
+            else:
+                findings.write_json(sys.stdout, indent=2)
+                print()
+            sys.exit(exit_code_from_findings(findings, cfg.exit_on, unfinished))
+
+        # TEXT (unchanged printing with snippet if present)
+        if not findings:
+            print("No findings.")
+        for f in findings:
+            code_line = getattr(f, "code", "") or ""
+            print(f"{f.level} {f.rule_id} {f.filename}:{f.lineno}:{f.col}")
+            if code_line:
+                print(f"→ {code_line}")
+            print(f"   {f.message}\n")
+        if stats.statuses:
+            print("Not fully scanned:")
+            for s in stats.statuses:
+                print(f"  {s.status} {s.filename}: {s.reason}: {s.detail}")
+            print()
+        print(summary)
+
+        sys.exit(exit_code_from_findings(findings, cfg.exit_on, unfinished))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,373 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""The probe subprocess: import one handler module and record what init does.
+
+    python [-X importtime] _probe_child.py CONFIG.json
+
+Run as a script by probe.py, never imported, so nothing of the scanner is
+loaded before the handler. CONFIG names the module, the sys.path entries
+to put first, the "own" and "dependency" roots findings are attributed to,
+the mode and the file to write the result to.
+
+- mode "time": only the sandbox is installed; the parent reads the
+  `-X importtime` lines printed between the BEGIN and END markers.
+- mode "effects": the sandbox plus `sys.setprofile` and tracemalloc, for
+  side effects and the memory each module keeps.
+
+The sandbox is an audit hook: DNS lookups, connections and datagrams to
+anything but a Unix socket, and new processes, are recorded and refused.
+botocore's HTTP session is swapped for a fake as soon as it is imported,
+so AWS calls are recorded and answered with an empty success response.
+"""
+
+import os
+import sys
+import time
+
+BEGIN = "snapstart-probe: begin"
+END = "snapstart-probe: end"
+BLOCKED = "blocked by the snapstart probe"
+
+# callables whose direct calls from the probed code are recorded, by "module.qualname"
+NONDETERMINISTIC = {
+    "time.time": "time", "time.time_ns": "time",
+    "datetime.datetime.now": "time", "datetime.datetime.utcnow": "time", "datetime.datetime.today": "time",
+    "datetime.date.today": "time",
+    "random.Random.random": "random", "random.Random.getrandbits": "random", "random.Random.seed": "random",
+    "random.Random.randint": "random", "random.Random.randrange": "random", "random.Random.choice": "random",
+    "random.Random.uniform": "random", "random.Random.shuffle": "random", "random.Random.sample": "random",
+    "posix.urandom": "random", "nt.urandom": "random",
+    "uuid.uuid1": "uuid", "uuid.uuid4": "uuid",
+}
+# recorded wherever they are called from, at the closest probed frame
+ANYWHERE = {
+    "threading.Thread.start": "thread", "_thread.start_new_thread": "thread",
+    "boto3.client": "aws_client", "boto3.resource": "aws_client",
+    "boto3.session.Session.client": "aws_client", "boto3.session.Session.resource": "aws_client",
+    "botocore.session.Session.create_client": "aws_client",
+}
+
+class Recorder:
+    def __init__(self, own, deps):
+        self.own = tuple(os.path.join(os.path.realpath(p), "") for p in own)
+        self.deps = tuple(os.path.join(os.path.realpath(p), "") for p in deps)
+        self.effects = {}            # (kind, detail, file, line) -> count
+        self.modules = {}            # module -> [importer file, importer line, bytes kept]
+        self.sockets = []            # (weakref to a socket, file, line)
+        self.opened = {}             # real path -> (file, line) of the last open()
+        self._real = {}
+        self.busy = False
+
+    def real(self, filename):
+        path = self._real.get(filename)
+        if path is None:
+            path = self._real[filename] = os.path.realpath(filename) if not filename.startswith("<") else ""
+        return path
+
+    def probed(self, frame):
+        """"own", "dep" or None for the file `frame` runs; a .venv inside the repo is a dependency."""
+        path = self.real(frame.f_code.co_filename)
+        if path.startswith(self.deps):
+            return "dep"
+        if path.startswith(self.own):
+            return "own"
+        return None
+
+    def site(self, frame):
+        """(file, line) of the innermost own frame, else the innermost dependency frame."""
+        dep = None
+        while frame is not None:
+            where = self.probed(frame)
+            if where == "own":
+                return self.real(frame.f_code.co_filename), frame.f_lineno
+            if where == "dep" and dep is None:
+                dep = self.real(frame.f_code.co_filename), frame.f_lineno
+            frame = frame.f_back
+        return dep
+
+    def note(self, kind, detail, site):
+        if site is None:
+            return
+        key = (kind, detail) + tuple(site)
+        self.effects[key] = self.effects.get(key, 0) + 1
+
+    def audit(self, event, args):
+        if self.busy or event not in AUDITED:
+            return
+        self.busy = True
+        try:
+            AUDITED[event](self, args, sys._getframe(1))
+        finally:
+            self.busy = False
+
+def _remote(address):
+    return not isinstance(address, (str, bytes))  # a Unix socket path is local
+
+def _on_getaddrinfo(rec, args, frame):
+    host = args[0]
+    if host in (None, "localhost", "127.0.0.1", "::1", b"localhost"):
+        return
+    rec.note("network", f"DNS lookup of {host!s}", rec.site(frame))
+    raise sys.modules["socket"].gaierror(-2, BLOCKED)
+
+def _on_connect(rec, args, frame):
+    if _remote(args[1]):
+        rec.note("network", f"connection to {args[1]}", rec.site(frame))
+        raise ConnectionRefusedError(BLOCKED)
+
+def _on_sendto(rec, args, frame):
+    if _remote(args[1]):
+        rec.note("network", f"datagram to {args[1]}", rec.site(frame))
+        raise ConnectionRefusedError(BLOCKED)
+
+def _on_socket(rec, args, frame):
+    import weakref
+    site = rec.site(frame)
+    if site is not None:
+        try:
+            rec.sockets.append((weakref.ref(args[0]), site))
+        except TypeError:  # a _socket.socket without weakref support
+            pass
+
+def _on_process(rec, args, frame):
+    command = args[1] if len(args) > 1 and args[1] else args[0]
+    if isinstance(command, (list, tuple)):
+        command = " ".join(map(str, command))
+    rec.note("process", str(command)[:120], rec.site(frame))
+    raise PermissionError(BLOCKED)
+
+def _on_open(rec, args, frame):
+    path, mode, flags = args
+    if not isinstance(path, str) or frame.f_code.co_filename.startswith("<frozen") \
+            or frame.f_code.co_name == "_get_default_tempdir":
+        return  # a file descriptor, importlib reading source, or tempfile checking TMPDIR
+    site = rec.site(frame)
+    if site is None:
+        return
+    writing = any(c in (mode or "") for c in "wax+") or bool(flags & (os.O_WRONLY | os.O_RDWR | os.O_CREAT))
+    real = os.path.realpath(path)
+    rec.opened[real] = site
+    if writing:
+        rec.note("write", real, site)
+
+AUDITED = {
+    "socket.getaddrinfo": _on_getaddrinfo,
+    "socket.connect": _on_connect,
+    "socket.sendto": _on_sendto,
+    "socket.__new__": _on_socket,
+    "subprocess.Popen": _on_process,
+    "os.system": _on_process,
+    "os.posix_spawn": _on_process,
+    "os.exec": _on_process,
+    "open": _on_open,
+}
+
+def _fake_botocore_send(rec):
+    def patch(module):
+        from botocore.awsrequest import AWSResponse
+
+        class _Raw:
+            def __init__(self, body):
+                self.body = body
+
+            def stream(self, *args, **kwargs):
+                yield self.body
+
+        def send(self, request):
+            headers = {k.lower(): v.decode() if isinstance(v, bytes) else v for k, v in request.headers.items()}
+            body = request.body if isinstance(request.body, bytes) else str(request.body or "").encode()
+            operation = headers.get("x-amz-target", "")
+            if not operation and b"Action=" in body:
+                operation = body.split(b"Action=", 1)[1].split(b"&", 1)[0].decode()
+            host, _, path = request.url.split("//", 1)[-1].partition("/")
+            target = operation or "/" + path.partition("?")[0]
+            rec.note("aws", f"{request.method} {host} {target}", rec.site(sys._getframe(1)))
+            if "json" in headers.get("content-type", ""):
+                payload = b"{}"
+            elif operation and "x-amz-target" not in headers:  # query protocol: <OpResponse><OpResult/>
+                payload = f"<{operation}Response><{operation}Result/></{operation}Response>".encode()
+            else:
+                payload = b""
+            return AWSResponse(request.url, 200, {"x-amzn-requestid": "snapstart-probe"}, _Raw(payload))
+
+        module.URLLib3Session.send = send
+    return patch
+
+class _PatchedLoader:
+    """Runs a module, then hands it to `patch`."""
+
+    def __init__(self, loader, patch):
+        self._loader = loader
+        self._patch = patch
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._loader.exec_module(module)
+        self._patch(module)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class PatchOnImport:
+    """Meta path finder that patches modules right after they are first imported."""
+
+    def __init__(self, patches):
+        self.patches = patches
+
+    def find_spec(self, name, path, target=None):
+        if name not in self.patches:
+            return None
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None:
+                    spec.loader = _PatchedLoader(spec.loader, self.patches[name])
+                return spec
+        return None
+
+def _callable_key(fn, cache):
+    owner = getattr(fn, "__self__", None)
+    kind = owner if owner is None or isinstance(owner, type) or type(owner).__name__ == "module" else type(owner)
+    key = (kind, fn.__name__)
+    label = cache.get(key)
+    if label is None:
+        if owner is None or type(owner).__name__ == "module":
+            name = f"{getattr(owner, '__name__', None) or fn.__module__}.{fn.__name__}"
+        else:
+            name = f"{kind.__module__}.{kind.__qualname__}.{fn.__name__}"
+        label = cache[key] = name
+    return label
+
+def make_profiler(rec, tracemalloc):
+    labels = {}                      # code object -> "module.qualname"
+    c_labels = {}
+    modules = []                     # (frame, name, bytes at start) of modules being run
+    active = []                      # frames of recorded ANYWHERE calls; their callees are not recorded
+
+    def record(label, frame, caller):
+        if active:
+            return
+        kind = ANYWHERE.get(label)
+        if kind is not None:
+            rec.note(kind, label, rec.site(caller))
+            return True
+        kind = NONDETERMINISTIC.get(label)
+        if kind is not None and caller is not None:
+            where = rec.probed(caller)
+            if where == "own" or (where == "dep" and caller.f_code.co_name == "<module>"):
+                rec.note(kind, label, (rec.real(caller.f_code.co_filename), caller.f_lineno))
+        return False
+
+    def profile(frame, event, arg):
+        if event == "call":
+            code = frame.f_code
+            if code.co_name == "<module>":
+                name = frame.f_globals.get("__name__", "?")
+                importer = frame.f_back
+                while importer is not None and importer.f_code.co_filename.startswith("<frozen"):
+                    importer = importer.f_back
+                if importer is not None and rec.probed(importer) == "own" and name not in rec.modules:
+                    rec.modules[name] = [rec.real(importer.f_code.co_filename), importer.f_lineno, 0]
+                modules.append((frame, name, tracemalloc.get_traced_memory()[0]))
+                return
+            label = labels.get(code)
+            if label is None:
+                label = labels[code] = f"{frame.f_globals.get('__name__')}.{code.co_qualname}"
+            if (label in ANYWHERE or label in NONDETERMINISTIC) and record(label, frame, frame.f_back):
+                active.append(frame)
+        elif event == "return":
+            if active and active[-1] is frame:
+                active.pop()
+            elif modules and modules[-1][0] is frame:
+                _, name, start = modules.pop()
+                if name in rec.modules and not rec.modules[name][2]:
+                    rec.modules[name][2] = max(0, tracemalloc.get_traced_memory()[0] - start)
+        elif event == "c_call":
+            label = _callable_key(arg, c_labels)
+            if label in ANYWHERE or label in NONDETERMINISTIC:
+                record(label, None, frame)
+
+    return profile
+
+def _open_files():
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return set()
+    out = set()
+    for fd in fds:
+        try:
+            out.add(os.readlink(f"/proc/self/fd/{fd}"))
+        except OSError:
+            pass
+    return out
+
+def main(config_path):
+    import json
+    with open(config_path, encoding="utf-8") as fh:
+        config = json.load(fh)
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:] = list(config["path"]) + [p for p in sys.path if os.path.abspath(p or ".") != here]
+    rec = Recorder(config["own"], config["deps"])
+    sys.meta_path.insert(0, PatchOnImport({"botocore.httpsession": _fake_botocore_send(rec)}))
+    effects = config["mode"] == "effects"
+    before = _open_files()
+    import importlib
+    import threading
+    tracemalloc = None
+    if effects:
+        import tracemalloc
+        tracemalloc.start()
+    sys.addaudithook(rec.audit)
+    error = ""
+    print(BEGIN, file=sys.stderr, flush=True)
+    start = time.perf_counter()
+    if effects:
+        sys.setprofile(make_profiler(rec, tracemalloc))
+    try:
+        importlib.import_module(config["module"])
+    except BaseException as e:  # SystemExit from a handler is an init failure too
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        sys.setprofile(None)
+    seconds = time.perf_counter() - start
+    print(END, file=sys.stderr, flush=True)
+    rec.busy = True  # the result is not part of init
+
+    result = {"error": error, "seconds": seconds, "threads": threading.active_count() - 1}
+    if effects:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        for ref, site in rec.sockets:
+            sock = ref()
+            if sock is not None and sock.fileno() != -1:
+                rec.note("open_socket", "socket", site)
+        for path in sorted(_open_files() - before):
+            if path in rec.opened:
+                rec.note("open_file", path, rec.opened[path])
+        result.update(memory=current, peak=peak, modules=rec.modules,
+                      effects=[list(key) + [count] for key, count in rec.effects.items()])
+    with open(config["out"], "w", encoding="utf-8") as fh:
+        json.dump(result, fh)
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(0)  # don't wait for threads the handler started
+
+if __name__ == "__main__":
+    main(sys.argv[1])
@@ -0,0 +1,98 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Python sources inside deployment packages and layer zips.
+
+Members are read straight out of the archive, one at a time. Only the
+central directory is needed to list them, so non-Python members are never
+decompressed. A member is named `path/to/pkg.zip!python/mod.py` in
+findings. Ignore patterns see it as `pkg.zip/python/mod.py`, relative to
+the archive, so `**/__pycache__/**` and similar patterns apply inside
+archives wherever the archive itself lives.
+"""
+
+from __future__ import annotations
+import pathlib
+import sys
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, Tuple
+from .walker import PathMatcher
+
+if TYPE_CHECKING:
+    import zipfile
+
+ARCHIVE_SUFFIXES = (".zip",)
+MEMBER_SEP = "!"
+
+def is_archive(path: pathlib.Path) -> bool:
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+def member_name(archive: pathlib.Path | str, member: str) -> str:
+    return f"{archive}{MEMBER_SEP}{member}"
+
+def split_member(name: str) -> Optional[Tuple[str, str]]:
+    """(archive path, member) for a name made by member_name, else None."""
+    lower = name.lower()
+    for suffix in ARCHIVE_SUFFIXES:
+        cut = lower.find(suffix + MEMBER_SEP)
+        if cut != -1:
+            end = cut + len(suffix)
+            return name[:end], name[end + 1:]
+    return None
+
+def iter_members(archive: pathlib.Path, skip: Optional[PathMatcher] = None
+                 ) -> Iterator[Tuple[str, Callable[[], bytes]]]:
+    """(name, read) for each `.py` member, in archive order.
+
+    `read()` decompresses that one member. The archive stays open while
+    the generator is alive.
+    """
+    import zipfile  # most scans have no archives; keep it off the startup path
+    try:
+        zf = zipfile.ZipFile(archive)
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"[WARN] Could not open archive {archive}: {e}", file=sys.stderr)
+        return
+    with zf:
+        base = archive.name
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.endswith(".py"):
+                continue
+            if skip and skip.match(f"{base}/{info.filename}"):
+                continue
+            yield member_name(archive, info.filename), (lambda info=info: zf.read(info))
+
+class MemberReader:
+    """Reads members by name, keeping the last few archives open."""
+
+    def __init__(self, maxsize: int = 4):
+        self.maxsize = maxsize
+        self._open: "OrderedDict[str, zipfile.ZipFile]" = OrderedDict()
+
+    def read(self, name: str) -> bytes:
+        archive, member = split_member(name)
+        zf = self._open.get(archive)
+        if zf is None:
+            import zipfile
+            zf = self._open[archive] = zipfile.ZipFile(archive)
+            if len(self._open) > self.maxsize:
+                self._open.popitem(last=False)[1].close()
+        else:
+            self._open.move_to_end(archive)
+        return zf.read(member)
+
+    def close(self) -> None:
+        for zf in self._open.values():
+            zf.close()
+        self._open.clear()
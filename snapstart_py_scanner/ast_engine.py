@@ -0,0 +1,343 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""stdlib `ast` front end for the module-level rules.
+
+`ast` drops comments, so a single tokenize pass collects them instead and
+assigns them to statements the way libcst does: comment lines before the
+first statement belong to the module header, and comment lines after an
+indented block belong to that block's footer up to the last one indented
+at least as deep as the block.
+"""
+
+from __future__ import annotations
+import ast
+import bisect
+import io
+import tokenize
+from typing import Callable, Dict, List, Optional, Tuple
+from .registry import RuleRegistry
+from .rules import (
+    FunctionFacts, ModuleChecks, ModuleFacts, SmallStatement, StatementLine, MUTABLE_FACTORIES,
+    import_aliases,
+)
+
+_COMPOUND = (
+    ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.If, ast.For, ast.AsyncFor,
+    ast.While, ast.With, ast.AsyncWith, ast.Try,
+) + tuple(getattr(ast, n) for n in ("TryStar", "Match") if hasattr(ast, n))
+
+def _is_simple_string(segment: str) -> bool:
+    """True if `segment` is one string token (libcst SimpleString), not an implicit concatenation."""
+    try:
+        toks = [t for t in tokenize.generate_tokens(io.StringIO(segment).readline)
+                if t.type not in (tokenize.NEWLINE, tokenize.NL, tokenize.ENDMARKER)]
+    except (tokenize.TokenError, SyntaxError):
+        return False
+    return len(toks) == 1 and toks[0].type == tokenize.STRING
+
+def dotted_name(node: ast.expr) -> str:
+    names = []
+    cur = node
+    while isinstance(cur, ast.Attribute):
+        names.append(cur.attr)
+        cur = cur.value
+    if isinstance(cur, ast.Name):
+        names.append(cur.id)
+    names.reverse()
+    return ".".join(names)
+
+class _Comments:
+    """Comment tokens of one source file, indexed by line."""
+
+    def __init__(self, source: str):
+        self.full_line: Dict[int, Tuple[int, str]] = {}  # line -> (indent, text)
+        self.trailing: Dict[int, str] = {}               # NEWLINE line -> comment before it
+        self._ends: List[Tuple[int, int]] = []           # positions of NEWLINE tokens
+        prev = None
+        for tok in tokenize.generate_tokens(io.StringIO(source).readline):
+            if tok.type == tokenize.COMMENT:
+                line_no, col = tok.start
+                if not tok.line[:col].strip():
+                    self.full_line[line_no] = (col, tok.string)
+            elif tok.type == tokenize.NEWLINE:
+                self._ends.append(tok.start)
+                if prev is not None and prev.type == tokenize.COMMENT and prev.start[0] == tok.start[0] \
+                        and tok.start[0] not in self.full_line:
+                    self.trailing[tok.start[0]] = prev.string
+            prev = tok
+
+    def logical_end(self, node: ast.stmt) -> int:
+        """Line of the NEWLINE token ending the logical line that contains `node`'s end."""
+        i = bisect.bisect_left(self._ends, (node.end_lineno, node.end_col_offset))
+        return self._ends[i][0] if i < len(self._ends) else node.end_lineno
+
+    def between(self, first: int, last: int) -> List[Tuple[int, str]]:
+        return [self.full_line[n] for n in range(first, last + 1) if n in self.full_line]
+
+def _last_block(node: ast.stmt) -> Optional[List[ast.stmt]]:
+    """The statement list whose footer swallows comments after `node`."""
+    if isinstance(node, ast.If) and node.orelse:
+        only = node.orelse[0]
+        if len(node.orelse) == 1 and isinstance(only, ast.If) and only.col_offset == node.col_offset:
+            return _last_block(only)  # elif
+        return node.orelse
+    if isinstance(node, (ast.For, ast.AsyncFor, ast.While)) and node.orelse:
+        return node.orelse
+    if isinstance(node, _COMPOUND) and hasattr(node, "finalbody"):
+        if node.finalbody:
+            return node.finalbody
+        if node.orelse:
+            return node.orelse
+        if node.handlers:
+            return node.handlers[-1].body
+    if hasattr(ast, "Match") and isinstance(node, ast.Match):
+        return node.cases[-1].body
+    return getattr(node, "body", None)
+
+def _block_indent(node: ast.stmt, source_line: Callable[[int], str]) -> Optional[int]:
+    body = _last_block(node)
+    if not body:
+        return None
+    first = body[0]
+    # a one-line suite (`if x: pass`) has no footer
+    if source_line(first.lineno).encode("utf-8")[:first.col_offset].strip():
+        return None
+    return first.col_offset
+
+def is_main_guard(test: ast.expr) -> bool:
+    """`__name__ == "__main__"` (either way round) -- never true on Lambda."""
+    if not isinstance(test, ast.Compare) or len(test.ops) != 1 or not isinstance(test.ops[0], ast.Eq):
+        return False
+    sides = [test.left, test.comparators[0]]
+    names = [s.id for s in sides if isinstance(s, ast.Name)]
+    strings = [s.value for s in sides if isinstance(s, ast.Constant) and isinstance(s.value, str)]
+    return names == ["__name__"] and strings == ["__main__"]
+
+def _import_aliases(node: ast.stmt) -> Dict[str, str]:
+    names = [(a.name, a.asname) for a in node.names]
+    if isinstance(node, ast.Import):
+        return import_aliases(None, names)
+    if node.module is None:
+        return {}
+    return import_aliases(node.module, names, node.level)
+
+_NOT_RUN = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+
+def _executed(nodes) -> List[ast.AST]:
+    """Pre-order walk of `nodes` that skips bodies of nested defs, classes and lambdas."""
+    out: List[ast.AST] = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, _NOT_RUN):
+            continue
+        out.append(node)
+        stack.extend(reversed(list(ast.iter_child_nodes(node))))
+    return out
+
+def _in_source_order(calls: List[ast.Call]) -> List[ast.Call]:
+    # libcst visits children in source order; ast does not (IfExp, keywords).
+    # The sort is stable, so an outer call still precedes one nested in its func.
+    return sorted(calls, key=lambda n: (n.lineno, n.col_offset))
+
+def _calls(nodes, skip: Tuple[ast.Call, ...] = ()) -> List[ast.Call]:
+    return _in_source_order([n for n in _executed(nodes) if isinstance(n, ast.Call) and not any(n is s for s in skip)])
+
+class AstModuleVisitor(ModuleChecks):
+    """Runs the module-level rules on `ast.parse` output."""
+
+    def __init__(self, filename: str, severities: Dict[str,str], hook_names: List[str], source_text: str,
+                 registry: Optional[RuleRegistry] = None):
+        super().__init__(filename, severities, hook_names, source_text, registry)
+        self._byte_lines: Optional[List[bytes]] = None
+
+    def run(self, tree: Optional[ast.Module] = None) -> None:
+        tree = tree if tree is not None else ast.parse(self._source)
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name in self.hook_names:
+                self.seen_hooks.add(node.name)
+        facts = ModuleFacts()
+        self._lower_body(tree.body, _Comments(self._source), facts, block=False)
+        self.check_module(facts, tree)
+
+    def position(self, node) -> Tuple[int, int]:
+        if isinstance(node, ast.Module):
+            return 1, 0
+        # ast columns are UTF-8 byte offsets, libcst's are characters
+        line = self.source_line(node.lineno)
+        return node.lineno, len(line.encode("utf-8")[:node.col_offset].decode("utf-8", "ignore"))
+
+    def _lower_body(self, body: List[ast.stmt], comments: _Comments, facts: ModuleFacts, block: bool) -> None:
+        lines = facts.lines
+        prev_end = 0             # line of the NEWLINE ending the previous statement
+        prev_indent = None       # footer indent of the previous compound statement
+        group: List[ast.stmt] = []
+        current: Optional[StatementLine] = None
+
+        def flush() -> None:
+            if group:
+                current.smalls = [self._lower_small(s, facts) for s in group]
+
+        for i, node in enumerate(body):
+            if not isinstance(node, _COMPOUND) and group and node.lineno == comments.logical_end(group[-1]):
+                group.append(node)  # `a = 1; b = 2`
+                current.trailing = comments.trailing.get(comments.logical_end(node))
+                prev_end = comments.logical_end(node)
+                continue
+            flush()
+            group = []
+            if i == 0:
+                # the module header owns comments above the first statement;
+                # in a block, the first statement owns those below the header
+                leading: List[str] = self._comments_above(node, comments) if block else []
+            else:
+                found = comments.between(prev_end + 1, node.lineno - 1)
+                if prev_indent is not None:
+                    cut = max((k for k, (indent, _) in enumerate(found) if indent >= prev_indent), default=-1)
+                    found = found[cut + 1:]
+                leading = [text for _, text in found]
+            if isinstance(node, _COMPOUND):
+                prev_indent = _block_indent(node, self.source_line)
+                self._lower_compound(node, comments, facts)
+            else:
+                prev_indent = None
+                group = [node]
+                current = StatementLine(
+                    node=node,
+                    smalls=[],
+                    leading=leading,
+                    trailing=comments.trailing.get(comments.logical_end(node)),
+                )
+                lines.append(current)
+            prev_end = comments.logical_end(node)
+        flush()
+
+    def _comments_above(self, node: ast.stmt, comments: _Comments) -> List[str]:
+        found = []
+        n = node.lineno - 1
+        while n >= 1 and (n in comments.full_line or not self.source_line(n).strip()):
+            if n in comments.full_line:
+                found.append(comments.full_line[n][1])
+            n -= 1
+        return found[::-1]
+
+    def _lower_compound(self, node: ast.stmt, comments: _Comments, facts: ModuleFacts) -> None:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            self._function(node, facts)
+        elif isinstance(node, ast.ClassDef):
+            methods = set()
+            for stmt in node.body:
+                if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    methods.add(stmt.name)
+                    self._function(stmt, facts, owner=node.name)
+            bases = [dotted_name(b) for b in node.bases]
+            facts.classes[node.name] = (bases, methods)
+        elif isinstance(node, ast.If):
+            if not is_main_guard(node.test):
+                self._lower_block(node.body, comments, facts)
+            self._lower_block(node.orelse, comments, facts)
+        elif isinstance(node, (ast.With, ast.AsyncWith, ast.For, ast.AsyncFor, ast.While)):
+            self._lower_block(node.body, comments, facts)
+            self._lower_block(getattr(node, "orelse", []), comments, facts)
+        elif hasattr(node, "handlers"):  # Try, TryStar
+            self._lower_block(node.body, comments, facts)
+            for handler in node.handlers:
+                self._lower_block(handler.body, comments, facts)
+            self._lower_block(node.orelse, comments, facts)
+            self._lower_block(node.finalbody, comments, facts)
+
+    def _lower_block(self, body: List[ast.stmt], comments: _Comments, facts: ModuleFacts) -> None:
+        if not body:
+            return
+        first = body[0]
+        if not self.source_line(first.lineno).encode("utf-8")[:first.col_offset].strip():
+            self._lower_body(body, comments, facts, block=True)
+            return
+        # one-line suite (`if x: a = 1; b = 2`)
+        facts.lines.append(StatementLine(
+            node=first,
+            smalls=[self._lower_small(s, facts) for s in body],
+            trailing=comments.trailing.get(comments.logical_end(body[-1])),
+        ))
+
+    def _function(self, node: ast.stmt, facts: ModuleFacts, owner: Optional[str] = None) -> None:
+        aliases: Dict[str, str] = {}
+        found = []
+        for sub in _executed(node.body):
+            if isinstance(sub, ast.Call):
+                found.append(sub)
+            elif isinstance(sub, (ast.Import, ast.ImportFrom)):
+                aliases.update(_import_aliases(sub))
+        calls = [self._lower_call(c) for c in _in_source_order(found)]
+        key = f"{owner}.{node.name}" if owner else node.name
+        facts.functions[key] = FunctionFacts(calls, aliases, owner)
+
+    def _first_str_arg(self, call: ast.Call) -> Optional[str]:
+        arg = _first_argument(call)
+        if isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+            segment = self._segment(arg)
+            if segment is not None and _is_simple_string(segment):
+                return arg.value
+        return None
+
+    def _segment(self, node: ast.expr) -> Optional[str]:
+        # ast.get_source_segment re-splits the whole source on every call
+        if self._byte_lines is None:
+            self._byte_lines = self._source.encode("utf-8").splitlines(keepends=True)
+        lines = self._byte_lines[node.lineno - 1:node.end_lineno]
+        if not lines:
+            return None
+        if len(lines) == 1:
+            return lines[0][node.col_offset:node.end_col_offset].decode("utf-8")
+        lines[0] = lines[0][node.col_offset:]
+        lines[-1] = lines[-1][:node.end_col_offset]
+        return b"".join(lines).decode("utf-8")
+
+    def _lower_call(self, call: ast.Call) -> SmallStatement:
+        return SmallStatement("call", call=dotted_name(call.func), first_arg=self._first_str_arg(call))
+
+    def _lower_small(self, small: ast.stmt, facts: ModuleFacts) -> SmallStatement:
+        skip: Tuple[ast.Call, ...] = ()
+        if isinstance(small, ast.Assign):
+            value = small.value
+            mutable = isinstance(value, (ast.List, ast.Dict, ast.Set)) or (
+                isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id in MUTABLE_FACTORIES)
+            out = SmallStatement("assign", mutable=mutable)
+            if isinstance(value, ast.Call):
+                out.call, out.first_arg = dotted_name(value.func), self._first_str_arg(value)
+                skip = (value,)
+        elif isinstance(small, ast.Expr) and isinstance(small.value, ast.Call):
+            call = small.value
+            out = SmallStatement("expr", call=dotted_name(call.func), first_arg=self._first_str_arg(call))
+            skip = (call,)
+            if isinstance(call.func, ast.Attribute) and call.func.attr == "start" and isinstance(call.func.value, ast.Call):
+                out.started = dotted_name(call.func.value.func)
+                skip = (call, call.func.value)
+        else:
+            if isinstance(small, (ast.Import, ast.ImportFrom)):
+                facts.aliases.update(_import_aliases(small))
+            out = SmallStatement("other")
+        out.nested = [self._lower_call(c) for c in _calls([small], skip)]
+        return out
+
+def _first_argument(call: ast.Call) -> Optional[ast.expr]:
+    # libcst keeps arguments in source order; ast splits positional and keyword
+    candidates = [a for a in call.args] + [k.value for k in call.keywords]
+    if not candidates:
+        return None
+    first = min(candidates, key=lambda n: (n.lineno, n.col_offset))
+    if isinstance(first, ast.Starred):
+        return None
+    return first
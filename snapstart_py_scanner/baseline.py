@@ -0,0 +1,179 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Baseline of accepted findings (`--baseline`, `--update-baseline`).
+
+A finding's fingerprint hashes its rule id, its file relative to the repo
+root, the scope it sits in (the headers of the enclosing blocks, e.g.
+`class Config > if DEBUG`) and its code line with whitespace and trailing
+comment normalised. File-level findings (PY008) hash rule and file only.
+Line numbers are left out, so edits elsewhere in a file don't invalidate
+the baseline. The baseline keeps a count per fingerprint: a second copy of
+an accepted line is a new finding.
+
+Loading builds one dict of fingerprint -> count; filtering a stream of
+findings is a hash and a dict lookup each, however large the baseline.
+"""
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import pathlib
+import re
+from typing import Dict, Iterable, Iterator, List
+from .findings import Finding
+from .lineindex import LineIndex, LineIndexCache
+from .rules import PY008, PY009
+
+VERSION = 1
+DEFAULT_FILE = ".snapstart-baseline.json"
+
+_SPACE = re.compile(r"\s+")
+_PUNCT_SPACE = re.compile(r" (?=[^\w ])|(?<=[^\w ]) ")
+_DEF = re.compile(r"^(?:async\s+)?(def|class)\s+(\w+)")
+
+def _strip_comment(code: str) -> str:
+    """`code` without a trailing `# ...`, unless the `#` is inside a string."""
+    if "#" not in code:
+        return code
+    quote = None
+    for i, ch in enumerate(code):
+        if quote:
+            if ch == quote and code[i - 1] != "\\":
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "#":
+            return code[:i]
+    return code
+
+def normalise_code(code: str) -> str:
+    """`code` without comment, and with whitespace only where it separates words."""
+    return _PUNCT_SPACE.sub("", _SPACE.sub(" ", _strip_comment(code)).strip())
+
+def _file_level(f: Finding) -> bool:
+    # PY008 and the probe's total are about the whole file; line 1 is only an anchor
+    return f.rule_id == PY008 or (f.rule_id == PY009 and f.lineno == 1)
+
+def _header(text: str) -> str:
+    m = _DEF.match(text)
+    if m:
+        return f"{m.group(1)} {m.group(2)}"
+    return normalise_code(text).rstrip(":").rstrip()
+
+def enclosing_scope(lines: LineIndex, lineno: int, col: int) -> str:
+    """Headers of the blocks around the statement at (lineno, col), outermost first.
+
+    Module-level code (column 0) has scope "" and reads nothing. Otherwise
+    the scope is found by walking up to each less indented line.
+    """
+    if col <= 0:
+        return ""
+    text = lines.line(lineno)
+    indent = len(text) - len(text.lstrip())
+    parts: List[str] = []
+    if indent < col:  # a one-line suite, `if x: a = 1`
+        parts.append(_header(text[indent:col]))
+    n = lineno - 1
+    while indent > 0 and n >= 1:
+        above = lines.line(n)
+        stripped = above.strip()
+        if stripped and not stripped.startswith("#"):
+            level = len(above) - len(above.lstrip())
+            if level < indent:
+                parts.append(_header(stripped))
+                indent = level
+        n -= 1
+    return " > ".join(reversed(parts))
+
+def _digest(key: tuple) -> str:
+    return hashlib.blake2b("\0".join(key).encode("utf-8"), digest_size=10).hexdigest()
+
+class Baseline:
+    """Accepted findings of a repo, by fingerprint."""
+
+    def __init__(self, root: pathlib.Path, counts: Dict[str, int] | None = None):
+        # findings name files by the path given or, for --template, the real path
+        self._prefixes = tuple({os.path.join(str(root), ""), os.path.join(os.path.realpath(root), "")})
+        self.counts: Dict[str, int] = counts if counts is not None else {}
+        self.suppressed = 0
+        self._remaining = dict(self.counts)
+        self._lines = LineIndexCache()
+
+    @classmethod
+    def load(cls, path: pathlib.Path, root: pathlib.Path) -> "Baseline":
+        """Raises OSError or ValueError for a missing or malformed file."""
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} snapstart baseline")
+        return cls(root, {e["fingerprint"]: int(e.get("count", 1)) for e in data.get("findings", [])})
+
+    def relative(self, filename: str) -> str:
+        for prefix in self._prefixes:
+            if filename.startswith(prefix):
+                filename = filename[len(prefix):]
+                break
+        return filename.replace(os.sep, "/")
+
+    def key(self, f: Finding) -> tuple:
+        """(rule id, relative file, scope, normalised code) of a finding."""
+        if _file_level(f):
+            return f.rule_id, self.relative(f.filename), "", ""
+        scope = enclosing_scope(self._lines.get(f.filename), f.lineno, f.col) if f.col > 0 else ""
+        return f.rule_id, self.relative(f.filename), scope, normalise_code(f.code)
+
+    def fingerprint(self, f: Finding) -> str:
+        return _digest(self.key(f))
+
+    def suppress(self, f: Finding) -> bool:
+        """True, once per accepted copy, if `f` is in the baseline."""
+        fp = self.fingerprint(f)
+        left = self._remaining.get(fp)
+        if not left:
+            return False
+        self._remaining[fp] = left - 1
+        self.suppressed += 1
+        return True
+
+    def filter(self, findings: Iterable[Finding]) -> Iterator[Finding]:
+        """The findings that are not in the baseline, as they arrive."""
+        for f in findings:
+            if not self.suppress(f):
+                yield f
+
+    @property
+    def fixed(self) -> int:
+        """Accepted findings not seen in this scan (fixed, or their line changed)."""
+        return sum(self._remaining.values())
+
+    def write(self, path: pathlib.Path, findings: Iterable[Finding]) -> int:
+        """Replace the baseline at `path` with `findings`; returns how many were written."""
+        entries: Dict[str, dict] = {}
+        total = 0
+        for f in findings:
+            key = self.key(f)
+            fp = _digest(key)
+            entry = entries.get(fp)
+            if entry is None:
+                entry = entries[fp] = {"fingerprint": fp, "rule_id": key[0], "filename": key[1],
+                                       "scope": key[2], "code": key[3], "count": 0}
+            entry["count"] += 1
+            total += 1
+        ordered = sorted(entries.values(), key=lambda e: (e["filename"], e["rule_id"], e["scope"], e["code"]))
+        path.write_text(json.dumps({"version": VERSION, "findings": ordered}, indent=2) + "\n", encoding="utf-8")
+        return total
+
+    def close(self) -> None:
+        self._lines.close()
@@ -0,0 +1,285 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""`snapstart-scan batch`: scan many repositories with one warm worker pool.
+
+    snapstart-scan batch MANIFEST|REPO... [--out-dir DIR] [--format json|jsonl|sarif] [-j N]
+
+A manifest lists local repository paths, one per line; blank lines and `#`
+comments are skipped and relative paths are taken from the manifest's
+directory. Every repository is scanned with its own `.snapstartpy.yaml`
+and result cache, as `snapstart-scan REPO` would, but the interpreter,
+the process pool and each worker's parser start once for the whole batch.
+
+Scheduling runs on an asyncio loop. A producer per open repository walks,
+reads, prefilters and looks up its files a chunk at a time and puts the
+chunks that need parsing on one bounded queue, yielding after each chunk,
+so open repositories take turns and a huge one cannot hold up the rest.
+Consumers, enough to keep every worker busy, hand chunks to the pool
+together with their repository's settings. When a repository's last chunk
+is back its report is written and the next repository is opened.
+
+Output in DIR: `<repo name>.<format>` per repository, the same report as
+`--format` gives for a single scan, and `summary.json` with each
+repository's counts, exit code and time plus totals. The exit status is
+the worst repository's, or 3 if a repository could not be scanned.
+"""
+
+from __future__ import annotations
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import pathlib
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from .budget import TRANSIENT
+from .cache import CACHE_DIR, DEFAULT_MAX_BYTES, ResultCache
+from .config import ENGINES, RuleConfig, load_config
+from .findings import FindingStore, exit_code_from_counts
+from .scanner import ScanStats, collect_records, plan_files, scan_settings, shared_pool
+from .walker import iter_python_files
+from .writers import WRITERS, make_writer
+
+FORMATS = ("json",) + WRITERS
+SUMMARY_FILE = "summary.json"
+FAILED = 3  # exit status when a repository could not be scanned
+
+@dataclass
+class RepoScan:
+    path: pathlib.Path
+    name: str                        # report file stem, unique within the batch
+    cfg: Optional[RuleConfig] = None
+    cache: Optional[ResultCache] = None
+    stats: ScanStats = field(default_factory=ScanStats)
+    results: Dict[int, Tuple[list, list]] = field(default_factory=dict)  # chunk number -> (entries, scanned)
+    chunks: int = 0
+    planned: bool = False
+    done: Optional[asyncio.Event] = None
+    seconds: float = 0.0
+    counts: Dict[str, int] = field(default_factory=dict)
+    exit_code: int = 0
+    report: Optional[str] = None
+    error: str = ""
+
+    def finished(self) -> bool:
+        return self.planned and len(self.results) == self.chunks
+
+    def to_dict(self) -> Dict:
+        s = self.stats
+        return {"path": str(self.path), "name": self.name, "report": self.report, "error": self.error or None,
+                "files_seen": s.files_seen, "files_parsed": s.files_parsed, "files_cached": s.files_cached,
+                "files_prefiltered": s.files_prefiltered, "files_skipped": s.files_skipped,
+                "files_degraded": s.files_degraded, "counts": self.counts, "exit_code": self.exit_code,
+                "seconds": round(self.seconds, 3)}
+
+def read_manifest(path: pathlib.Path) -> List[pathlib.Path]:
+    repos = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            repos.append((path.parent / os.path.expanduser(line)).resolve())
+    return repos
+
+def _names(paths: List[pathlib.Path]) -> List[str]:
+    """Report stems: the directory name, with a hash of the path where two repos share one."""
+    seen: Dict[str, int] = {}
+    for p in paths:
+        seen[p.name] = seen.get(p.name, 0) + 1
+    return [p.name if seen[p.name] == 1 else f"{p.name}-{hashlib.sha1(str(p).encode('utf-8')).hexdigest()[:8]}"
+            for p in paths]
+
+class BatchScanner:
+    def __init__(self, repos: List[pathlib.Path], out_dir: pathlib.Path, fmt: str = "json", jobs: int = 1,
+                 engine: Optional[str] = None, use_cache: bool = True, cache_max_bytes: int = DEFAULT_MAX_BYTES,
+                 prefilter: bool = True, memory_mb: int = 0, repos_at_once: Optional[int] = None):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+        self.repos = [RepoScan(p, n) for p, n in zip(repos, _names(repos))]
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.jobs = max(1, jobs)
+        self.engine = engine
+        self.use_cache = use_cache
+        self.cache_max_bytes = cache_max_bytes
+        self.prefilter = prefilter
+        self.memory_mb = memory_mb
+        # enough open repositories to fill the queue from several at once, not all of them
+        self.repos_at_once = repos_at_once or max(4, 2 * self.jobs)
+        self.seconds = 0.0
+
+    def run(self) -> Dict:
+        """Scan every repository, write the reports and return the summary."""
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        pool = shared_pool(self.jobs, self.memory_mb)
+        try:
+            asyncio.run(self._run(pool))
+        finally:
+            pool.close()
+        self.seconds = time.perf_counter() - start
+        summary = self.summary()
+        (self.out_dir / SUMMARY_FILE).write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
+        return summary
+
+    async def _run(self, pool) -> None:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=2 * self.jobs)
+        slots = asyncio.Semaphore(self.repos_at_once)
+        consumers = [asyncio.create_task(self._consume(queue, pool)) for _ in range(4 * self.jobs)]
+        try:
+            await asyncio.gather(*(self._produce(repo, queue, slots) for repo in self.repos))
+        finally:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+
+    async def _produce(self, repo: RepoScan, queue: asyncio.Queue, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            started = time.perf_counter()
+            repo.done = asyncio.Event()
+            try:
+                if not repo.path.is_dir():
+                    raise OSError(f"not a directory: {repo.path}")
+                repo.cfg = load_config(repo.path)
+                if self.engine:
+                    repo.cfg.engine = self.engine
+                if repo.cfg.engine not in ENGINES:
+                    raise ValueError(f"unknown engine {repo.cfg.engine!r}")
+                if self.use_cache:
+                    repo.cache = ResultCache(repo.path / CACHE_DIR, repo.cfg, max_bytes=self.cache_max_bytes)
+                settings = scan_settings(repo.cfg)
+                files = iter_python_files(repo.path, ignore_paths=repo.cfg.ignore_paths)
+                for entries, misses in plan_files(repo.cfg, files, repo.stats, repo.cache, self.prefilter):
+                    n, repo.chunks = repo.chunks, repo.chunks + 1
+                    if misses:
+                        await queue.put((repo, n, entries, misses, settings))
+                    else:
+                        repo.results[n] = (entries, [])
+                    await asyncio.sleep(0)  # the next repository's turn, even if the queue has room
+                repo.planned = True
+                if not repo.finished():
+                    await repo.done.wait()
+                self._finish(repo)
+            except Exception as e:  # one broken repository must not stop the batch
+                repo.error = f"{type(e).__name__}: {' '.join(str(e).split())}"
+                print(f"[WARN] Could not scan {repo.path}: {repo.error}", file=sys.stderr)
+            finally:
+                if repo.cache is not None:
+                    repo.cache.close()
+                repo.results.clear()
+                repo.seconds = time.perf_counter() - started
+
+    async def _consume(self, queue: asyncio.Queue, pool) -> None:
+        from concurrent.futures.process import BrokenProcessPool
+        while True:
+            repo, n, entries, misses, settings = await queue.get()
+            handle = pool.submit(misses, settings)
+            try:
+                scanned = await asyncio.wrap_future(handle[1])
+            except BrokenProcessPool:
+                # a worker died: rerun the chunk file by file to find the culprit; rare, so blocking is fine
+                scanned = pool.result(misses, handle, settings)
+            repo.results[n] = (entries, scanned)
+            if repo.finished():
+                repo.done.set()
+
+    def _finish(self, repo: RepoScan) -> None:
+        ordered = (repo.results[n] for n in range(repo.chunks))
+        store = FindingStore()
+        for filename, records in collect_records(ordered, repo.cache, repo.stats):
+            store.extend_records(filename, records)
+        out = self.out_dir / f"{repo.name}.{self.fmt}"
+        with open(out, "w", encoding="utf-8") as fh:
+            if self.fmt == "json":
+                store.write_json(fh, indent=2)
+                fh.write("\n")
+            else:
+                writer = make_writer(self.fmt, fh, repo.path)
+                for f in store:
+                    writer.write(f)
+                writer.close(repo.stats.statuses)
+        repo.report = str(out)
+        repo.counts = store.counts()
+        unfinished = sum(1 for s in repo.stats.statuses if s.reason in TRANSIENT)
+        repo.exit_code = exit_code_from_counts(repo.counts, repo.cfg.exit_on, unfinished)
+
+    def summary(self) -> Dict:
+        repos = [r.to_dict() for r in self.repos]
+        totals: Dict = {"repos": len(repos), "failed": sum(1 for r in self.repos if r.error), "counts": {}}
+        for key in ("files_seen", "files_parsed", "files_cached", "files_prefiltered", "files_skipped",
+                    "files_degraded"):
+            totals[key] = sum(r[key] for r in repos)
+        for r in self.repos:
+            for level, n in r.counts.items():
+                totals["counts"][level] = totals["counts"].get(level, 0) + n
+        totals["seconds"] = round(self.seconds, 3)
+        totals["files_per_second"] = round(totals["files_seen"] / self.seconds, 1) if self.seconds else 0.0
+        worst = max((r.exit_code for r in self.repos), default=0)
+        return {"jobs": self.jobs, "format": self.fmt, "exit_code": FAILED if totals["failed"] else worst,
+                "totals": totals, "repos": repos}
+
+def format_summary(summary: Dict) -> str:
+    repos = summary["repos"]
+    width = max([4] + [len(r["name"]) for r in repos])
+    lines = [f"  {'repo':<{width}} {'files':>7} {'parsed':>7} {'skipped':>7} {'ERROR':>6} {'WARN':>6} {'exit':>5} "
+             f"{'seconds':>8}"]
+    for r in repos:
+        if r["error"]:
+            lines.append(f"  {r['name']:<{width}} failed: {r['error']}")
+            continue
+        c = r["counts"]
+        lines.append(f"  {r['name']:<{width}} {r['files_seen']:>7} {r['files_parsed']:>7} {r['files_skipped']:>7} "
+                     f"{c.get('ERROR', 0):>6} {c.get('WARN', 0):>6} {r['exit_code']:>5} {r['seconds']:>8.1f}")
+    t = summary["totals"]
+    lines.append(f"{t['repos']} repositories ({t['failed']} failed), {t['files_seen']} files in {t['seconds']:.1f}s "
+                 f"({t['files_per_second']:.0f} files/s on {summary['jobs']} worker(s)); exit {summary['exit_code']}")
+    return "\n".join(lines)
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(prog="snapstart-scan batch",
+                                 description="Scan many repositories with one warm worker pool")
+    ap.add_argument("paths", nargs="+", help="Repository directories, or manifest files listing one per line")
+    ap.add_argument("--out-dir", default="snapstart_batch", help="Directory for the per-repository reports and summary.json (default: ./snapstart_batch)")
+    ap.add_argument("--format", choices=list(FORMATS), default="json", help="Per-repository report format (default: json)")
+    ap.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Number of worker processes shared by all repositories (default: CPU count)")
+    ap.add_argument("--repos-at-once", type=int, help="Repositories scanned side by side (default: twice the worker count, at least 4)")
+    ap.add_argument("--engine", choices=list(ENGINES), help="Analysis backend for every repository (default: each repository's config)")
+    ap.add_argument("--no-cache", action="store_true", help="Do not read or write the repositories' result caches")
+    ap.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Cache size limit per repository (default=64)")
+    ap.add_argument("--no-prefilter", action="store_true", help="Parse every file, even those without any hazard trigger tokens")
+    ap.add_argument("--max-worker-mb", type=int, default=0, help="Memory limit of each worker process (default: 0 = no limit; per-repository configs don't apply)")
+    args = ap.parse_args(argv)
+
+    repos: List[pathlib.Path] = []
+    for p in map(pathlib.Path, args.paths):
+        if p.is_file():
+            try:
+                repos.extend(read_manifest(p))
+            except (OSError, UnicodeDecodeError) as e:
+                ap.error(f"manifest {p}: {e}")
+        else:
+            repos.append(p.resolve())
+    if not repos:
+        ap.error("no repositories to scan")
+    scanner = BatchScanner(list(dict.fromkeys(repos)), pathlib.Path(args.out_dir).resolve(), args.format, args.jobs,
+                           engine=args.engine, use_cache=not args.no_cache,
+                           cache_max_bytes=args.cache_max_mb * 1024 * 1024, prefilter=not args.no_prefilter,
+                           memory_mb=args.max_worker_mb, repos_at_once=args.repos_at_once)
+    summary = scanner.run()
+    print(format_summary(summary))
+    print(f"Reports written to: {scanner.out_dir}", file=sys.stderr)
+    return summary["exit_code"]
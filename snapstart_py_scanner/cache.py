@@ -0,0 +1,114 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import hashlib
+import json
+import pathlib
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple
+from . import __version__
+from .config import RuleConfig
+from .registry import default_registry
+
+CACHE_DIR = ".snapstartpy_cache"
+CACHE_FILE = "results.sqlite3"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# (records, note) exactly as produced by a scan worker for one file; see budget.Note
+CachedResult = Tuple[Optional[List[tuple]], Optional[Tuple[str, str]]]
+
+def config_fingerprint(cfg: RuleConfig) -> str:
+    """Hash of everything in the config that changes a file's findings."""
+    payload = json.dumps({
+        "version": __version__,
+        "severity": sorted(cfg.severity.items()),
+        "hook_names": sorted(cfg.hook_names),
+        "engine": cfg.engine,
+        "max_parse_kb": cfg.max_parse_kb,
+        "rules": default_registry().signature(),
+    })
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """On-disk map from (file content, scanner version, rule config) to findings.
+
+    Entries are evicted least-recently-used first once the stored payload
+    exceeds `max_bytes`. Writes are batched and committed on close().
+    """
+
+    def __init__(self, cache_dir: pathlib.Path, cfg: RuleConfig, max_bytes: int = DEFAULT_MAX_BYTES):
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._salt = config_fingerprint(cfg).encode("ascii")
+        self._touched: Dict[str, int] = {}
+        self._db = sqlite3.connect(str(cache_dir / CACHE_FILE))
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " key TEXT PRIMARY KEY, payload TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+
+    def key(self, content: bytes) -> str:
+        h = hashlib.sha256(self._salt)
+        h.update(content)
+        return h.hexdigest()
+
+    def get(self, key: str) -> CachedResult | None:
+        row = self._db.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = int(time.time())
+        records, note = json.loads(row[0])
+        return ([tuple(r) for r in records] if records is not None else None), (tuple(note) if note else None)
+
+    def put(self, key: str, result: CachedResult) -> None:
+        payload = json.dumps(result, separators=(",", ":"))
+        self._db.execute(
+            "INSERT OR REPLACE INTO results (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload), int(time.time())),
+        )
+
+    def close(self) -> None:
+        if self._touched:
+            self._db.executemany(
+                "UPDATE results SET last_used = ? WHERE key = ?",
+                [(ts, key) for key, ts in self._touched.items()],
+            )
+        self._evict()
+        self._db.commit()
+        self._db.close()
+
+    def _evict(self) -> None:
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY last_used ASC"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM results WHERE key = ?", doomed)
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,113 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Thin client for `snapstart-scan serve`.
+
+Stdlib only and imports nothing else from the package, so
+`python -m snapstart_py_scanner.client` answers in milliseconds:
+
+    python -m snapstart_py_scanner.client [PATH] [--format text|json|jsonl] [--paths a.py,lib/]
+"""
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import pathlib
+import socket
+import sys
+import tempfile
+from typing import Dict, Optional
+
+# keep in sync with cache.CACHE_DIR / daemon.default_socket_path
+CACHE_DIR = ".snapstartpy_cache"
+SOCKET_NAME = "serve.sock"
+
+class DaemonUnavailable(RuntimeError):
+    pass
+
+def default_socket_path(root: pathlib.Path) -> pathlib.Path:
+    path = root / CACHE_DIR / SOCKET_NAME
+    if len(str(path)) < 100:
+        return path
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:12]
+    return pathlib.Path(tempfile.gettempdir()) / f"snapstartpy-{digest}.sock"
+
+def request(socket_path: pathlib.Path, payload: Dict, timeout: float = 30.0) -> Dict:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        sock.close()
+        raise DaemonUnavailable(f"no daemon on {socket_path} (start one with `snapstart-scan serve`)") from e
+    with sock:
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            data = sock.recv(1 << 16)
+            if not data:
+                break
+            chunks.append(data)
+    return json.loads(b"".join(chunks))
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(prog="snapstart-scan query", description="Query a running snapstart-scan daemon")
+    ap.add_argument("path", nargs="?", default=".", help="Repo root the daemon serves")
+    ap.add_argument("--socket", help="Daemon socket path (default: derived from PATH)")
+    ap.add_argument("--format", choices=["text", "json", "jsonl"], default="text")
+    ap.add_argument("--paths", help="Comma-separated files or directories to report on (default: everything)")
+    ap.add_argument("--status", action="store_true", help="Print daemon status instead of findings")
+    ap.add_argument("--shutdown", action="store_true", help="Stop the daemon")
+    args = ap.parse_args(argv)
+
+    root = pathlib.Path(args.path).resolve()
+    sock = pathlib.Path(args.socket) if args.socket else default_socket_path(root)
+    if args.status or args.shutdown:
+        payload = {"cmd": "status" if args.status else "shutdown"}
+    else:
+        payload = {"cmd": "findings"}
+        if args.paths:
+            payload["paths"] = [p.strip() for p in args.paths.split(",") if p.strip()]
+    try:
+        resp = request(sock, payload)
+    except DaemonUnavailable as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 3
+    if not resp.get("ok"):
+        print(f"[ERROR] {resp.get('error')}", file=sys.stderr)
+        return 3
+    if payload["cmd"] != "findings":
+        print(json.dumps(resp, indent=2))
+        return 0
+
+    findings = resp["findings"]
+    if args.format == "json":
+        print(json.dumps(findings, indent=2))
+    elif args.format == "jsonl":
+        for f in findings:
+            print(json.dumps(f, separators=(",", ":")))
+    else:
+        if not findings:
+            print("No findings.")
+        for f in findings:
+            print(f"{f['level']} {f['rule_id']} {f['filename']}:{f['lineno']}:{f['col']}")
+            if f.get("code"):
+                print(f"→ {f['code']}")
+            print(f"   {f['message']}\n")
+    return resp["exit_code"]
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,10 +14,11 @@
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Dict, List
-import yaml
-import fnmatch
+from functools import lru_cache
+from typing import Dict, List, Tuple
 import pathlib
+from .budget import DEFAULT_PARSE_KB, DEFAULT_SECONDS, Limits
+from .walker import PathMatcher
 
 DEFAULT_CONFIG = {
     "severity": {
@@ -28,7 +29,8 @@ DEFAULT_CONFIG = {
         "PY005_RANDOM_TIME_UUID_AT_INIT": "WARN",
         "PY006_BOTO3_CLIENT_AT_INIT": "ERROR",
         "PY007_TMP_FILES_CREDS_AT_INIT": "WARN",
-        "PY008_MISSING_RUNTIME_HOOKS": "WARN"
+        "PY008_MISSING_RUNTIME_HOOKS": "WARN",
+        "PY009_INIT_COST": "INFO"
     },
     "ignore_paths": [
         "**/.venv/**", "**/venv/**", "**/.git/**", "**/node_modules/**",
@@ -40,9 +42,16 @@ DEFAULT_CONFIG = {
         "snapstart_before_snapshot", "snapstart_after_restore"
     ],
     "exit_on": "ERROR",
-    "format": "json"
+    "format": "json",
+    "engine": "cst",
+    "max_file_seconds": DEFAULT_SECONDS,
+    "max_parse_kb": DEFAULT_PARSE_KB,
+    "max_worker_mb": 0,
+    "scan_generated": False
 }
 
+ENGINES = ("cst", "ast")
+
 @dataclass
 class RuleConfig:
     severity: Dict[str, str] = field(default_factory=lambda: DEFAULT_CONFIG["severity"])
@@ -50,28 +59,37 @@ class RuleConfig:
     hook_names: List[str] = field(default_factory=lambda: DEFAULT_CONFIG["hook_names"])
     exit_on: str = "ERROR"
     output_format: str = "json"
+    engine: str = "cst"
+    max_file_seconds: float = DEFAULT_SECONDS  # per-file wall time; 0 = no limit
+    max_parse_kb: int = DEFAULT_PARSE_KB       # larger files get an outline scan; 0 = never
+    max_worker_mb: int = 0                     # memory of each worker process; 0 = no limit
+    scan_generated: bool = False               # also scan files that look machine-generated
+
+    @property
+    def limits(self) -> Limits:
+        return Limits(float(self.max_file_seconds), int(self.max_parse_kb) * 1024, int(self.max_worker_mb))
 
     def sev(self, rule_id: str) -> str:
         return self.severity.get(rule_id, "WARN")
 
     def path_ignored(self, path: pathlib.Path, extra_excludes: List[str] | None = None) -> bool:
         s = str(path).replace("\\","/")
-        for pat in self.ignore_paths:
-            if fnmatch.fnmatch(s, pat):
-                return True
-        for pat in (extra_excludes or []):
-            if fnmatch.fnmatch(s, pat):
-                return True
-        return False
+        return _compiled_matcher(tuple(self.ignore_paths) + tuple(extra_excludes or ())).match(s)
+
+@lru_cache(maxsize=32)
+def _compiled_matcher(patterns: Tuple[str, ...]) -> PathMatcher:
+    return PathMatcher(patterns)
 
 def load_config(root: pathlib.Path) -> RuleConfig:
     cfg_path = root / ".snapstartpy.yaml"
     if not cfg_path.exists():
         return RuleConfig()
+    import yaml  # only when there is a config file to read
     data = yaml.safe_load(cfg_path.read_text()) or {}
     merged = DEFAULT_CONFIG.copy()
     # merge top-level fields
-    for k in ["ignore_paths","hook_names","exit_on","format"]:
+    for k in ["ignore_paths","hook_names","exit_on","format","engine",
+              "max_file_seconds","max_parse_kb","max_worker_mb","scan_generated"]:
         if k in data and data[k] is not None:
             merged[k] = data[k]
     # merge severity dict
@@ -83,5 +101,10 @@ def load_config(root: pathlib.Path) -> RuleConfig:
         ignore_paths=list(merged["ignore_paths"]),
         hook_names=list(merged["hook_names"]),
         exit_on=str(merged["exit_on"]).upper(),
-        output_format=str(merged["format"]).lower()
+        output_format=str(merged["format"]).lower(),
+        engine=str(merged["engine"]).lower(),
+        max_file_seconds=float(merged["max_file_seconds"]),
+        max_parse_kb=int(merged["max_parse_kb"]),
+        max_worker_mb=int(merged["max_worker_mb"]),
+        scan_generated=bool(merged["scan_generated"])
     )
@@ -0,0 +1,318 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""libcst front end for the module-level rules.
+
+Lowers a libcst Module into ModuleFacts; the rules themselves live in
+rules.py. The module is used as parsed: there is no MetadataWrapper, so no
+defensive deep copy and no position table for every node. Positions are
+only needed for the statements that get a finding, and are resolved on the
+first one by a single code generation pass that records where those
+statements start (or by PositionProvider, if libcst's codegen internals
+have changed).
+"""
+
+from __future__ import annotations
+from contextlib import contextmanager
+import libcst as cst
+import libcst.matchers as m
+try:  # private codegen state; statement_starts falls back to PositionProvider without it
+    from libcst.metadata.position_provider import WhitespaceInclusivePositionProvidingCodegenState
+except ImportError:
+    WhitespaceInclusivePositionProvidingCodegenState = object
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .registry import RuleRegistry
+from .rules import (
+    FunctionFacts, ModuleChecks, ModuleFacts, SmallStatement, StatementLine, MUTABLE_FACTORIES,
+    import_aliases,
+)
+
+MUTABLE_LITERALS = (cst.List, cst.Dict, cst.Set)
+
+def dotted_name(node: cst.BaseExpression) -> str:
+    names = []
+    cur = node
+    while isinstance(cur, cst.Attribute):
+        if isinstance(cur.attr, cst.Name):
+            names.append(cur.attr.value)
+        cur = cur.value
+    if isinstance(cur, cst.Name):
+        names.append(cur.value)
+    names.reverse()
+    return ".".join(names)
+
+def is_main_guard(test: cst.BaseExpression) -> bool:
+    """`__name__ == "__main__"` (either way round) -- never true on Lambda."""
+    if not isinstance(test, cst.Comparison) or len(test.comparisons) != 1:
+        return False
+    target = test.comparisons[0]
+    if not isinstance(target.operator, cst.Equal):
+        return False
+    sides = [test.left, target.comparator]
+    names = [s.value for s in sides if isinstance(s, cst.Name)]
+    strings = [s.evaluated_value for s in sides if isinstance(s, cst.SimpleString)]
+    return names == ["__name__"] and strings == ["__main__"]
+
+def _first_str_arg(call: cst.Call) -> Optional[str]:
+    if call.args and isinstance(call.args[0].value, cst.SimpleString):
+        s = call.args[0].value.evaluated_value
+        if isinstance(s, str):
+            return s
+    return None
+
+def _lower_call(call: cst.Call) -> SmallStatement:
+    return SmallStatement("call", call=dotted_name(call.func), first_arg=_first_str_arg(call))
+
+class _CallCollector(cst.CSTVisitor):
+    """Collects calls made when a node executes; bodies of nested defs,
+    classes and lambdas don't run, so they are skipped."""
+
+    def __init__(self, skip: Tuple[cst.Call, ...] = ()):
+        super().__init__()
+        self.calls: List[SmallStatement] = []
+        self.aliases: Dict[str, str] = {}
+        self._skip = skip
+
+    def visit_Call(self, node: cst.Call) -> None:
+        if not any(node is s for s in self._skip):
+            self.calls.append(_lower_call(node))
+
+    def visit_Lambda(self, node: cst.Lambda) -> bool:
+        return False
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> bool:
+        return False
+
+    def visit_ClassDef(self, node: cst.ClassDef) -> bool:
+        return False
+
+    def visit_Import(self, node: cst.Import) -> None:
+        self.aliases.update(_cst_import_aliases(node))
+
+    def visit_ImportFrom(self, node: cst.ImportFrom) -> None:
+        self.aliases.update(_cst_import_aliases(node))
+
+def _cst_import_aliases(node: cst.CSTNode) -> Dict[str, str]:
+    def alias_name(a: cst.ImportAlias) -> Tuple[str, Optional[str]]:
+        asname = a.asname.name.value if a.asname and isinstance(a.asname.name, cst.Name) else None
+        return dotted_name(a.name), asname
+    if isinstance(node, cst.Import):
+        return import_aliases(None, [alias_name(a) for a in node.names])
+    if isinstance(node, cst.ImportFrom):
+        if isinstance(node.names, cst.ImportStar) or node.module is None:
+            return {}
+        return import_aliases(dotted_name(node.module), [alias_name(a) for a in node.names], len(node.relative))
+    return {}
+
+def _lower_small(small: cst.BaseSmallStatement) -> SmallStatement:
+    skip: Tuple[cst.Call, ...] = ()
+    if isinstance(small, cst.Assign):
+        value = small.value
+        mutable = isinstance(value, MUTABLE_LITERALS) or any(m.matches(value, m.Call(func=m.Name(n))) for n in MUTABLE_FACTORIES)
+        out = SmallStatement("assign", mutable=mutable)
+        if isinstance(value, cst.Call):
+            out.call, out.first_arg = dotted_name(value.func), _first_str_arg(value)
+            skip = (value,)
+    elif isinstance(small, cst.Expr) and isinstance(small.value, cst.Call):
+        call = small.value
+        out = SmallStatement("expr", call=dotted_name(call.func), first_arg=_first_str_arg(call))
+        skip = (call,)
+        if isinstance(call.func, cst.Attribute) and call.func.attr.value == "start" and isinstance(call.func.value, cst.Call):
+            out.started = dotted_name(call.func.value.func)
+            skip = (call, call.func.value)
+    else:
+        out = SmallStatement("other")
+    collector = _CallCollector(skip)
+    small.visit(collector)
+    out.nested = collector.calls
+    return out
+
+class _CstLowering:
+    """Builds ModuleFacts from a libcst Module."""
+
+    def __init__(self) -> None:
+        self.facts = ModuleFacts()
+
+    def module(self, mod: cst.Module) -> ModuleFacts:
+        self._body(mod.body)
+        return self.facts
+
+    def _body(self, body, owner_class: Optional[str] = None) -> None:
+        for stmt in body:
+            if isinstance(stmt, cst.SimpleStatementLine):
+                self._line(stmt, stmt.body, [ll.comment.value for ll in stmt.leading_lines if ll.comment],
+                           stmt.trailing_whitespace.comment)
+            elif isinstance(stmt, cst.FunctionDef):
+                self._function(stmt)
+            elif isinstance(stmt, cst.ClassDef):
+                self._class(stmt)
+            elif isinstance(stmt, cst.If):
+                if not is_main_guard(stmt.test):
+                    self._block(stmt.body)
+                self._orelse(stmt.orelse)
+            elif isinstance(stmt, (cst.Try, getattr(cst, "TryStar", cst.Try))):
+                self._block(stmt.body)
+                for handler in stmt.handlers:
+                    self._block(handler.body)
+                self._orelse(stmt.orelse)
+                if stmt.finalbody is not None:
+                    self._block(stmt.finalbody.body)
+            elif isinstance(stmt, (cst.With, cst.For, cst.While)):
+                self._block(stmt.body)
+                self._orelse(getattr(stmt, "orelse", None))
+
+    def _orelse(self, orelse) -> None:
+        if orelse is None:
+            return
+        if isinstance(orelse, cst.If):  # elif
+            self._body([orelse])
+        else:
+            self._block(orelse.body)
+
+    def _block(self, block: cst.BaseSuite) -> None:
+        if isinstance(block, cst.SimpleStatementSuite):
+            self._line(block.body[0], block.body, [], block.trailing_whitespace.comment)
+        else:
+            self._body(block.body)
+
+    def _line(self, node, smalls, leading: List[str], trailing: Optional[cst.Comment]) -> None:
+        for small in smalls:
+            if isinstance(small, (cst.Import, cst.ImportFrom)):
+                self.facts.aliases.update(_cst_import_aliases(small))
+        self.facts.lines.append(StatementLine(
+            node=node,
+            smalls=[_lower_small(small) for small in smalls],
+            leading=leading,
+            trailing=trailing.value if trailing else None,
+        ))
+
+    def _function(self, node: cst.FunctionDef, owner: Optional[str] = None) -> None:
+        collector = _CallCollector()
+        node.body.visit(collector)
+        key = f"{owner}.{node.name.value}" if owner else node.name.value
+        self.facts.functions[key] = FunctionFacts(collector.calls, collector.aliases, owner)
+
+    def _class(self, node: cst.ClassDef) -> None:
+        name = node.name.value
+        methods: Set[str] = set()
+        body = node.body.body if isinstance(node.body, cst.IndentedBlock) else []
+        for stmt in body:
+            if isinstance(stmt, cst.FunctionDef):
+                methods.add(stmt.name.value)
+                self._function(stmt, owner=name)
+        bases = [dotted_name(arg.value) for arg in node.bases if arg.keyword is None]
+        self.facts.classes[name] = (bases, methods)
+
+class _StartState(WhitespaceInclusivePositionProvidingCodegenState):
+    """Code generation that only tracks line and column, and notes where `wanted` nodes start."""
+
+    def __init__(self, module: cst.Module, wanted: Set[cst.CSTNode]):
+        super().__init__(default_indent=module.default_indent, default_newline=module.default_newline,
+                         provider=None)
+        self.wanted = wanted
+        self.starts: Dict[cst.CSTNode, Tuple[int, int]] = {}
+
+    def _update_position(self, value: str) -> None:
+        if "\r" in value:
+            super()._update_position(value)
+            return
+        last = value.rfind("\n")
+        if last == -1:
+            self.column += len(value)
+        else:
+            self.line += value.count("\n")
+            self.column = len(value) - last - 1
+
+    def before_codegen(self, node: cst.CSTNode) -> None:
+        pass
+
+    def after_codegen(self, node: cst.CSTNode) -> None:
+        pass
+
+    @contextmanager
+    def record_syntactic_position(self, node: cst.CSTNode, *, start_node: Optional[cst.CSTNode] = None,
+                                  end_node: Optional[cst.CSTNode] = None) -> Iterator[None]:
+        if node in self.wanted:
+            self.starts[node] = (self.line, self.column)
+        yield
+
+_fast_starts = True
+
+def provider_starts(module: cst.Module, wanted: Set[cst.CSTNode]) -> Dict[cst.CSTNode, Tuple[int, int]]:
+    """statement_starts through the public MetadataWrapper and PositionProvider."""
+    from libcst.metadata import MetadataWrapper, PositionProvider
+    positions = MetadataWrapper(module, unsafe_skip_copy=True).resolve(PositionProvider)
+    return {node: (positions[node].start.line, positions[node].start.column) for node in wanted if node in positions}
+
+def statement_starts(module: cst.Module, wanted: Set[cst.CSTNode]) -> Dict[cst.CSTNode, Tuple[int, int]]:
+    """(line, column) where each statement in `wanted` starts, as PositionProvider gives it.
+
+    _StartState relies on libcst's private codegen API; if that fails, this
+    and every later call use provider_starts instead. tests/test_cst_positions.py
+    checks the two agree on the installed libcst.
+    """
+    global _fast_starts
+    if _fast_starts:
+        try:
+            state = _StartState(module, wanted)
+            module._codegen(state)
+            return state.starts
+        except Exception:
+            _fast_starts = False
+    return provider_starts(module, wanted)
+
+def _function_names(node: cst.CSTNode, out: Set[str]) -> Set[str]:
+    """Names of the defs anywhere in `node`'s blocks; a def is always a statement, so
+    expressions are not walked."""
+    for attr in ("body", "orelse", "handlers", "finalbody", "cases"):
+        block = getattr(node, attr, None)
+        if block is None or isinstance(block, cst.SimpleStatementSuite):
+            continue
+        if isinstance(block, cst.IndentedBlock):
+            block = block.body
+        for item in block if isinstance(block, (list, tuple)) else (block,):
+            if isinstance(item, cst.FunctionDef):
+                out.add(item.name.value)
+            if not isinstance(item, (cst.SimpleStatementLine, cst.BaseSmallStatement)):
+                _function_names(item, out)
+    return out
+
+class ModuleLevelVisitor(ModuleChecks, cst.CSTVisitor):
+    """Checks a module with run(module), or as a visitor (`module.visit(visitor)`)."""
+
+    def __init__(self, filename: str, severities: Dict[str,str], hook_names: List[str], source_text: str,
+                 registry: Optional[RuleRegistry] = None):
+        ModuleChecks.__init__(self, filename, severities, hook_names, source_text, registry)
+        cst.CSTVisitor.__init__(self)
+        self._module: Optional[cst.Module] = None
+        self._starts: Optional[Dict[cst.CSTNode, Tuple[int, int]]] = None
+
+    def run(self, module: cst.Module) -> None:
+        """Same findings as visiting `module`, without walking every node of it."""
+        self.seen_hooks.update(_function_names(module, set()) & self.hook_names)
+        self.leave_Module(module)
+
+    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
+        fn = node.name.value
+        if fn in self.hook_names:
+            self.seen_hooks.add(fn)
+
+    def leave_Module(self, node: cst.Module) -> None:
+        self._module = node
+        self.check_module(_CstLowering().module(node), node)
+
+    def position(self, node: cst.CSTNode) -> Tuple[int, int]:
+        if self._starts is None:
+            self._starts = statement_starts(self._module, {line.node for line in self._facts.lines})
+        return self._starts.get(node, (1, 0))
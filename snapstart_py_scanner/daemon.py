@@ -0,0 +1,373 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""`snapstart-scan serve`: a long-running scanner for editors and hooks.
+
+The daemon keeps the config, the file list and every file's findings in
+memory, watches the tree (inotify through ctypes on Linux, stat polling
+elsewhere) and re-scans only files that changed. Clients talk to it over a
+Unix socket, one JSON object per line in each direction; see client.py.
+
+Requests:
+    {"cmd": "findings", "paths": [...]}   findings, optionally under some paths
+    {"cmd": "status"}                     file/finding counts, watcher kind
+    {"cmd": "rescan"}                     drop everything and scan again
+    {"cmd": "shutdown"}
+"""
+
+from __future__ import annotations
+import ctypes
+import ctypes.util
+import errno
+import hashlib
+import json
+import os
+import pathlib
+import selectors
+import signal
+import socket
+import struct
+import sys
+import tempfile
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .cache import CACHE_DIR
+from .config import RuleConfig, load_config
+from .findings import Finding, count_levels, exit_code_from_counts
+from .scanner import ScanStats, iter_findings
+from .walker import PathMatcher, iter_python_files
+
+CONFIG_FILE = ".snapstartpy.yaml"
+SOCKET_NAME = "serve.sock"
+POLL_INTERVAL = 1.0
+
+def default_socket_path(root: pathlib.Path) -> pathlib.Path:
+    path = root / CACHE_DIR / SOCKET_NAME
+    if len(str(path)) < 100:  # sun_path is ~108 bytes
+        return path
+    digest = hashlib.sha1(str(root).encode("utf-8")).hexdigest()[:12]
+    return pathlib.Path(tempfile.gettempdir()) / f"snapstartpy-{digest}.sock"
+
+# --- watchers ---------------------------------------------------------------
+
+class PollingWatcher:
+    """Stats every file each `interval` seconds; works everywhere."""
+
+    kind = "poll"
+
+    def __init__(self, state: "ScanState", interval: float = POLL_INTERVAL):
+        self.state = state
+        self.interval = interval
+
+    def fileno(self) -> Optional[int]:
+        return None
+
+    def changes(self) -> Tuple[Set[str], bool]:
+        return set(), True  # resync compares (mtime, size) of the whole tree
+
+    def close(self) -> None:
+        pass
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+               IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")
+
+class InotifyWatcher:
+    """One inotify watch per directory of the tree, skipping ignored ones."""
+
+    kind = "inotify"
+
+    def __init__(self, state: "ScanState"):
+        self.state = state
+        name = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(name or "libc.so.6", use_errno=True)
+        fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._fd = fd
+        self._dirs: Dict[int, str] = {}
+        self._add_tree(str(state.root))
+
+    def fileno(self) -> Optional[int]:
+        return self._fd
+
+    def _add_tree(self, top: str) -> None:
+        skip = self.state.skip
+        stack = [top]
+        while stack:
+            current = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(current), _WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+                continue
+            self._dirs[wd] = current
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and not skip.prunes(entry.path.replace(os.sep, "/")):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def changes(self) -> Tuple[Set[str], bool]:
+        """Drain pending events: (changed .py paths, whether a full resync is needed)."""
+        paths: Set[str] = set()
+        resync = False
+        while True:
+            try:
+                buf = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(buf):
+                wd, mask, _cookie, length = _EVENT.unpack_from(buf, offset)
+                name = buf[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+                offset += _EVENT.size + length
+                if mask & IN_Q_OVERFLOW:
+                    resync = True
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                path = os.path.join(directory, os.fsdecode(name)) if name else directory
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        self._add_tree(path)
+                    resync = True  # a whole directory appeared or went away
+                elif path.endswith(".py"):
+                    paths.add(path)
+                elif not name or os.path.basename(path) == CONFIG_FILE:
+                    resync = True
+        return paths, resync
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+def make_watcher(state: "ScanState", polling: bool = False):
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(state)
+        except (OSError, AttributeError) as e:
+            print(f"[WARN] inotify unavailable ({e}); falling back to polling", file=sys.stderr)
+    return PollingWatcher(state)
+
+# --- state ------------------------------------------------------------------
+
+class ScanState:
+    """Per-file findings of one tree, updated incrementally."""
+
+    def __init__(self, root: pathlib.Path, engine: Optional[str] = None):
+        self.root = root
+        self.engine = engine
+        self.stats = ScanStats()
+        self.files: Dict[str, Tuple[int, int]] = {}       # path -> (mtime_ns, size) when scanned
+        self.findings: Dict[str, List[Finding]] = {}
+        self.last_scan = 0.0
+        self._load_config()
+
+    def _load_config(self) -> None:
+        self.cfg: RuleConfig = load_config(self.root)
+        if self.engine:
+            self.cfg.engine = self.engine
+        self.skip = PathMatcher(self.cfg.ignore_paths)
+        self._config_stamp = self._stamp(self.root / CONFIG_FILE)
+
+    @staticmethod
+    def _stamp(path: pathlib.Path) -> Optional[Tuple[int, int]]:
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def resync(self) -> int:
+        """Re-walk the tree, re-scanning new or modified files and dropping removed ones."""
+        if self._stamp(self.root / CONFIG_FILE) != self._config_stamp:
+            self._load_config()
+            self.files.clear()
+            self.findings.clear()
+        current = {str(p) for p in iter_python_files(self.root, ignore_paths=self.cfg.ignore_paths)}
+        for gone in set(self.files) - current:
+            self.files.pop(gone, None)
+            self.findings.pop(gone, None)
+        return self.update(p for p in current if self._stamp(pathlib.Path(p)) != self.files.get(p))
+
+    def update(self, paths: Iterable[str]) -> int:
+        """Re-scan `paths` (removed or ignored ones are dropped). Returns files scanned."""
+        todo = []
+        for p in paths:
+            stamp = self._stamp(pathlib.Path(p))
+            if stamp is None or self.skip.match(p.replace(os.sep, "/")):
+                self.files.pop(p, None)
+                self.findings.pop(p, None)
+                continue
+            self.files[p] = stamp
+            self.findings[p] = []
+            todo.append(pathlib.Path(p))
+        if not todo:
+            return 0
+        for f in iter_findings(self.root, todo, jobs=1, stats=self.stats, cfg=self.cfg):
+            self.findings[f.filename].append(f)
+        self.last_scan = time.time()
+        return len(todo)
+
+    def query(self, paths: Optional[List[str]] = None) -> List[Finding]:
+        prefixes = [str((self.root / p).resolve()) for p in paths or []]
+        out = []
+        for name in sorted(self.findings):
+            if prefixes and not any(name == p or name.startswith(p.rstrip(os.sep) + os.sep) for p in prefixes):
+                continue
+            out.extend(self.findings[name])
+        return out
+
+# --- server -----------------------------------------------------------------
+
+class Server:
+    def __init__(self, root: pathlib.Path, socket_path: Optional[pathlib.Path] = None,
+                 engine: Optional[str] = None, polling: bool = False):
+        self.root = root.resolve()
+        self.socket_path = socket_path or default_socket_path(self.root)
+        self.state = ScanState(self.root, engine)
+        self.polling = polling
+        self.watcher = None
+        self._running = False
+
+    def _bind(self) -> socket.socket:
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+                raise RuntimeError(f"a daemon is already serving {self.socket_path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                self.socket_path.unlink()  # stale socket from a crashed daemon
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(str(self.socket_path))
+        sock.listen(16)
+        sock.setblocking(False)
+        return sock
+
+    def serve_forever(self) -> None:
+        sock = self._bind()
+        t0 = time.monotonic()
+        scanned = self.state.resync()
+        watcher = make_watcher(self.state, self.polling)
+        print(f"[INFO] Serving {self.root} on {self.socket_path} ({scanned} files scanned in "
+              f"{time.monotonic() - t0:.1f}s, watching with {watcher.kind})", file=sys.stderr)
+        sel = selectors.DefaultSelector()
+        sel.register(sock, selectors.EVENT_READ, "client")
+        if watcher.fileno() is not None:
+            sel.register(watcher.fileno(), selectors.EVENT_READ, "watch")
+        self.watcher = watcher
+        self._running = True
+        signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        polled = time.monotonic()
+        try:
+            while self._running:
+                events = sel.select(timeout=None if watcher.fileno() is not None else POLL_INTERVAL)
+                if watcher.fileno() is None and time.monotonic() - polled >= POLL_INTERVAL:
+                    self._apply(watcher)
+                    polled = time.monotonic()
+                if any(key.data == "watch" for key, _ in events):
+                    self._apply(watcher)
+                for key, _ in events:
+                    if key.data == "client":
+                        self._accept(sock, watcher)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            sel.close()
+            watcher.close()
+            sock.close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    def stop(self) -> None:
+        self._running = False
+
+    def _apply(self, watcher) -> None:
+        paths, resync = watcher.changes()
+        if resync:
+            self.state.resync()
+        elif paths:
+            self.state.update(paths)
+
+    def _accept(self, sock: socket.socket, watcher) -> None:
+        try:
+            conn, _ = sock.accept()
+        except BlockingIOError:
+            return
+        with conn:
+            conn.setblocking(True)
+            conn.settimeout(5.0)
+            reader = conn.makefile("rb")
+            try:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    if watcher.fileno() is not None:
+                        self._apply(watcher)  # pick up edits saved just before the query
+                    conn.sendall(json.dumps(self.handle(line)).encode("utf-8") + b"\n")
+            except (OSError, socket.timeout):
+                pass
+            finally:
+                reader.close()
+
+    def handle(self, line: bytes) -> Dict:
+        try:
+            req = json.loads(line)
+            cmd = req.get("cmd")
+        except (ValueError, AttributeError) as e:
+            return {"ok": False, "error": f"bad request: {e}"}
+        state = self.state
+        if cmd == "findings":
+            findings = state.query(req.get("paths"))
+            counts = count_levels(findings)
+            return {"ok": True, "findings": [f.to_dict() for f in findings], "counts": counts,
+                    "exit_code": exit_code_from_counts(counts, state.cfg.exit_on)}
+        if cmd == "status":
+            return {"ok": True, "root": str(self.root), "files": len(state.files),
+                    "findings": sum(len(v) for v in state.findings.values()),
+                    "files_parsed": state.stats.files_parsed, "last_scan": state.last_scan,
+                    "engine": state.cfg.engine, "watcher": self.watcher.kind if self.watcher else None}
+        if cmd == "rescan":
+            state.files.clear()
+            state.findings.clear()
+            return {"ok": True, "scanned": state.resync()}
+        if cmd == "shutdown":
+            self.stop()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command {cmd!r}"}
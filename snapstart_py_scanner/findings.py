@@ -13,8 +13,10 @@
 # limitations under the License.
 
 from __future__ import annotations
-from dataclasses import dataclass, asdict
-from typing import List, Dict
+import json
+from array import array
+from dataclasses import dataclass
+from typing import IO, Dict, Iterable, Iterator, List, Sequence
 
 @dataclass
 class Finding:
@@ -26,13 +28,158 @@ class Finding:
     col: int
     code: str = ""
     def to_dict(self) -> Dict:
-        return asdict(self)
+        return {"rule_id": self.rule_id, "level": self.level, "message": self.message, "filename": self.filename,
+                "lineno": self.lineno, "col": self.col, "code": self.code}
 
-def exit_code_from_findings(findings: List[Finding], exit_on: str) -> int:
+@dataclass
+class FileStatus:
+    """A file that was skipped, or only partly analysed ("degraded"), and why."""
+    filename: str
+    status: str                      # "skipped" or "degraded"
+    reason: str                      # one of the reasons in budget.py
+    detail: str = ""
+    def to_dict(self) -> Dict:
+        return {"filename": self.filename, "status": self.status, "reason": self.reason, "detail": self.detail}
+
+# Finding fields in to_dict() order; each is a column of FindingStore
+FIELDS = ("rule_id", "level", "message", "filename", "lineno", "col", "code")
+_INTERNED_FIELDS = ("rule_id", "level", "message")
+
+class FindingStore:
+    """Findings held column by column, for result sets too big for objects.
+
+    Rule ids, levels and messages repeat and are interned once in a shared
+    table. Findings arrive grouped by file, so a file name is stored once per
+    run of findings in it, without a lookup table. Code lines are mostly
+    unique and are kept as they are, one list slot each. Iterating yields
+    Finding objects made on the fly, so the store can be passed wherever a
+    list of findings is read. write_json() serialises straight from the
+    columns, encoding each interned string only once.
+    """
+
+    def __init__(self) -> None:
+        self.strings: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._columns: Dict[str, array] = {name: array("I") for name in _INTERNED_FIELDS}
+        self.filenames: List[str] = []
+        self._file = array("I")
+        self._code: List[str] = []
+        self._lineno = array("i")
+        self._col = array("i")
+
+    @classmethod
+    def from_findings(cls, findings: Iterable[Finding]) -> "FindingStore":
+        store = cls()
+        for f in findings:
+            store.add(f.rule_id, f.level, f.message, f.filename, f.lineno, f.col, f.code)
+        return store
+
+    def _intern(self, value: str) -> int:
+        i = self._ids.get(value)
+        if i is None:
+            i = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+
+    def add(self, rule_id: str, level: str, message: str, filename: str, lineno: int, col: int, code: str = "") -> None:
+        columns, intern = self._columns, self._intern
+        columns["rule_id"].append(intern(rule_id))
+        columns["level"].append(intern(level))
+        columns["message"].append(intern(message))
+        files = self.filenames
+        if not files or files[-1] != filename:
+            files.append(filename)
+        self._file.append(len(files) - 1)
+        self._code.append(code or "")
+        self._lineno.append(lineno)
+        self._col.append(col)
+
+    def extend_records(self, filename: str, records: Iterable[Sequence]) -> None:
+        """Add a file's worker records, (rule_id, level, message, lineno, col, code)."""
+        for rule_id, level, message, lineno, col, code in records:
+            self.add(rule_id, level, message, filename, lineno, col, code)
+
+    def __len__(self) -> int:
+        return len(self._lineno)
+
+    def __bool__(self) -> bool:
+        return len(self._lineno) > 0
+
+    def __getitem__(self, i: int) -> Finding:
+        s, c = self.strings, self._columns
+        return Finding(s[c["rule_id"][i]], s[c["level"][i]], s[c["message"][i]], self.filenames[self._file[i]],
+                       self._lineno[i], self._col[i], self._code[i])
+
+    def __iter__(self) -> Iterator[Finding]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def counts(self) -> Dict[str, int]:
+        """Findings per upper-cased level, without building any Finding."""
+        per_id: Dict[int, int] = {}
+        for i in self._columns["level"]:
+            per_id[i] = per_id.get(i, 0) + 1
+        out: Dict[str, int] = {}
+        for i, n in per_id.items():
+            level = self.strings[i].upper()
+            out[level] = out.get(level, 0) + n
+        return out
+
+    def write_json(self, out: IO[str], indent: int = 2) -> None:
+        """Same text as json.dumps([f.to_dict() for f in store], indent=indent)."""
+        if not len(self):
+            out.write("[]")
+            return
+        encoded: List[str | None] = [None] * len(self.strings)
+
+        def enc(i: int) -> str:
+            text = encoded[i]
+            if text is None:
+                text = encoded[i] = json.dumps(self.strings[i])
+            return text
+
+        pad, inner = " " * indent, " " * (2 * indent)
+        keys = [f'{inner}"{name}": ' for name in FIELDS]
+        cols = [self._columns["rule_id"], self._columns["level"], self._columns["message"]]
+        file_ids, files, code = self._file, self.filenames, self._code
+        file_id, file_text = -1, ""
+        out.write("[\n")
+        for i in range(len(self)):
+            parts = [keys[k] + enc(col[i]) for k, col in enumerate(cols)]
+            if file_ids[i] != file_id:
+                file_id = file_ids[i]
+                file_text = json.dumps(files[file_id])
+            parts.append(keys[3] + file_text)
+            parts.append(keys[4] + str(self._lineno[i]))
+            parts.append(keys[5] + str(self._col[i]))
+            parts.append(keys[6] + json.dumps(code[i]))
+            out.write(("" if i == 0 else ",\n") + pad + "{\n" + ",\n".join(parts) + "\n" + pad + "}")
+        out.write("\n]")
+
+def count_levels(findings: Iterable[Finding], counts: Dict[str, int] | None = None) -> Dict[str, int]:
+    """Number of findings per upper-cased level, added to `counts` if given."""
+    counts = counts if counts is not None else {}
+    if isinstance(findings, FindingStore):
+        for level, n in findings.counts().items():
+            counts[level] = counts.get(level, 0) + n
+        return counts
+    for f in findings:
+        level = f.level.upper()
+        counts[level] = counts.get(level, 0) + 1
+    return counts
+
+def exit_code_from_counts(counts: Dict[str, int], exit_on: str, unfinished: int = 0) -> int:
+    """2 for ERROR findings (and, with exit_on WARN, 1 for WARN ones). `unfinished`
+    files ran out of time or memory and may hide an ERROR, so they fail the run too."""
     if exit_on == "NEVER":
         return 0
+    if unfinished and exit_on in ("ERROR", "WARN"):
+        return 2
     if exit_on == "ERROR":
-        return 2 if any(f.level.upper() == "ERROR" for f in findings) else 0
+        return 2 if counts.get("ERROR") else 0
     if exit_on == "WARN":
-        return 1 if findings else 0
+        return 1 if counts.get("ERROR") or counts.get("WARN") else 0
     return 0
+
+def exit_code_from_findings(findings: List[Finding], exit_on: str, unfinished: int = 0) -> int:
+    return exit_code_from_counts(count_levels(findings), exit_on, unfinished)
@@ -0,0 +1,396 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rewrite init-time hazards into lazy accessors and an after-restore hook.
+
+The findings come from the libcst ModuleLevelVisitor, so a fix applies to
+exactly what the scan reports (inline suppressions included). Only
+top-level statements are rewritten:
+
+- PY004/PY006, `name = factory(...)`: the client or socket becomes a
+  cached accessor, `get_name()`. It is created on first use and kept warm
+  across invocations. Every use of `name` inside functions is rewritten to
+  call it, and the restore hook clears the cache so nothing created before
+  the snapshot is reused. A trailing comment moves to the def line. This is
+  skipped when `name` is read at import time, bound anywhere else, or
+  imported by another module of the repo (`from mod import name`,
+  `mod.name`), which would break once the name is gone.
+- PY005, `name = random.random()` or `random.seed()`: the statement stays
+  and is re-run in the restore hook, so every restored copy gets its own
+  value. The line is marked as handled with an ignore: inline, or on the
+  line above when the statement has a comment, which is kept as written
+  and copied onto the hook line.
+
+The hook is the first `*after_restore` name in `hook_names`. An existing
+top-level hook of that name is extended. Otherwise one is added, decorated
+with `register_after_restore` from the Lambda runtime's `snapshot_restore_py`.
+Anything else is left for review and reported as skipped.
+"""
+
+from __future__ import annotations
+import ast
+import difflib
+import functools
+import pathlib
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import AbstractSet, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import libcst as cst
+from libcst.metadata import FunctionScope, GlobalScope, PositionProvider, ScopeProvider
+from .config import RuleConfig
+from .cst_engine import ModuleLevelVisitor
+from .prefilter import is_candidate
+from .rules import IGNORE_TOKEN, PY004, PY005, PY006
+from .walker import iter_python_files
+
+LAZY_RULES = (PY004, PY006)
+REFRESH_RULES = (PY005,)
+FIXABLE = LAZY_RULES + REFRESH_RULES
+REGISTER_MODULE = "snapshot_restore_py"
+REGISTER_AFTER_RESTORE = "register_after_restore"
+
+# files handed to a worker per task, as in scanner.py
+CHUNK_SIZE = 16
+
+@dataclass
+class FileFix:
+    filename: str
+    original: str = ""
+    fixed: Optional[str] = None      # new source, None when nothing changed
+    applied: List[Tuple[str, int, str]] = field(default_factory=list)  # (rule_id, line, what was done)
+    skipped: List[Tuple[str, int, str]] = field(default_factory=list)  # (rule_id, line, why not)
+    error: str = ""
+
+    def diff(self, label: str) -> str:
+        if self.fixed is None:
+            return ""
+        return "".join(difflib.unified_diff(self.original.splitlines(True), self.fixed.splitlines(True),
+                                            fromfile=f"a/{label}", tofile=f"b/{label}"))
+
+def restore_hook_name(hook_names: Iterable[str]) -> Optional[str]:
+    return next((n for n in hook_names if n.endswith("after_restore")), None)
+
+def accessor_name(name: str) -> str:
+    return ("_get_" if name.startswith("_") else "get_") + name.lstrip("_").lower()
+
+def _single_assign(stmt: cst.SimpleStatementLine) -> Optional[Tuple[str, cst.BaseExpression]]:
+    """(name, value) for `name = value`, the only statement on its line."""
+    if len(stmt.body) != 1 or not isinstance(stmt.body[0], cst.Assign):
+        return None
+    assign = stmt.body[0]
+    if len(assign.targets) != 1 or not isinstance(assign.targets[0].target, cst.Name):
+        return None
+    return assign.targets[0].target.value, assign.value
+
+def _is_call_expr(stmt: cst.SimpleStatementLine) -> bool:
+    return len(stmt.body) == 1 and isinstance(stmt.body[0], cst.Expr) and isinstance(stmt.body[0].value, cst.Call)
+
+def _runs_at_import(scope) -> bool:
+    """False once a function scope is on the way up to the module."""
+    while scope is not None and not isinstance(scope, GlobalScope):
+        if isinstance(scope, FunctionScope):
+            return False
+        scope = scope.parent
+    return True
+
+class _Deleted(cst.CSTVisitor):
+    def __init__(self) -> None:
+        self.names: Set[str] = set()
+
+    def visit_Del(self, node: cst.Del) -> None:
+        targets = [e.value for e in node.target.elements] if isinstance(node.target, cst.Tuple) else [node.target]
+        self.names.update(t.value for t in targets if isinstance(t, cst.Name))
+
+def module_parts(path: pathlib.Path, root: pathlib.Path) -> Tuple[str, ...]:
+    """Dotted-name components of the module at `path`, relative to `root`."""
+    parts = path.resolve().relative_to(root.resolve()).with_suffix("").parts
+    return parts[:-1] if parts and parts[-1] == "__init__" else parts
+
+def _dotted(node: ast.expr, modules: Dict[str, Tuple[str, ...]]) -> Optional[Tuple[str, ...]]:
+    if isinstance(node, ast.Name):
+        return modules.get(node.id)
+    if isinstance(node, ast.Attribute):
+        base = _dotted(node.value, modules)
+        return base + (node.attr,) if base is not None else None
+    return None
+
+def imported_names(paths: Iterable[pathlib.Path], root: pathlib.Path) -> Dict[Tuple[str, ...], Set[str]]:
+    """Names each module is asked for, by the module as imported: `from mod import
+    name`, or `mod.name` after `import mod`. A star import asks for "*"."""
+    refs: Dict[Tuple[str, ...], Set[str]] = defaultdict(set)
+    for path in paths:
+        try:
+            data = path.read_bytes()
+            if b"import" not in data:
+                continue
+            tree = ast.parse(data)
+            here = module_parts(path, root)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        package = here if path.name == "__init__.py" else here[:-1]
+        modules: Dict[str, Tuple[str, ...]] = {}  # local name -> module it may stand for
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom):
+                base = tuple(node.module.split(".")) if node.module else ()
+                if node.level:
+                    base = package[:len(package) - node.level + 1] + base
+                for alias in node.names:
+                    refs[base].add(alias.name)
+                    modules[alias.asname or alias.name] = base + (alias.name,)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    parts = tuple(alias.name.split("."))
+                    modules[alias.asname or parts[0]] = parts if alias.asname else parts[:1]
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute):
+                base = _dotted(node.value, modules)
+                if base is not None:
+                    refs[base].add(node.attr)
+    return refs
+
+def names_imported_from(parts: Tuple[str, ...], refs: Dict[Tuple[str, ...], Set[str]]) -> Set[str]:
+    """What other modules take from the module `parts`. Any trailing run of its
+    components may be how it is imported, depending on the path it is found on."""
+    names: Set[str] = set()
+    for i in range(len(parts)):
+        names |= refs.get(parts[i:], set())
+    return names
+
+class _Rewriter(cst.CSTTransformer):
+    """Replaces reads of lazily created names with accessor calls and
+    rewrites the planned top-level statements."""
+
+    def __init__(self, reads: Dict[cst.Name, str], replace: Dict[int, List[cst.BaseStatement]]):
+        super().__init__()
+        self.reads = reads
+        self.replace = replace
+
+    def leave_Name(self, original: cst.Name, updated: cst.Name) -> cst.BaseExpression:
+        accessor = self.reads.get(original)
+        return cst.Call(func=cst.Name(accessor)) if accessor else updated
+
+    def leave_Module(self, original: cst.Module, updated: cst.Module) -> cst.Module:
+        body: List[cst.BaseStatement] = []
+        for i, stmt in enumerate(updated.body):
+            new = list(self.replace.get(i, [stmt]))
+            if body and isinstance(body[-1], cst.FunctionDef) and i - 1 in self.replace and not _blank_above(new[0]):
+                new[0] = new[0].with_changes(leading_lines=[cst.EmptyLine(), *new[0].leading_lines])
+            body.extend(new)
+        return updated.with_changes(body=body)
+
+def _blank_above(stmt: cst.BaseStatement) -> bool:
+    return bool(stmt.leading_lines) and stmt.leading_lines[0].comment is None
+
+def _ignore_comment(stmt: cst.SimpleStatementLine, rule_id: str) -> cst.SimpleStatementLine:
+    """`stmt` marked as handled. A comment already on the line stays as it is,
+    and the ignore goes on its own line above."""
+    comment = cst.Comment(f"# {IGNORE_TOKEN}[{rule_id}] re-run in the restore hook")
+    if stmt.trailing_whitespace.comment is not None:
+        return stmt.with_changes(leading_lines=[*stmt.leading_lines, cst.EmptyLine(comment=comment)])
+    return stmt.with_changes(trailing_whitespace=stmt.trailing_whitespace.with_changes(
+        comment=comment, whitespace=cst.SimpleWhitespace("  ")))
+
+def _with_comment(line: str, stmt: cst.SimpleStatementLine) -> str:
+    """`line` with the trailing comment of `stmt`, if it has one."""
+    comment = stmt.trailing_whitespace.comment
+    return f"{line}  {comment.value}" if comment is not None else line
+
+def _statements(code: str) -> List[cst.BaseStatement]:
+    return list(cst.parse_module(code).body)
+
+def _import_index(body) -> int:
+    """Where new imports go: after the leading docstring and import block."""
+    index = 0
+    for i, stmt in enumerate(body):
+        if isinstance(stmt, cst.SimpleStatementLine) and all(isinstance(s, (cst.Import, cst.ImportFrom)) for s in stmt.body):
+            index = i + 1
+        elif i == 0 and isinstance(stmt, cst.SimpleStatementLine) and isinstance(stmt.body[0], cst.Expr) \
+                and isinstance(stmt.body[0].value, cst.SimpleString):
+            index = 1
+        else:
+            break
+    return index
+
+def _extend_hook(hook: cst.FunctionDef, names: List[str], lines: List[str]) -> cst.FunctionDef:
+    if isinstance(hook.body, cst.IndentedBlock):
+        block, body = hook.body, list(hook.body.body)
+    else:  # `def after_restore(): ...` on one line
+        block, body = cst.IndentedBlock(body=[]), [cst.SimpleStatementLine(body=hook.body.body)]
+    at = 1 if body and isinstance(body[0], cst.SimpleStatementLine) and isinstance(body[0].body[0], cst.Expr) \
+        and isinstance(body[0].body[0].value, cst.SimpleString) else 0
+    new = _statements("".join(f"{line}\n" for line in lines))
+    if names:
+        new.insert(0, cst.parse_statement(f"global {', '.join(names)}\n"))
+    end = len(body)
+    if body and isinstance(body[-1], cst.SimpleStatementLine) and isinstance(body[-1].body[0], cst.Return):
+        end -= 1
+    body = body[:end] + new[1 if names else 0:] + body[end:]
+    if names:
+        body.insert(at, new[0])
+    return hook.with_changes(body=block.with_changes(body=body))
+
+def fix_source(filename: str, code: str, cfg: RuleConfig, imported: AbstractSet[str] = frozenset()) -> FileFix:
+    """Plan and apply the fixes for one module; nothing is written. `imported`
+    holds the names other modules import from it, which must stay bound."""
+    result = FileFix(filename, code)
+    wrapper = cst.metadata.MetadataWrapper(cst.parse_module(code))
+    visitor = ModuleLevelVisitor(filename, cfg.severity, cfg.hook_names, source_text=code)
+    wrapper.visit(visitor)
+    wanted: Dict[int, List[str]] = {}
+    for f in visitor.findings:
+        if f["rule_id"] not in FIXABLE:
+            continue
+        if "(via " in f["message"]:
+            result.skipped.append((f["rule_id"], f["lineno"], "reached through a local function call"))
+            continue
+        wanted.setdefault(f["lineno"], []).append(f["rule_id"])
+    if not wanted:
+        return result
+
+    module = wrapper.module
+    positions = wrapper.resolve(PositionProvider)
+    scopes = wrapper.resolve(ScopeProvider)
+    global_scope = next((scopes[s] for s in module.body if s in scopes), None)
+    deleted = _Deleted()
+    module.visit(deleted)
+    # extend a restore hook the module already has, else add the first configured one
+    defined = [s.name.value for s in module.body if isinstance(s, cst.FunctionDef)]
+    hook = restore_hook_name(n for n in cfg.hook_names if n in defined) or restore_hook_name(cfg.hook_names)
+    top_level = {positions[s].start.line: (i, s) for i, s in enumerate(module.body) if isinstance(s, cst.SimpleStatementLine)}
+
+    reads: Dict[cst.Name, str] = {}
+    replace: Dict[int, List[cst.BaseStatement]] = {}
+    refresh_names: List[str] = []
+    hook_lines: List[str] = []
+    uses_cache = False
+    for lineno in sorted(wanted):
+        rule_ids = wanted[lineno]
+        rule_id = next((r for r in rule_ids if r in LAZY_RULES), rule_ids[0])
+        if lineno not in top_level:
+            result.skipped.extend((r, lineno, "not a top-level statement") for r in rule_ids)
+            continue
+        index, stmt = top_level[lineno]
+        assign = _single_assign(stmt)
+        if hook is None:
+            result.skipped.extend((r, lineno, "no *after_restore name in hook_names") for r in rule_ids)
+            continue
+        if rule_id in LAZY_RULES:
+            reason = None
+            if assign is None or not isinstance(assign[1], cst.Call):
+                reason = "not a single `name = call(...)` assignment"
+            else:
+                name, value = assign
+                accessor = accessor_name(name)
+                bindings = global_scope.assignments[name] if global_scope is not None else []
+                if len(bindings) != 1 or name in deleted.names:
+                    reason = f"'{name}' is bound more than once"
+                elif accessor in global_scope:
+                    reason = f"'{accessor}' already exists"
+                elif name in imported or ("*" in imported and not name.startswith("_")):
+                    reason = f"'{name}' is imported by another module"
+                elif any(_runs_at_import(access.scope) for access in next(iter(bindings)).references):
+                    reason = f"'{name}' is used at import time"
+            if reason is not None:
+                result.skipped.extend((r, lineno, reason) for r in rule_ids)
+                continue
+            for access in next(iter(bindings)).references:
+                if isinstance(access.node, cst.Name):
+                    reads[access.node] = accessor
+            accessor_def = _statements(
+                f"@functools.lru_cache(maxsize=None)\ndef {accessor}():\n    return {module.code_for_node(value)}\n")[0]
+            leading = list(stmt.leading_lines) if _blank_above(stmt) else [cst.EmptyLine(), *stmt.leading_lines]
+            accessor_def = accessor_def.with_changes(leading_lines=leading)
+            if stmt.trailing_whitespace.comment is not None:  # keep it on the def line
+                accessor_def = accessor_def.with_changes(body=accessor_def.body.with_changes(
+                    header=cst.TrailingWhitespace(whitespace=cst.SimpleWhitespace("  "),
+                                                  comment=stmt.trailing_whitespace.comment)))
+            replace[index] = [accessor_def]
+            hook_lines.append(f"{accessor}.cache_clear()")
+            uses_cache = True
+            result.applied.extend((r, lineno, f"lazy accessor {accessor}()") for r in rule_ids)
+        else:
+            if assign is not None:
+                refresh_names.append(assign[0])
+                hook_lines.append(_with_comment(f"{assign[0]} = {module.code_for_node(assign[1])}", stmt))
+            elif _is_call_expr(stmt):
+                hook_lines.append(_with_comment(module.code_for_node(stmt.body[0].value), stmt))
+            else:
+                result.skipped.extend((r, lineno, "not an assignment or call statement") for r in rule_ids)
+                continue
+            replace[index] = [_ignore_comment(stmt, rule_id)]
+            result.applied.extend((r, lineno, f"re-run in {hook}()") for r in rule_ids)
+    if not replace:
+        return result
+
+    existing = next((i for i, s in enumerate(module.body) if isinstance(s, cst.FunctionDef) and s.name.value == hook), None)
+    new_module = module.visit(_Rewriter(reads, replace))
+    body = list(new_module.body)
+    if existing is not None:
+        body[existing] = _extend_hook(body[existing], refresh_names, hook_lines)
+    else:
+        lines = ([f"global {', '.join(refresh_names)}"] if refresh_names else []) + hook_lines
+        hook_def = _statements(f"@{REGISTER_AFTER_RESTORE}\ndef {hook}():\n" + "".join(f"    {l}\n" for l in lines))[0]
+        body.append(hook_def.with_changes(leading_lines=[cst.EmptyLine(), cst.EmptyLine()]))
+    imports = []
+    def bound(name: str) -> bool:
+        return global_scope is not None and name in global_scope
+
+    if uses_cache and not bound("functools"):
+        imports.append("import functools\n")
+    if existing is None and not bound(REGISTER_AFTER_RESTORE):
+        imports.append(f"from {REGISTER_MODULE} import {REGISTER_AFTER_RESTORE}\n")
+    if imports:
+        at = _import_index(body)
+        body[at:at] = _statements("".join(imports))
+    result.fixed = new_module.with_changes(body=body).code
+    return result
+
+def _fix_file(path: str, imported: AbstractSet[str], cfg: RuleConfig) -> FileFix:
+    try:
+        with open(path, encoding="utf-8", newline="") as fh:
+            code = fh.read()
+        if not is_candidate(code.encode("utf-8")):
+            return FileFix(path, code)
+        return fix_source(path, code, cfg, imported)
+    except Exception as e:
+        return FileFix(path, error=str(e))
+
+def fix_paths(paths: Iterable[pathlib.Path], cfg: RuleConfig, jobs: int = 1,
+              root: Optional[pathlib.Path] = None) -> Iterator[FileFix]:
+    """Plan fixes for `paths` in input order, across a process pool when jobs > 1.
+
+    With `root`, every module under it is read first for the names it imports
+    from the others, so those names are not rewritten away.
+    """
+    paths = [p for p in paths if not cfg.path_ignored(p)]
+    imported: List[AbstractSet[str]] = [frozenset()] * len(paths)
+    if root is not None:
+        refs = imported_names(iter_python_files(root, ignore_paths=cfg.ignore_paths), root)
+        for i, p in enumerate(paths):
+            try:
+                imported[i] = frozenset(names_imported_from(module_parts(p, root), refs))
+            except ValueError:  # not under root
+                pass
+    work = functools.partial(_fix_file, cfg=cfg)
+    names = [str(p) for p in paths]
+    if jobs <= 1:
+        yield from map(work, names, imported)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(work, names, imported, chunksize=CHUNK_SIZE)
+
+def write_fix(fix: FileFix) -> None:
+    with open(fix.filename, "w", encoding="utf-8", newline="") as fh:
+        fh.write(fix.fixed)
@@ -0,0 +1,130 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Changed files and lines from the local git repository.
+
+`--changed-since REF` compares the working tree (including untracked
+files) with the merge base of REF and HEAD, i.e. everything the branch
+changed plus local edits. `--staged` compares the index with HEAD.
+Only the diff is read, so the work scales with the size of the change.
+"""
+
+from __future__ import annotations
+import pathlib
+import re
+import subprocess
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+from .findings import Finding
+from .registry import default_registry
+from .rules import PY008
+
+_HUNK = re.compile(rb"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@", re.MULTILINE)
+
+# None means the whole file is new
+ChangedLines = Optional[Set[int]]
+
+class GitError(RuntimeError):
+    pass
+
+def _git(cwd: pathlib.Path, *args: str) -> bytes:
+    try:
+        proc = subprocess.run(["git", *args], cwd=str(cwd), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(f"could not run git: {e}") from e
+    if proc.returncode != 0:
+        raise GitError(proc.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+    return proc.stdout
+
+def _diff_base(root: pathlib.Path, ref: Optional[str], staged: bool) -> List[str]:
+    if staged:
+        return ["--cached"]
+    base = _git(root, "merge-base", ref, "HEAD").decode().strip()
+    return [base]
+
+def _name_status(out: bytes) -> Iterator[tuple]:
+    """(status letter, path) per entry of `git diff --name-status -z`; renames give the new path."""
+    parts = out.split(b"\0")
+    i = 0
+    while i < len(parts) - 1:
+        status = parts[i].decode()
+        if status[:1] in ("R", "C"):
+            yield status[0], parts[i + 2].decode("utf-8", "surrogateescape")
+            i += 3
+        else:
+            yield status[:1], parts[i + 1].decode("utf-8", "surrogateescape")
+            i += 2
+
+def parse_hunks(diff: bytes) -> Dict[str, Set[int]]:
+    """New-side line numbers touched by each file in a `git diff -U0` patch."""
+    out: Dict[str, Set[int]] = {}
+    for block in re.split(rb"^diff --git ", diff, flags=re.MULTILINE)[1:]:
+        m = re.search(rb"^\+\+\+ b/(.*)$", block, re.MULTILINE)
+        if m is None:  # deleted file
+            continue
+        current = out.setdefault(m.group(1).decode("utf-8", "surrogateescape"), set())
+        for h in _HUNK.finditer(block):
+            start, count = int(h.group(1)), int(h.group(2) if h.group(2) is not None else 1)
+            current.update(range(start, start + count))
+    return out
+
+def changed_python_files(root: pathlib.Path, ref: Optional[str] = None, staged: bool = False) -> Dict[pathlib.Path, ChangedLines]:
+    """Changed `.py` files under `root` mapped to their changed line numbers."""
+    top = pathlib.Path(_git(root, "rev-parse", "--show-toplevel").decode().strip())
+    base = _diff_base(root, ref, staged)
+    spec = ["--", "*.py"]
+    files: Dict[str, ChangedLines] = {}
+    for status, path in _name_status(_git(top, "diff", "--name-status", "-z", "-M", *base, *spec)):
+        if status == "D":
+            continue
+        files[path] = None if status in ("A", "C") else set()
+    if not staged:
+        for path in _git(top, "ls-files", "--others", "--exclude-standard", "-z", *spec).split(b"\0"):
+            if path:
+                files[path.decode("utf-8", "surrogateescape")] = None
+    modified = [p for p, lines in files.items() if lines is not None]
+    if modified:
+        # same pathspec as above, so renames pair up the same way; explicit prefixes
+        # because diff.noprefix / diff.mnemonicPrefix would change the `+++ b/` parse_hunks reads
+        hunks = parse_hunks(_git(top, "-c", "core.quotePath=false", "diff", "-U0", "--no-color", "--no-ext-diff",
+                                 "--src-prefix=a/", "--dst-prefix=b/", "-M", *base, *spec))
+        for path in modified:
+            files[path] = hunks.get(path, set())
+    root = root.resolve()
+    out: Dict[pathlib.Path, ChangedLines] = {}
+    for path, lines in sorted(files.items()):
+        full = (top / path).resolve()
+        if full == root or root in full.parents:
+            out[full] = lines
+    return out
+
+def on_changed_lines(findings: Iterable[Finding], changes: Dict[pathlib.Path, ChangedLines]) -> Iterator[Finding]:
+    """Keep findings on changed lines. PY008 is file-level: it is kept when
+    another hazard in the same file is. Expects findings grouped by file."""
+    by_name = {str(p): lines for p, lines in changes.items()}
+    hazard_ids = default_registry().hazard_ids
+    pending: List[Finding] = []
+
+    def flush() -> Iterator[Finding]:
+        lines = by_name.get(pending[0].filename) if pending else None
+        kept = [f for f in pending if f.rule_id != PY008 and (lines is None or f.lineno in lines)]
+        if any(f.rule_id in hazard_ids for f in kept):
+            kept.extend(f for f in pending if f.rule_id == PY008)
+        pending.clear()
+        return iter(kept)
+
+    for f in findings:
+        if pending and pending[0].filename != f.filename:
+            yield from flush()
+        pending.append(f)
+    yield from flush()
@@ -0,0 +1,359 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Import graph of a Lambda handler.
+
+Starting from the handler file, every import that runs at module import
+time is resolved against the handler's directory, the repo root and any
+`site-packages` directories, the same way the Lambda runtime's sys.path
+would. Modules are parsed once each with the stdlib `ast`; the standard
+library is recorded but not descended into, since it is not part of the
+deployment package.
+
+Cost is static: source size and the size of the marshalled bytecode, which
+is roughly what the runtime has to read and unmarshal during init.
+"""
+
+from __future__ import annotations
+import ast
+import marshal
+import pathlib
+import sys
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from .ast_engine import is_main_guard
+from .config import RuleConfig
+from .findings import Finding
+from .rules import PY008
+from .scanner import scan_paths
+
+# where a module was found; namespace packages (a directory without
+# __init__.py) keep the kind of the search path they were found on
+KINDS = ("handler", "repo", "site-packages", "stdlib", "extension", "missing")
+
+_EXTENSION_SUFFIXES = (".so", ".pyd")
+
+@dataclass
+class ModuleNode:
+    name: str
+    kind: str
+    path: Optional[pathlib.Path] = None
+    imports: List[str] = field(default_factory=list)  # modules it imports at import time, in order
+    source_bytes: int = 0
+    bytecode_bytes: int = 0
+    error: str = ""
+
+@dataclass
+class Cost:
+    modules: int = 0
+    source_bytes: int = 0
+    bytecode_bytes: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"modules": self.modules, "source_bytes": self.source_bytes, "bytecode_bytes": self.bytecode_bytes}
+
+def _is_type_checking(test: ast.expr) -> bool:
+    return (isinstance(test, ast.Name) and test.id == "TYPE_CHECKING") or \
+        (isinstance(test, ast.Attribute) and test.attr == "TYPE_CHECKING")
+
+def import_time_imports(tree: ast.Module, package: str) -> Iterator[Tuple[str, List[str]]]:
+    """Yield `(module, from_names)` for every import executed when the module runs.
+
+    Function bodies don't run at import; class bodies and module-level
+    if/try/with/for/while blocks do. `if TYPE_CHECKING:` and the `__main__`
+    guard are skipped. Relative imports are resolved against `package`.
+    """
+    stack = list(reversed(tree.body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name, []
+        elif isinstance(node, ast.ImportFrom):
+            base = _absolute(node.module, node.level, package)
+            if base:
+                yield base, [a.name for a in node.names if a.name != "*"]
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            continue
+        elif isinstance(node, ast.If):
+            body = [] if is_main_guard(node.test) or _is_type_checking(node.test) else node.body
+            stack.extend(reversed(body + node.orelse))
+        else:
+            blocks = []
+            for attr in ("body", "handlers", "orelse", "finalbody"):
+                blocks.extend(getattr(node, attr, None) or [])
+            stack.extend(reversed([b for b in blocks if isinstance(b, (ast.stmt, ast.excepthandler))]))
+
+def _absolute(module: Optional[str], level: int, package: str) -> Optional[str]:
+    if not level:
+        return module
+    parts = package.split(".") if package else []
+    if level - 1 > len(parts) or (level - 1 == len(parts) and not module):
+        return None
+    base = parts[:len(parts) - (level - 1)]
+    if module:
+        base.append(module)
+    return ".".join(base) or None
+
+class ModuleResolver:
+    """Finds module files on a fixed search path, memoizing every lookup."""
+
+    def __init__(self, search_paths: List[Tuple[pathlib.Path, str]]):
+        self.search_paths = search_paths  # (directory, kind) in sys.path order
+        self._cache: Dict[str, Tuple[str, Optional[pathlib.Path], bool]] = {}
+        self._stdlib = set(getattr(sys, "stdlib_module_names", ())) | set(sys.builtin_module_names)
+
+    def find(self, name: str) -> Tuple[str, Optional[pathlib.Path], bool]:
+        """(kind, file, is_package) for a dotted module name."""
+        if name in self._cache:
+            return self._cache[name]
+        head, _, rest = name.rpartition(".")
+        if head:
+            kind, parent, is_pkg = self.find(head)
+            if kind in ("stdlib", "missing") or not is_pkg:
+                result = (kind if kind == "stdlib" else "missing", None, False)
+            else:
+                result = self._lookup([(parent.parent if parent.name == "__init__.py" else parent, kind)], rest)
+        else:
+            # the task root comes first on Lambda's sys.path, then the runtime's stdlib
+            result = self._lookup([p for p in self.search_paths if p[1] == "repo"], name)
+            if result[0] == "missing":
+                if name in self._stdlib:
+                    result = ("stdlib", None, False)
+                else:
+                    result = self._lookup([p for p in self.search_paths if p[1] != "repo"], name)
+        self._cache[name] = result
+        return result
+
+    @staticmethod
+    def _lookup(dirs: List[Tuple[pathlib.Path, str]], part: str) -> Tuple[str, Optional[pathlib.Path], bool]:
+        namespace = None
+        for directory, kind in dirs:
+            pkg = directory / part
+            if (pkg / "__init__.py").is_file():
+                return kind, pkg / "__init__.py", True
+            module = directory / f"{part}.py"
+            if module.is_file():
+                return kind, module, False
+            for ext in directory.glob(f"{part}.*") if directory.is_dir() else ():
+                if ext.suffix in _EXTENSION_SUFFIXES:
+                    return "extension", ext, False
+            if namespace is None and pkg.is_dir():
+                namespace = (kind, pkg, True)
+        return namespace or ("missing", None, False)
+
+class ImportGraph:
+    """Transitive import-time import graph rooted at one handler file."""
+
+    def __init__(self, handler: pathlib.Path, repo_root: pathlib.Path, site_packages: List[pathlib.Path] | None = None,
+                 parsed: Dict[Tuple[str, str], tuple] | None = None):
+        self.handler = handler.resolve()
+        self.root = self.handler.stem
+        paths = [(self.handler.parent, "repo")]
+        if repo_root.resolve() != self.handler.parent:
+            paths.append((repo_root.resolve(), "repo"))
+        paths.extend((p.resolve(), "site-packages") for p in site_packages or [])
+        self.resolver = ModuleResolver(paths)
+        self.modules: Dict[str, ModuleNode] = {}
+        self._parents: Dict[str, Optional[str]] = {}
+        # (real path, package) -> what parsing the file gave; share one dict between graphs
+        # of the same tree so each file is parsed once however many handlers import it
+        self._parsed = parsed if parsed is not None else {}
+
+    def build(self) -> "ImportGraph":
+        """Breadth-first, so `chain()` gives the shortest import chain to each module."""
+        self.modules[self.root] = self._load(self.root, "handler", self.handler, False)
+        self._parents[self.root] = None
+        queue = deque([self.root])
+        while queue:
+            name = queue.popleft()
+            for dep in self.modules[name].imports:
+                if dep in self.modules:
+                    continue
+                kind, path, is_pkg = self.resolver.find(dep)
+                self.modules[dep] = self._load(dep, kind, path, is_pkg)
+                self._parents[dep] = name
+                queue.append(dep)
+        return self
+
+    def _load(self, name: str, kind: str, path: Optional[pathlib.Path], is_pkg: bool) -> ModuleNode:
+        node = ModuleNode(name, kind, path)
+        if path is None or path.is_dir():
+            return node
+        if path.suffix != ".py":  # extension module: count the shared object once
+            node.source_bytes = node.bytecode_bytes = path.stat().st_size
+            return node
+        package = name if is_pkg else name.rpartition(".")[0]
+        key = (str(path.resolve()), package)
+        if key not in self._parsed:
+            self._parsed[key] = self._parse(path, package)
+        node.source_bytes, node.bytecode_bytes, node.error, imports = self._parsed[key]
+        if node.error:
+            return node
+        seen: Set[str] = set()
+        parent = name.rpartition(".")[0]
+        if parent and kind != "handler":  # a submodule's package is imported first
+            seen.add(parent)
+            node.imports.append(parent)
+        for module, from_names in imports:
+            # `import a.b.c` runs a, a.b and a.b.c; `from a import b` may import submodule a.b
+            parts = module.split(".")
+            targets = [".".join(parts[:i]) for i in range(1, len(parts) + 1)]
+            for sub in from_names:
+                if self.resolver.find(f"{module}.{sub}")[1] is not None:
+                    targets.append(f"{module}.{sub}")
+            for target in targets:
+                if target not in seen and target != name:
+                    seen.add(target)
+                    node.imports.append(target)
+        return node
+
+    @staticmethod
+    def _parse(path: pathlib.Path, package: str) -> tuple:
+        """(source bytes, bytecode bytes, error, import-time imports) of one file."""
+        data = b""
+        try:
+            data = path.read_bytes()
+            tree = ast.parse(data, filename=str(path))
+            bytecode = len(marshal.dumps(compile(tree, str(path), "exec")))
+        except (OSError, SyntaxError, ValueError) as e:
+            return len(data), 0, str(e), []
+        return len(data), bytecode, "", list(import_time_imports(tree, package))
+
+    def chain(self, name: str) -> List[str]:
+        """Shortest import chain from the handler to `name`."""
+        out = []
+        cur: Optional[str] = name
+        while cur is not None:
+            out.append(cur)
+            cur = self._parents.get(cur)
+        return out[::-1]
+
+    def reachable(self, start: str, skip: Set[str] = frozenset()) -> Set[str]:
+        """Modules imported by running `start`; the handler's imports of `skip` are left out."""
+        seen = {start}
+        stack = [start]
+        while stack:
+            name = stack.pop()
+            for dep in self.modules[name].imports:
+                if dep in seen or (name == self.root and dep in skip):
+                    continue
+                seen.add(dep)
+                stack.append(dep)
+        return seen
+
+    def cost(self, names: Set[str]) -> Cost:
+        """Cost of loading `names`; stdlib and missing modules are free."""
+        total = Cost()
+        for name in names:
+            node = self.modules[name]
+            if node.kind in ("stdlib", "missing"):
+                continue
+            total.modules += 1
+            total.source_bytes += node.source_bytes
+            total.bytecode_bytes += node.bytecode_bytes
+        return total
+
+    def subtrees(self) -> List[Tuple[str, Cost, Cost]]:
+        """(package, inclusive cost, exclusive cost) per top-level package the handler imports.
+
+        Exclusive cost is what deferring all of the handler's imports of that
+        package would take out of init: modules nothing else pulls in.
+        """
+        groups: Dict[str, List[str]] = {}
+        for dep in self.modules[self.root].imports:
+            groups.setdefault(dep.split(".")[0], []).append(dep)
+        everything = self.reachable(self.root)
+        out = []
+        for package, deps in groups.items():
+            inclusive: Set[str] = set()
+            for dep in deps:
+                inclusive |= self.reachable(dep)
+            without = self.reachable(self.root, skip=set(deps))
+            out.append((package, self.cost(inclusive), self.cost(everything - without)))
+        return out
+
+    def files(self) -> List[pathlib.Path]:
+        """Python sources in the graph, handler first, in breadth-first order."""
+        return [n.path for n in self.modules.values() if n.path is not None and n.path.suffix == ".py"]
+
+def scan_graph(graph: ImportGraph, cfg: RuleConfig, **scan_kwargs) -> List[Tuple[Finding, List[str]]]:
+    """Run the rules over every module in `graph`, pairing each finding with its import chain.
+
+    `ignore_paths` does not apply: a vendored or site-packages module the
+    handler imports runs at init wherever it lives. PY008 is only kept for
+    the handler, which is where restore hooks get registered.
+    """
+    names = {str(n.path): n.name for n in graph.modules.values() if n.path is not None}
+    findings = scan_paths(graph.handler.parent, graph.files(), cfg=replace(cfg, ignore_paths=[]), **scan_kwargs)
+    out = []
+    for f in findings:
+        name = names[f.filename]
+        if f.rule_id == PY008 and name != graph.root:
+            continue
+        out.append((f, graph.chain(name)))
+    return out
+
+def graph_report(graph: ImportGraph, hazards: List[Tuple[Finding, List[str]]]) -> Dict:
+    """JSON-ready summary: per-module cost, per-import subtree cost and attributed findings."""
+    modules = list(graph.modules.values())
+    by_kind: Dict[str, int] = {}
+    for node in modules:
+        by_kind[node.kind] = by_kind.get(node.kind, 0) + 1
+    return {
+        "handler": str(graph.handler),
+        "total": graph.cost(graph.reachable(graph.root)).to_dict(),
+        "modules_by_kind": by_kind,
+        "imports": [
+            {"module": name, "inclusive": inc.to_dict(), "exclusive": exc.to_dict()}
+            for name, inc, exc in graph.subtrees()
+        ],
+        "modules": [
+            {"module": n.name, "kind": n.kind, "path": str(n.path) if n.path else None,
+             "source_bytes": n.source_bytes, "bytecode_bytes": n.bytecode_bytes,
+             "imports": n.imports, **({"error": n.error} if n.error else {})}
+            for n in modules
+        ],
+        "findings": [dict(f.to_dict(), chain=chain) for f, chain in hazards],
+    }
+
+def _kb(n: int) -> str:
+    return f"{n / 1024:.1f} KB"
+
+def format_graph_text(report: Dict) -> str:
+    total = report["total"]
+    kinds = ", ".join(f"{count} {kind}" for kind, count in sorted(report["modules_by_kind"].items()))
+    lines = [
+        f"Import graph of {report['handler']}: {total['modules']} modules loaded at init "
+        f"({_kb(total['source_bytes'])} source, {_kb(total['bytecode_bytes'])} bytecode); {kinds}",
+        "",
+        "Packages imported by the handler (inclusive / exclusive to that package):",
+    ]
+    for item in sorted(report["imports"], key=lambda i: -i["exclusive"]["bytecode_bytes"]):
+        inc, exc = item["inclusive"], item["exclusive"]
+        if not inc["modules"]:  # stdlib or not installed
+            continue
+        lines.append(f"  {item['module']:<32} {inc['modules']:>5} modules {_kb(inc['bytecode_bytes']):>12}"
+                     f"  / {exc['modules']:>5} modules {_kb(exc['bytecode_bytes']):>12}")
+    lines.append("")
+    if not report["findings"]:
+        lines.append("No findings.")
+    for f in report["findings"]:
+        lines.append(f"{f['level']} {f['rule_id']} {f['filename']}:{f['lineno']}:{f['col']}")
+        if f["code"]:
+            lines.append(f"→ {f['code']}")
+        lines.append(f"   {f['message']}")
+        lines.append(f"   imported via {' -> '.join(f['chain'])}\n")
+    return "\n".join(lines)
@@ -0,0 +1,273 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Findings of installed third-party distributions, computed once per version.
+
+A distribution installed into the tree (`pip install -t .`, a layer's
+`python/`, a `--site-packages` directory) is identified by its
+`*.dist-info` directory: name and version from METADATA, and the sha256 of
+RECORD, which lists the hash of every installed file. The knowledge base
+maps that identity to the findings of each of the distribution's `.py`
+files. Knowing a distribution makes scanning it a dictionary lookup.
+Unknown distributions are scanned once, in full, and added.
+
+The file is plain JSON (gzip if it ends in `.gz`) and can be shipped with
+a project or shared between CI runs. Entries are valid for one scanner
+version, hook-name set, rule set and `max_parse_kb`/`scan_generated`
+setting. Severities are applied when a record
+is looked up, so changing a severity does not invalidate the file.
+
+An installed file whose size or hash no longer matches RECORD was edited
+after installation; it is scanned like any other file. A distribution
+with such a file, or with a file missing, is not learned.
+"""
+
+from __future__ import annotations
+import base64
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import pathlib
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from . import __version__
+from .config import RuleConfig
+from .budget import TRANSIENT
+from .registry import default_registry
+from .scanner import ScanStats, iter_file_records
+from .walker import PathMatcher
+
+KB_FORMAT = 1
+KB_FILE = "knowledge.json"
+
+# (rule_id, message, lineno, col, code): a worker Record without the level
+KnownRecord = Tuple[str, str, int, int, str]
+
+@dataclass
+class Distribution:
+    name: str
+    version: str
+    record_sha256: str
+    site: str                        # directory the RECORD paths are relative to
+    files: Dict[str, Tuple[int, str]]  # .py path relative to `site` -> (size, "sha256=...") in RECORD
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}=={self.version}#{self.record_sha256[:16]}"
+
+def kb_fingerprint(cfg: RuleConfig) -> str:
+    """What a knowledge-base entry depends on; severities are applied on lookup."""
+    payload = json.dumps({"version": __version__, "hook_names": sorted(cfg.hook_names),
+                          "max_parse_kb": cfg.max_parse_kb, "scan_generated": cfg.scan_generated,
+                          "rules": default_registry().signature()})
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _metadata(dist_info: str) -> Tuple[str, str]:
+    name = version = ""
+    try:
+        with open(os.path.join(dist_info, "METADATA"), encoding="utf-8", errors="replace") as fh:
+            for line in fh:
+                if not line.strip():
+                    break
+                key, _, value = line.partition(":")
+                if key == "Name":
+                    name = value.strip()
+                elif key == "Version":
+                    version = value.strip()
+    except OSError:
+        pass
+    if not name or not version:  # fall back to `name-version.dist-info`
+        stem = os.path.basename(dist_info)[:-len(".dist-info")]
+        name, _, version = stem.partition("-")
+    return name.lower().replace("_", "-"), version
+
+def read_distribution(dist_info: str) -> Optional[Distribution]:
+    try:
+        with open(os.path.join(dist_info, "RECORD"), "rb") as fh:
+            record = fh.read()
+    except OSError:
+        return None
+    name, version = _metadata(dist_info)
+    files: Dict[str, int] = {}
+    for row in csv.reader(io.StringIO(record.decode("utf-8", "replace"))):
+        if not row or not row[0].endswith(".py"):
+            continue
+        rel = os.path.normpath(row[0])
+        if rel.startswith(".."):  # scripts installed outside the site directory
+            continue
+        try:
+            size = int(row[2]) if len(row) > 2 and row[2] else -1
+        except ValueError:
+            size = -1
+        files[rel] = (size, row[1] if len(row) > 1 else "")
+    return Distribution(name, version, hashlib.sha256(record).hexdigest(), os.path.dirname(dist_info), files)
+
+def matches_record(path: str, size: int, digest: str) -> bool:
+    """True if the file at `path` has the size and `algorithm=urlsafe-b64` hash
+    RECORD lists for it; a missing size or hash is not checked."""
+    try:
+        if size >= 0 and os.stat(path).st_size != size:
+            return False
+        if not digest:
+            return True
+        algorithm, _, expected = digest.partition("=")
+        with open(path, "rb") as fh:
+            actual = hashlib.new(algorithm, fh.read()).digest()
+    except (OSError, ValueError):
+        return False
+    return base64.urlsafe_b64encode(actual).rstrip(b"=").decode("ascii") == expected
+
+def find_distributions(roots: Iterable[pathlib.Path], ignore_paths: Iterable[str] = ()) -> Iterator[Distribution]:
+    """Every `*.dist-info` with a RECORD under `roots`, skipping ignored directories."""
+    skip = PathMatcher(ignore_paths)
+    seen = set()
+    stack = [str(r) for r in roots]
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if not entry.is_dir():
+                    continue
+            except OSError:
+                continue
+            if entry.name.endswith(".dist-info"):
+                dist = read_distribution(entry.path)
+                if dist is not None:
+                    yield dist
+            elif not skip.prunes(entry.path.replace(os.sep, "/")):
+                subdirs.append(entry.path)
+        stack.extend(reversed(subdirs))
+
+class KnowledgeBase:
+    def __init__(self, path: pathlib.Path, cfg: RuleConfig):
+        self.path = path
+        self.cfg = cfg
+        self.fingerprint = kb_fingerprint(cfg)
+        self.packages: Dict[str, Dict] = {}
+        self.learned: List[str] = []
+        self._intact: Dict[str, bool] = {}  # path -> matches RECORD, checked once per run
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            raw = self.path.read_bytes()
+            data = json.loads(gzip.decompress(raw) if self.path.suffix == ".gz" else raw)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable knowledge base {self.path}: {e}", file=sys.stderr)
+            return
+        if data.get("format") != KB_FORMAT or data.get("fingerprint") != self.fingerprint:
+            print(f"[WARN] Knowledge base {self.path} was built by another scanner version or rule set; rebuilding",
+                  file=sys.stderr)
+            return
+        self.packages = data.get("packages", {})
+
+    def __contains__(self, dist: Distribution) -> bool:
+        return dist.key in self.packages
+
+    def intact(self, dist: Distribution, rel: str) -> bool:
+        path = os.path.join(dist.site, rel)
+        ok = self._intact.get(path)
+        if ok is None:
+            ok = self._intact[path] = matches_record(path, *dist.files[rel])
+        return ok
+
+    def learn(self, dists: List[Distribution], **scan_kwargs) -> None:
+        """Scan every `.py` file of `dists` and record the findings."""
+        if not dists:
+            return
+        owner: Dict[str, Tuple[Distribution, str]] = {}
+        for dist in dists:
+            for rel in dist.files:
+                owner[os.path.join(dist.site, rel)] = (dist, rel)
+        cfg = replace(self.cfg, ignore_paths=[])  # everything the distribution installs
+        files: Dict[str, Dict[str, List[KnownRecord]]] = defaultdict(dict)
+        paths = [pathlib.Path(p) for p in owner if os.path.isfile(p)]
+        root = pathlib.Path(os.path.commonpath([d.site for d in dists]))
+        stats = ScanStats()
+        for filename, records in iter_file_records(root, paths, cfg=cfg, stats=stats, **scan_kwargs):
+            dist, rel = owner[filename]
+            if records:
+                files[dist.key][rel] = [(r[0], r[2], r[3], r[4], r[5]) for r in records]
+        # a file that ran out of time or memory would look clean forever; learn its distribution another time
+        unfinished = {owner[s.filename][0].key for s in stats.statuses if s.reason in TRANSIENT}
+        # nor a patched or partial install: its findings would be served for pristine files elsewhere
+        unfinished.update(dist.key for dist in dists if not all(self.intact(dist, rel) for rel in dist.files))
+        for dist in dists:
+            if dist.key in unfinished:
+                continue
+            self.packages[dist.key] = {"name": dist.name, "version": dist.version,
+                                       "record_sha256": dist.record_sha256, "files": files.get(dist.key, {})}
+            self.learned.append(dist.key)
+
+    def records(self, dists: Iterable[Distribution]) -> Dict[str, List[tuple]]:
+        """Worker-style records for every known file of `dists`, by absolute path.
+
+        Files missing from disk or whose size or hash differs from RECORD
+        are left out, so they are scanned normally.
+        """
+        sev = self.cfg.sev
+        out: Dict[str, List[tuple]] = {}
+        for dist in dists:
+            entry = self.packages.get(dist.key)
+            if entry is None:
+                continue
+            known = entry["files"]
+            for rel in dist.files:
+                if not self.intact(dist, rel):
+                    continue
+                out[os.path.join(dist.site, rel)] = [(r[0], sev(r[0]), r[1], r[2], r[3], r[4]) for r in known.get(rel, [])]
+        return out
+
+    def save(self) -> None:
+        if not self.learned:
+            return
+        data = json.dumps({"format": KB_FORMAT, "fingerprint": self.fingerprint, "scanner_version": __version__,
+                           "packages": dict(sorted(self.packages.items()))}, indent=1).encode("utf-8")
+        if self.path.suffix == ".gz":
+            data = gzip.compress(data, mtime=0)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, self.path)
+
+def known_records(kb: KnowledgeBase, roots: Iterable[pathlib.Path], ignore_paths: Iterable[str] = (),
+                  extra_roots: Iterable[pathlib.Path] = (), wanted: Optional[Iterable[pathlib.Path]] = None,
+                  **scan_kwargs) -> Dict[str, List[tuple]]:
+    """Find the distributions under `roots` (and `extra_roots`, where ignore
+    patterns don't apply), learn the new ones and return the findings of
+    their files for iter_findings(known=...). With `wanted`, only
+    distributions owning one of those files are considered."""
+    dists = list(find_distributions(roots, ignore_paths)) + list(find_distributions(extra_roots))
+    if wanted is not None:
+        wanted = {str(p) for p in wanted}
+        dists = [d for d in dists if any(os.path.join(d.site, rel) in wanted for rel in d.files)]
+    new = {d.key: d for d in dists if d not in kb}  # one copy of each version is enough
+    kb.learn(list(new.values()), **scan_kwargs)
+    return kb.records(dists)
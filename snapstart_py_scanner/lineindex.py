@@ -0,0 +1,125 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Random access to the lines of a source file.
+
+The file is mapped once and the offset of every line start is recorded in
+one pass; after that any line or range of lines is a slice of the mapping,
+without re-reading or re-splitting the file per lookup.
+"""
+
+from __future__ import annotations
+import mmap
+from array import array
+from collections import OrderedDict
+from typing import List, Optional
+from .archives import MemberReader, split_member
+
+class LineIndex:
+    """1-indexed lines of one file. Lines end at "\\n", as in parser positions.
+
+    `data` indexes bytes already in memory (an archive member), or source
+    text already decoded, instead of mapping `path`. Lines are sliced out of
+    it on demand, so indexing a string keeps no second copy of the source.
+    """
+
+    def __init__(self, path: str, data: Optional[bytes | str] = None):
+        self.path = path
+        self._mm = None
+        self._data: bytes | str | mmap.mmap = data if data is not None else self._map(path)
+        self._starts = array("Q", [0])
+        data, find = self._data, self._data.find
+        newline = "\n" if isinstance(data, str) else b"\n"
+        pos = find(newline)
+        while pos != -1:
+            self._starts.append(pos + 1)
+            pos = find(newline, pos + 1)
+        if self._starts[-1] == len(data) and len(self._starts) > 1:
+            self._starts.pop()  # trailing newline does not start another line
+
+    def _map(self, path: str) -> bytes | mmap.mmap:
+        try:
+            with open(path, "rb") as fh:
+                try:
+                    self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # empty file
+                    return b""
+        except OSError:
+            return b""
+        return self._mm
+
+    def __len__(self) -> int:
+        return len(self._starts) if len(self._data) else 0
+
+    def line(self, n: int) -> str:
+        if not 1 <= n <= len(self):
+            return ""
+        start = self._starts[n - 1]
+        end = self._starts[n] if n < len(self._starts) else len(self._data)
+        text = self._data[start:end]
+        if not isinstance(text, str):
+            text = text.decode("utf-8", "replace")
+        return text.rstrip("\r\n")
+
+    def lines(self, first: int, last: int) -> List[str]:
+        """Lines first..last inclusive, clamped to the file."""
+        return [self.line(n) for n in range(max(1, first), min(len(self), last) + 1)]
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._data = b""
+
+class LineIndexCache:
+    """Keeps the most recently used indexes open.
+
+    Findings arrive grouped by file, so a small cache gives one read per
+    file while bounding the number of open mappings (each holds an fd).
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._open: "OrderedDict[str, LineIndex]" = OrderedDict()
+        self._members = MemberReader()
+
+    def get(self, path: str) -> LineIndex:
+        index = self._open.get(path)
+        if index is not None:
+            self._open.move_to_end(path)
+            return index
+        index = self._open[path] = LineIndex(path, self._member(path))
+        if len(self._open) > self.maxsize:
+            self._open.popitem(last=False)[1].close()
+        return index
+
+    def _member(self, path: str) -> Optional[bytes]:
+        if split_member(path) is None:
+            return None
+        try:
+            return self._members.read(path)
+        except Exception:
+            return b""  # archive changed or unreadable: no context
+
+    def close(self) -> None:
+        for index in self._open.values():
+            index.close()
+        self._open.clear()
+        self._members.close()
+
+    def __enter__(self) -> "LineIndexCache":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
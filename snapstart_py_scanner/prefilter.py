@@ -0,0 +1,59 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Byte-level prefilter run before libcst.
+
+A keyed rule can only fire if every component of the dotted name it
+matches is written out somewhere in the file (import aliases included), so
+the rarest component of each registered name is a sound trigger. Rules
+that are not keyed by name (PY001, the `.start()` check) carry their own
+trigger regex; if a plugin rule has neither, the prefilter is disabled.
+PY008 needs another hazard, so it has no trigger of its own.
+"""
+
+from __future__ import annotations
+import re
+from functools import lru_cache
+from typing import Iterable, Optional, Set
+from .registry import RuleRegistry, default_registry
+
+def _selective_part(dotted: str) -> str:
+    # any single component is a sound trigger; the longest is the rarest
+    return max(dotted.split("."), key=len)
+
+def trigger_tokens(registry: RuleRegistry) -> Set[str]:
+    return {_selective_part(name) for rule in registry.rules for name in rule.names()}
+
+def _alternation(words: Iterable[str]) -> bytes:
+    return b"|".join(re.escape(w.encode("ascii")) for w in sorted(words, key=lambda w: (-len(w), w)))
+
+def build_pattern(registry: RuleRegistry) -> Optional[re.Pattern]:
+    """One regex matching any trigger, or None if some rule cannot be prefiltered."""
+    parts = [rb"\b(?:" + _alternation(trigger_tokens(registry)) + rb")\b"]
+    for rule in registry.rules:
+        if rule.keyed():
+            continue
+        if rule.trigger is None:
+            return None
+        parts.append(rule.trigger)
+    return re.compile(b"|".join(parts))
+
+@lru_cache(maxsize=1)
+def trigger_pattern() -> Optional[re.Pattern]:
+    return build_pattern(default_registry())
+
+def is_candidate(data: bytes) -> bool:
+    """True if `data` may contain a finding and must go through the CST engine."""
+    pattern = trigger_pattern()
+    return pattern is None or pattern.search(data) is not None
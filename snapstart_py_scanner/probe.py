@@ -0,0 +1,198 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Runtime init probe: import a handler in a throwaway subprocess and measure it.
+
+The static rules see what the code says; the probe sees what init does,
+including what dependencies do on import. The handler module is imported
+twice by _probe_child.py, each time in a fresh interpreter with its own
+temporary HOME, TMPDIR, working directory and bytecode cache:
+
+1. with `sys.setprofile` and tracemalloc, to record threads started,
+   random/time/uuid calls, boto3 clients, files and sockets left open and
+   the memory each import keeps;
+2. with `-X importtime` only, for timings the profiler doesn't inflate.
+
+Both runs are sandboxed by an audit hook: network connections, DNS lookups
+and new processes are refused, and AWS API calls are answered by a fake
+botocore HTTP session, so probing never touches real resources. The
+credentials the child sees are fake too.
+
+What was measured becomes ordinary findings, attributed to the line of the
+handler's code (or, failing that, the dependency's) that caused it.
+"""
+
+from __future__ import annotations
+import json
+import linecache
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+from .config import RuleConfig
+from .findings import Finding
+from .rules import PY002, PY003, PY004, PY005, PY006, PY007, PY009
+
+CHILD = pathlib.Path(__file__).with_name("_probe_child.py")
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MIN_MS = 10.0
+_MARKERS = ("snapstart-probe: begin", "snapstart-probe: end")
+
+@dataclass
+class ImportCost:
+    module: str
+    filename: str                    # the probed file whose import statement loaded it
+    lineno: int
+    ms: float                        # cumulative, from -X importtime
+    kept_bytes: int = 0              # still allocated after it ran, from tracemalloc
+
+@dataclass
+class ProbeResult:
+    module: str
+    filename: str
+    error: str = ""
+    seconds: float = 0.0             # wall time of the import in the timing run
+    memory: int = 0                  # bytes allocated at the end of init
+    peak: int = 0
+    threads: int = 0                 # threads still alive at the end of init
+    imports: List[ImportCost] = field(default_factory=list)
+    effects: List[Tuple[str, str, str, int, int]] = field(default_factory=list)  # kind, detail, file, line, count
+
+class ProbeError(Exception):
+    pass
+
+def _environment(home: pathlib.Path) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if not k.startswith(("AWS_", "PYTHON"))}
+    env.update(
+        HOME=str(home), TMPDIR=str(home / "tmp"), PYTHONPYCACHEPREFIX=str(home / "pycache"),
+        PYTHONHASHSEED="0", PYTHONNOUSERSITE="1",
+        AWS_ACCESS_KEY_ID="AKIASNAPSTARTPROBE00", AWS_SECRET_ACCESS_KEY="snapstart-probe-fake-secret",
+        AWS_SESSION_TOKEN="snapstart-probe", AWS_DEFAULT_REGION=os.environ.get("AWS_REGION", "us-east-1"),
+        AWS_REGION=os.environ.get("AWS_REGION", "us-east-1"), AWS_EC2_METADATA_DISABLED="true",
+        AWS_CONFIG_FILE=str(home / "aws-config"), AWS_SHARED_CREDENTIALS_FILE=str(home / "aws-credentials"),
+        AWS_LAMBDA_INITIALIZATION_TYPE="snap-start",
+    )
+    return env
+
+def _run(config: Dict, home: pathlib.Path, timeout: float, importtime: bool) -> Tuple[Dict, str]:
+    config_path = home / f"{config['mode']}.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    argv = [sys.executable] + (["-X", "importtime"] if importtime else []) + [str(CHILD), str(config_path)]
+    try:
+        proc = subprocess.run(argv, cwd=home, env=_environment(home), stdin=subprocess.DEVNULL,
+                              capture_output=True, text=True, errors="replace", timeout=timeout)
+    except subprocess.TimeoutExpired:
+        raise ProbeError(f"init did not finish within {timeout:g}s")
+    try:
+        result = json.loads(pathlib.Path(config["out"]).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        tail = proc.stderr.strip().splitlines()[-1:] or [f"exit status {proc.returncode}"]
+        raise ProbeError(f"the probe process died: {tail[0]}")
+    return result, proc.stderr
+
+def _import_times(stderr: str) -> Dict[str, float]:
+    """Cumulative ms per module from the `-X importtime` lines printed during init."""
+    out: Dict[str, float] = {}
+    lines = stderr.splitlines()
+    try:
+        lines = lines[lines.index(_MARKERS[0]) + 1:lines.index(_MARKERS[1])]
+    except ValueError:
+        return out
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            out[parts[2].strip()] = int(parts[1]) / 1000
+    return out
+
+def run_probe(module: str, filename: str, search_path: Sequence[pathlib.Path], own: Sequence[pathlib.Path],
+              deps: Sequence[pathlib.Path] = (), timeout: float = DEFAULT_TIMEOUT) -> ProbeResult:
+    """Import `module` (the handler file `filename`) with `search_path` first on sys.path.
+
+    Effects in files under `own` (the handler's code) are attributed there;
+    those in `deps` (site-packages, layers) only when no own frame is on the
+    stack. Raises ProbeError if a child process times out or dies.
+    """
+    result = ProbeResult(module, os.path.realpath(filename))
+    with tempfile.TemporaryDirectory(prefix="snapstart-probe-") as tmp:
+        home = pathlib.Path(tmp)
+        (home / "tmp").mkdir()
+        for name in ("aws-config", "aws-credentials"):
+            (home / name).write_text("", encoding="utf-8")
+        config = {"module": module, "path": [str(p) for p in search_path], "own": [str(p) for p in own],
+                  "deps": [str(p) for p in deps]}
+        effects, _ = _run(dict(config, mode="effects", out=str(home / "effects.out")), home, timeout, False)
+        timing, stderr = _run(dict(config, mode="time", out=str(home / "time.out")), home, timeout, True)
+        tmp_prefix = os.path.join(os.path.realpath(tmp), "")
+    result.error = timing["error"] or effects["error"]
+    result.seconds = timing["seconds"]
+    result.memory, result.peak, result.threads = effects["memory"], effects["peak"], effects["threads"]
+    times = _import_times(stderr)
+    for name, (importer, lineno, kept) in effects["modules"].items():
+        if name in times:
+            result.imports.append(ImportCost(name, importer, lineno, times[name], kept))
+    for kind, detail, path, lineno, count in effects["effects"]:
+        if kind in ("write", "open_file") and detail.startswith(tmp_prefix):
+            relative = detail[len(tmp_prefix):]
+            detail = "$TMPDIR/" + relative[4:] if relative.startswith("tmp/") else "$HOME/" + relative
+        result.effects.append((kind, detail, path, lineno, count))
+    return result
+
+_EFFECTS = {
+    "thread": (PY003, "Measured at init: a thread was started ({detail})."),
+    "network": (PY002, "Measured at init: {detail} (refused by the probe)."),
+    "process": (PY002, "Measured at init: a process was started: {detail} (refused by the probe)."),
+    "aws": (PY002, "Measured at init: AWS API call {detail} (answered by the probe's fake)."),
+    "aws_client": (PY006, "Measured at init: boto3/botocore client created via '{detail}'."),
+    "random": (PY005, "Measured at init: '{detail}' called."),
+    "uuid": (PY005, "Measured at init: '{detail}' called."),
+    "time": (PY005, "Measured at init: '{detail}' called."),
+    "open_socket": (PY004, "Measured at init: socket still open when init finished."),
+    "open_file": (PY004, "Measured at init: file {detail} still open when init finished."),
+    "write": (PY002, "Measured at init: wrote {detail}."),
+}
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+def _finding(cfg: RuleConfig, rule_id: str, message: str, filename: str, lineno: int) -> Finding:
+    code = linecache.getline(filename, lineno).strip() if lineno else ""
+    return Finding(rule_id, cfg.sev(rule_id), message, filename, lineno, 0, code)
+
+def probe_findings(result: ProbeResult, cfg: RuleConfig, min_ms: float = DEFAULT_MIN_MS) -> List[Finding]:
+    """Findings for what the probe measured, deduplicated per line."""
+    if result.error:
+        message = f"Probe: importing '{result.module}' failed: {result.error}"
+    else:
+        message = (f"Measured init: importing '{result.module}' took {result.seconds * 1000:.0f} ms "
+                   f"and left {_mb(result.memory)} allocated (peak {_mb(result.peak)}).")
+    out = [_finding(cfg, PY009, message, result.filename, 1)]
+    for cost in sorted(result.imports, key=lambda c: -c.ms):
+        if cost.ms >= min_ms:
+            out.append(_finding(cfg, PY009, f"Measured init: importing '{cost.module}' took {cost.ms:.0f} ms "
+                                            f"and kept {_mb(cost.kept_bytes)} allocated.",
+                                cost.filename, cost.lineno))
+    for kind, detail, path, lineno, count in result.effects:
+        rule_id, template = _EFFECTS[kind]
+        if kind in ("write", "open_file") and (detail.startswith("$TMPDIR/") or detail.startswith("/tmp/")):
+            rule_id = PY007
+        message = template.format(detail=detail)
+        if count > 1:
+            message += f" ({count} times)"
+        out.append(_finding(cfg, rule_id, message, path, lineno))
+    return out
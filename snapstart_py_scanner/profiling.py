@@ -0,0 +1,140 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Where a scan spends its time (`--profile`).
+
+Main-process phases (config, walk, read, prefilter, cache, scan, report)
+are timed here. Per-file work (parse, visit, rules and each
+rule's share) is timed in whichever process scanned the file and sent back
+with its findings as a FileTiming dict. Times come from
+`time.perf_counter`, which is system-wide monotonic on Linux and macOS, so
+worker timestamps line up with the main process in the Chrome trace.
+"""
+
+from __future__ import annotations
+import contextlib
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# per-file sub-phases, in the order they run
+FILE_PHASES = ("parse", "visit", "rules")
+
+# what a worker reports per scanned file; see scanner._scan_source
+FileTiming = Dict[str, Any]
+
+class Profiler:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.phases: Dict[str, List[float]] = {}   # name -> [wall, cpu, count]
+        self.rules: Dict[str, float] = {}
+        self.files: List[FileTiming] = []
+        self.events: List[Dict[str, Any]] = []
+
+    def add(self, name: str, wall: float, cpu: float) -> None:
+        acc = self.phases.setdefault(name, [0.0, 0.0, 0])
+        acc[0] += wall
+        acc[1] += cpu
+        acc[2] += 1
+
+    @contextlib.contextmanager
+    def phase(self, name: str, trace: bool = False) -> Iterator[None]:
+        """Time a block under `name`; top-level phases also go into the trace."""
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            self.add(name, wall, time.process_time() - cpu)
+            if trace:
+                self._event(name, "phase", start, wall, self.pid)
+
+    def timed(self, name: str, items: Iterable) -> Iterator:
+        """Yield from `items`, charging the time spent producing each item to `name`."""
+        it = iter(items)
+        while True:
+            start, cpu = time.perf_counter(), time.process_time()
+            try:
+                item = next(it)
+            except StopIteration:
+                self.add(name, time.perf_counter() - start, time.process_time() - cpu)
+                return
+            self.add(name, time.perf_counter() - start, time.process_time() - cpu)
+            yield item
+
+    def add_file(self, timing: FileTiming) -> None:
+        self.files.append(timing)
+        for name in FILE_PHASES:
+            if name in timing:
+                self.add(name, timing[name], 0.0)
+        for rule_id, seconds in timing.get("rule_times", {}).items():
+            self.rules[rule_id] = self.rules.get(rule_id, 0.0) + seconds
+        start, pid = timing["start"], timing["pid"]
+        self._event(timing["file"], "file", start, _total(timing), pid, {"bytes": timing["bytes"]})
+        for name in FILE_PHASES:
+            if name in timing:
+                self._event(name, "file", start, timing[name], pid)
+                start += timing[name]
+
+    def _event(self, name: str, cat: str, start: float, dur: float, pid: int,
+               args: Optional[Dict[str, Any]] = None) -> None:
+        event = {"name": name, "cat": cat, "ph": "X", "pid": pid, "tid": pid,
+                 "ts": round((start - self.origin) * 1e6, 1), "dur": round(dur * 1e6, 1)}
+        if args:
+            event["args"] = args
+        self.events.append(event)
+
+    def report(self, top: int = 20) -> Dict[str, Any]:
+        """The JSON profile block: phases, per-rule time and the slowest files."""
+        slowest = sorted(self.files, key=_total, reverse=True)[:top]
+        return {
+            "phases": {name: {"wall": round(wall, 6), "cpu": round(cpu, 6), "count": count}
+                       for name, (wall, cpu, count) in self.phases.items()},
+            "rules": {rule_id: round(seconds, 6)
+                      for rule_id, seconds in sorted(self.rules.items(), key=lambda kv: kv[1], reverse=True)},
+            "slowest_files": [
+                {"file": t["file"], "bytes": t["bytes"], "seconds": round(_total(t), 6), "cpu": round(t["cpu"], 6),
+                 **{name: round(t[name], 6) for name in FILE_PHASES if name in t}}
+                for t in slowest
+            ],
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """Trace Event Format, for chrome://tracing or https://ui.perfetto.dev."""
+        names = [{"name": "process_name", "ph": "M", "pid": pid, "tid": pid,
+                  "args": {"name": "scanner" if pid == self.pid else f"worker {pid}"}}
+                 for pid in sorted({e["pid"] for e in self.events})]
+        return {"traceEvents": names + self.events, "displayTimeUnit": "ms"}
+
+    def format_text(self, top: int = 10) -> str:
+        report = self.report(top)
+        out = ["Profile (wall / cpu seconds):"]
+        for name, p in report["phases"].items():
+            cpu = f"{p['cpu']:.3f}" if name not in FILE_PHASES else "-"
+            out.append(f"  {name:<10} {p['wall']:>9.3f} / {cpu:>9}  ({p['count']}x)")
+        if report["rules"]:
+            out.append("Rules:")
+            out.extend(f"  {rule_id:<34} {seconds:>9.4f}" for rule_id, seconds in report["rules"].items())
+        if report["slowest_files"]:
+            out.append(f"Slowest {len(report['slowest_files'])} files:")
+            out.extend(f"  {f['seconds']:>9.4f}s {f['bytes']:>10} B  {f['file']}" for f in report["slowest_files"])
+        return "\n".join(out)
+
+def _total(timing: FileTiming) -> float:
+    return sum(timing.get(name, 0.0) for name in FILE_PHASES)
+
+def phase(profiler: Optional[Profiler], name: str, trace: bool = False):
+    """`profiler.phase(name)`, or a no-op when not profiling."""
+    return profiler.phase(name, trace) if profiler is not None else contextlib.nullcontext()
@@ -0,0 +1,135 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Rule registry and dispatch tables.
+
+Every rule declares which statement kind it applies to and which callee
+names it cares about. The registry compiles those declarations into dicts,
+so each statement is looked up by its dotted name and only reaches the
+rules that can possibly match it, however many rules are registered.
+
+Third-party rules are picked up from the `snapstart_py_scanner.rules`
+entry-point group. An entry point may resolve to a Rule, an iterable of
+Rules, or a zero-argument callable returning either.
+"""
+
+from __future__ import annotations
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+ENTRY_POINT_GROUP = "snapstart_py_scanner.rules"
+
+# statement kinds rules can be dispatched on: the value of an assignment or
+# expression statement, any other call made while importing ("call", which
+# includes calls inside local functions the module calls at import), and
+# `X(...).start()`, keyed by the dotted name of X and run after the others
+KINDS = ("assign", "expr", "call", "start")
+
+@dataclass(frozen=True)
+class Rule:
+    rule_id: str
+    message: str                                   # "{name}" is replaced by the matched dotted name
+    on: Tuple[str, ...]                            # statement kinds, see KINDS
+    calls: Tuple[str, ...] = ()                    # exact dotted names
+    modules: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()  # (first segment, last segments)
+    roots: Tuple[str, ...] = ()                    # any `root.<...>` name
+    leaves: Tuple[str, ...] = ()                   # any `<...>.leaf` name
+    predicate: Optional[Callable[[Any, Optional[str]], bool]] = None  # extra test on (SmallStatement, resolved name)
+    trigger: Optional[bytes] = None                # prefilter regex for rules without names
+    hazard: bool = False                           # counts towards PY008
+
+    def names(self) -> List[str]:
+        out = list(self.calls) + list(self.roots) + list(self.leaves)
+        for mod, funcs in self.modules:
+            out.extend(f"{mod}.{f}" for f in funcs)
+        return out
+
+    def keyed(self) -> bool:
+        return bool(self.calls or self.modules or self.roots or self.leaves)
+
+Entry = Tuple[int, Rule]
+
+class _Table:
+    def __init__(self) -> None:
+        self.always: List[Entry] = []
+        self.exact: Dict[str, List[Entry]] = {}
+        self.pairs: Dict[Tuple[str, str], List[Entry]] = {}
+        self.roots: Dict[str, List[Entry]] = {}
+        self.leaves: Dict[str, List[Entry]] = {}
+
+class RuleRegistry:
+    def __init__(self, rules: Iterable[Rule]):
+        self.rules: List[Rule] = list(rules)
+        self.hazard_ids = frozenset(r.rule_id for r in self.rules if r.hazard)
+        self._tables = {kind: _Table() for kind in KINDS}
+        for index, rule in enumerate(self.rules):
+            for kind in rule.on:
+                if kind not in self._tables:
+                    raise ValueError(f"{rule.rule_id}: unknown statement kind {kind!r}")
+                t = self._tables[kind]
+                entry = (index, rule)
+                if not rule.keyed():
+                    t.always.append(entry)
+                for name in rule.calls:
+                    t.exact.setdefault(name, []).append(entry)
+                for mod, funcs in rule.modules:
+                    for func in funcs:
+                        t.pairs.setdefault((mod, func), []).append(entry)
+                for root in rule.roots:
+                    t.roots.setdefault(root, []).append(entry)
+                for leaf in rule.leaves:
+                    t.leaves.setdefault(leaf, []).append(entry)
+
+    def candidates(self, kind: str, name: Optional[str]) -> List[Rule]:
+        """Rules that may fire for a `kind` statement calling `name`, in registration order."""
+        t = self._tables.get(kind)
+        if t is None:
+            return []
+        if not name:
+            return [rule for _, rule in t.always]
+        parts = name.split(".")
+        found = t.always + t.exact.get(name, []) + t.pairs.get((parts[0], parts[-1]), [])
+        if len(parts) > 1:
+            found = found + t.roots.get(parts[0], []) + t.leaves.get(parts[-1], [])
+        if len(found) > 1:
+            found = sorted(dict(found).items())
+        return [rule for _, rule in found]
+
+    def signature(self) -> List[str]:
+        """Stable description of the registered rules, used in cache keys."""
+        return [f"{r.rule_id}:{r.message}:{','.join(sorted(r.names()))}" for r in self.rules]
+
+def load_plugin_rules() -> List[Rule]:
+    from importlib.metadata import entry_points
+    try:
+        eps = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:  # Python < 3.10
+        eps = entry_points().get(ENTRY_POINT_GROUP, [])
+    rules: List[Rule] = []
+    for ep in eps:
+        try:
+            obj = ep.load()
+            if callable(obj) and not isinstance(obj, Rule):
+                obj = obj()
+            rules.extend([obj] if isinstance(obj, Rule) else list(obj))
+        except Exception as e:
+            print(f"[WARN] Could not load rule plugin {ep.name}: {e}", file=sys.stderr)
+    return rules
+
+@lru_cache(maxsize=1)
+def default_registry() -> RuleRegistry:
+    from .rules import BUILTIN_RULES
+    return RuleRegistry(list(BUILTIN_RULES) + load_plugin_rules())
@@ -13,48 +13,49 @@
 # limitations under the License.
 
 from __future__ import annotations
+import base64
+import gzip
+import io
+import json
 from pathlib import Path
-from typing import List, Dict, Any
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from typing import List, Dict, Any, Iterable, Optional
 from .findings import Finding
+from .lineindex import LineIndexCache
 from collections import Counter, defaultdict
-from jinja2 import Environment, FileSystemLoader
 
-def _read_lines(path: str) -> list[str]:
+# findings per page in the paged report
+PAGE_SIZE = 100
+
+def _with_context(f: Finding, default_ctx: int = 2, lines: Optional[LineIndexCache] = None) -> Dict[str, Any]:
+    own = lines is None
+    lines = lines if lines is not None else LineIndexCache(maxsize=1)
     try:
-        return Path(path).read_text(encoding="utf-8").splitlines()
-    except Exception:
-        return []
-
-
-def _with_context(f: Finding, default_ctx: int = 2) -> Dict[str, Any]:
-    lines = _read_lines(f.filename)
-    ln = f.lineno
-    start = max(1, ln - default_ctx)
-    end = min(len(lines), ln + default_ctx)
-    chunk = []
-    for i in range(start, end + 1):
-        if i - 1 < 0 or i - 1 >= len(lines):
-            continue
-        chunk.append({
-            "n": i,
-            "text": lines[i - 1].rstrip("\n"),
-            "is_hit": (i == ln),
-        })
+        index = lines.get(f.filename)
+        ln = f.lineno
+        start = max(1, ln - default_ctx)
+        chunk = [
+            {"n": n, "text": text, "is_hit": (n == ln)}
+            for n, text in enumerate(index.lines(start, ln + default_ctx), start)
+        ]
+    finally:
+        if own:
+            lines.close()
     d = f.to_dict()
     d["context"] = chunk
     return d
 
 def _group_by_rule(findings: List[Finding]) -> Dict[str, List[Dict[str, Any]]]:
     out: Dict[str, List[Dict[str, Any]]] = {}
-    for f in findings:
-        out.setdefault(f.rule_id, []).append(_with_context(f))
+    with LineIndexCache() as lines:
+        for f in findings:
+            out.setdefault(f.rule_id, []).append(_with_context(f, lines=lines))
     return out
 
 def _group_by_file(findings: List[Finding]) -> Dict[str, List[Dict[str, Any]]]:
     out: Dict[str, List[Dict[str, Any]]] = {}
-    for f in findings:
-        out.setdefault(f.filename, []).append(_with_context(f))
+    with LineIndexCache() as lines:
+        for f in findings:
+            out.setdefault(f.filename, []).append(_with_context(f, lines=lines))
     return out
 
 def severity_counts(findings: List[Finding]) -> Dict[str, int]:
@@ -73,8 +74,18 @@ def rule_counts(findings: List[Finding]) -> Dict[str, int]:
     return out
 
 
-def render_html_report(findings, repo_root, out_path, template_dir, context_lines=3):
-    env = Environment(loader=FileSystemLoader(template_dir))
+def _environment(template_dir, cache_dir=None, autoescape=False):
+    """Jinja2 is only imported when a report is rendered. With `cache_dir`
+    compiled templates are kept there and reused while the source is unchanged."""
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+    bytecode_cache = None
+    if cache_dir is not None:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        bytecode_cache = FileSystemBytecodeCache(str(cache_dir))
+    return Environment(loader=FileSystemLoader(template_dir), autoescape=autoescape, bytecode_cache=bytecode_cache)
+
+def render_html_report(findings, repo_root, out_path, template_dir, context_lines=3, cache_dir=None):
+    env = _environment(template_dir, cache_dir)
     tpl = env.get_template("report.html.j2")
 
     # ✅ Compute severity counts
@@ -86,8 +97,9 @@ def render_html_report(findings, repo_root, out_path, template_dir, context_line
     # ✅ Compute counts by rule
     counts_by_rule = Counter(f.rule_id for f in findings)
 
-    # ✅ Enrich findings with code context
-    findings_with_ctx = [_with_context(f, default_ctx=context_lines) for f in findings]
+    # ✅ Enrich findings with code context (each file is read once)
+    with LineIndexCache() as lines:
+        findings_with_ctx = [_with_context(f, default_ctx=context_lines, lines=lines) for f in findings]
 
     # ✅ Group by severity (for clean separation in template)
     grouped_findings = defaultdict(list)
@@ -105,4 +117,65 @@ def render_html_report(findings, repo_root, out_path, template_dir, context_line
     with open(out_path, "w", encoding="utf-8") as f:
         f.write(html)
 
-    print(f"[INFO] HTML report written to: {out_path}")
+
+class _Interner:
+    """Maps repeated strings (file names, rule ids, messages) to small ints."""
+
+    def __init__(self) -> None:
+        self.ids: Dict[str, int] = {}
+
+    def __call__(self, value: str) -> int:
+        i = self.ids.get(value)
+        if i is None:
+            i = self.ids[value] = len(self.ids)
+        return i
+
+    def values(self) -> List[str]:
+        return list(self.ids)
+
+def render_paged_report(findings: Iterable[Finding], repo_root, out_path, template_dir, context_lines=3,
+                        page_size=PAGE_SIZE, cache_dir=None) -> Dict[str, int]:
+    """HTML shell plus a gzip+base64 data sidecar (`<out>.data.js`) rendered page by page in the browser.
+
+    Findings are consumed one at a time and compressed as they go, so this
+    works on the iter_findings generator and each source file is read once.
+    Returns finding counts per level.
+    """
+    out_path = Path(out_path)
+    data_path = out_path.with_name(out_path.stem + ".data.js")
+    files, rules, messages, levels = _Interner(), _Interner(), _Interner(), _Interner()
+    counts: Counter = Counter()
+    counts_by_rule: Counter = Counter()
+
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz, LineIndexCache() as lines:
+        gz.write(b'{"rows":[')
+        for i, f in enumerate(findings):
+            level = (f.level or "WARN").upper()
+            counts[level] += 1
+            counts_by_rule[f.rule_id] += 1
+            start = max(1, f.lineno - context_lines)
+            context = lines.get(f.filename).lines(start, f.lineno + context_lines)
+            row = [files(f.filename), rules(f.rule_id), levels(level), messages(f.message),
+                   f.lineno, f.col, start, context]
+            gz.write((b"," if i else b"") + json.dumps(row, separators=(",", ":")).encode("utf-8"))
+        tables = {"files": files.values(), "rules": rules.values(), "levels": levels.values(),
+                  "messages": messages.values()}
+        gz.write(b"]," + json.dumps(tables, separators=(",", ":"))[1:].encode("utf-8"))
+
+    data_path.write_text("window.SNAPSTART_DATA = \"" + base64.b64encode(buf.getvalue()).decode("ascii") + "\";\n",
+                         encoding="ascii")
+
+    for k in ("ERROR", "WARN", "INFO"):
+        counts.setdefault(k, 0)
+    env = _environment(template_dir, cache_dir, autoescape=True)
+    html = env.get_template("report_paged.html.j2").render(
+        repo_root=repo_root,
+        counts=counts,
+        counts_by_rule=counts_by_rule,
+        context_lines=context_lines,
+        page_size=page_size,
+        data_file=data_path.name,
+    )
+    out_path.write_text(html, encoding="utf-8")
+    return dict(counts)
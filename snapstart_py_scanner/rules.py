@@ -13,9 +13,12 @@
 # limitations under the License.
 
 from __future__ import annotations
-import libcst as cst
-import libcst.matchers as m
-from typing import List, Dict, Set
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, FrozenSet, List, Dict, Optional, Set, Tuple
+from .lineindex import LineIndex
+from .registry import Rule, RuleRegistry, default_registry
 
 PY001 = "PY001_MUTABLE_MODULE_STATE"
 PY002 = "PY002_NON_IDEMPOTENT_INIT"
@@ -25,9 +28,9 @@ PY005 = "PY005_RANDOM_TIME_UUID_AT_INIT"
 PY006 = "PY006_BOTO3_CLIENT_AT_INIT"
 PY007 = "PY007_TMP_FILES_CREDS_AT_INIT"
 PY008 = "PY008_MISSING_RUNTIME_HOOKS"
+PY009 = "PY009_INIT_COST"  # measured by the runtime probe only
 
 IGNORE_TOKEN = "snapstart: ignore"
-MUTABLE_LITERALS = (cst.List, cst.Dict, cst.Set)
 
 SIDE_EFFECT_FUNCS = [
     ("requests", {"get","post","put","patch","delete","head","request"}),
@@ -35,6 +38,14 @@ SIDE_EFFECT_FUNCS = [
     ("os", {"system"}),
 ]
 
+BOTO3_FACTORIES = ("boto3.client", "boto3.resource")
+SOCKET_FACTORIES = ("socket.socket",)
+FILE_OPENERS = ("open", "pathlib.Path.open")
+NONDETERMINISTIC_FUNCS = ("random.seed", "random.random", "uuid.uuid4", "uuid.uuid1", "time.time",
+                          "datetime.datetime.now", "datetime.datetime.utcnow")
+TEMPFILE_PREFIX = "tempfile."
+MUTABLE_FACTORIES = ("set", "list", "dict")
+
 THREAD_NAMES = [
     ("threading", {"Thread","Timer"}),
     ("concurrent.futures", {"ThreadPoolExecutor","ProcessPoolExecutor"}),
@@ -42,156 +53,357 @@ THREAD_NAMES = [
     ("sched", {"scheduler"}),
 ]
 
-def dotted_name(node: cst.BaseExpression) -> str:
-    names = []
-    cur = node
-    while isinstance(cur, cst.Attribute):
-        if isinstance(cur.attr, cst.Name):
-            names.append(cur.attr.value)
-        cur = cur.value
-    if isinstance(cur, cst.Name):
-        names.append(cur.value)
-    names.reverse()
-    return ".".join(names)
+# whitespace, line continuations and comments that may sit between tokens
+_GAP = rb"[\s\\()]*(?:#[^\n]*\n[\s\\()]*)*"
+
+def _is_mutable(small, name: Optional[str]) -> bool:
+    return small.mutable
+
+def _opens_tmp(small, name: Optional[str]) -> bool:
+    return small.first_arg is not None and small.first_arg.startswith("/tmp/")
+
+def _starts_thread(small, name: Optional[str]) -> bool:
+    # `name` is alias-resolved: `from threading import Thread as T; T().start()` gives threading.Thread
+    return name is not None and name.endswith("Thread")
+
+BUILTIN_RULES = (
+    # PY001 mutable literals at module import
+    Rule(PY001, "Mutable object created at module level; consider making immutable or moving to handler.",
+         on=("assign",), predicate=_is_mutable,
+         trigger=rb"=" + _GAP + rb"[\[{]|\b(?:" + b"|".join(n.encode() for n in MUTABLE_FACTORIES) + rb")\b" + _GAP + rb"\("),
+    # PY002 non-idempotent side effects
+    Rule(PY002, "Potential non-idempotent side-effect call '{name}' at module import.",
+         on=("expr", "assign", "call"), modules=tuple((mod, tuple(sorted(funcs))) for mod, funcs in SIDE_EFFECT_FUNCS), hazard=True),
+    # PY006 boto3
+    Rule(PY006, "boto3 client/resource created at module level; recreate per invocation or in restore hook.",
+         on=("expr", "assign", "call"), calls=BOTO3_FACTORIES, hazard=True),
+    # PY004 sockets/files
+    Rule(PY004, "Socket opened at module level; reopen per invocation or in restore hook.",
+         on=("expr", "assign", "call"), calls=SOCKET_FACTORIES, hazard=True),
+    Rule(PY004, "File opened at module level; use context manager in handler or reopen in restore hook.",
+         on=("expr", "assign", "call"), calls=FILE_OPENERS, hazard=True),
+    # PY005 randomness/time/uuid
+    Rule(PY005, "Non-deterministic value computed at module import via '{name}'.",
+         on=("expr", "assign", "call"), calls=NONDETERMINISTIC_FUNCS),
+    # PY007 tmp (tempfile.* or open('/tmp/...'))
+    Rule(PY007, "Writing/reading in /tmp at module import; defer to handler or restore hook.",
+         on=("expr", "assign", "call"), calls=("open",), predicate=_opens_tmp, hazard=True),
+    Rule(PY007, "Temporary file created at module import; may not survive snapshot/restore.",
+         on=("expr", "assign", "call"), roots=(TEMPFILE_PREFIX.rstrip("."),), hazard=True),
+    # PY003 background threads/executors created at import (assignment)
+    Rule(PY003, "Background thread/executor '{name}' created at module level.",
+         on=("assign", "call"), leaves=tuple(sorted(n for _, names in THREAD_NAMES for n in names)), hazard=True),
+    # Also catch foo = Thread(...); foo.start() as a direct call
+    Rule(PY003, "Thread started at module level.",
+         on=("start",), predicate=_starts_thread, trigger=rb"Thread\b", hazard=True),
+)
+
+ALL_RULES: FrozenSet[str] = frozenset(["*"])
+
+@lru_cache(maxsize=4096)
+def ignored_rules(comment: str) -> FrozenSet[str]:
+    """Rule ids a `# snapstart: ignore[...]` comment names (full or short, e.g. PY001),
+    ALL_RULES for a bare `# snapstart: ignore`, empty for any other comment."""
+    txt = comment.lstrip("# ").strip()
+    if not txt.startswith(IGNORE_TOKEN):
+        return frozenset()
+    if "[" in txt and "]" in txt:
+        inside = txt.split("[", 1)[1].split("]", 1)[0]
+        return frozenset(s.strip() for s in inside.split(",") if s.strip())
+    return ALL_RULES
 
 def has_inline_ignore(comment_list, rule_id: str) -> bool:
     for c in comment_list or []:
         # If it's an EmptyLine or Comment, extract the string safely
         comment_value = None
-        if hasattr(c, "value"):  # for Comment objects
+        if isinstance(c, str):  # plain comment text (ast engine)
+            comment_value = c
+        elif hasattr(c, "value"):  # for Comment objects
             comment_value = c.value
         elif hasattr(c, "comment") and c.comment:  # for EmptyLine with a comment
             comment_value = c.comment.value
         if not comment_value:
             continue
-
-        txt = comment_value.lstrip("# ").strip()
-        if txt.startswith("snapstart: ignore"):
-            if "[" in txt and "]" in txt:
-                inside = txt.split("[", 1)[1].split("]", 1)[0]
-                ids = [s.strip() for s in inside.split(",") if s.strip()]
-                return rule_id in ids
+        ids = ignored_rules(comment_value)
+        if ids is ALL_RULES or rule_id in ids or rule_id.split("_", 1)[0] in ids:
             return True
     return False
 
-class ModuleLevelVisitor(cst.CSTVisitor):
-    METADATA_DEPENDENCIES = (cst.metadata.PositionProvider,)
+@dataclass
+class SmallStatement:
+    """One simple statement or call site, reduced to the facts the rules look at."""
+    kind: str                        # "assign", "expr", "other", or "call" for a call site
+    call: Optional[str] = None       # dotted name of the called function if the value is a call
+    mutable: bool = False            # value is a mutable literal or set()/list()/dict()
+    first_arg: Optional[str] = None  # first call argument, when it is a plain str literal
+    started: Optional[str] = None    # dotted name of X in an `X(...).start()` expression
+    nested: List["SmallStatement"] = field(default_factory=list)  # other calls the statement makes
+
+@dataclass
+class StatementLine:
+    """A statement line executed at import (`a = 1; b = 2` is one line)."""
+    node: Any                        # engine-specific handle, resolved by position()
+    smalls: List[SmallStatement]
+    leading: List[str] = field(default_factory=list)   # comment lines directly above
+    trailing: Optional[str] = None   # comment at the end of the line
+
+@dataclass
+class FunctionFacts:
+    """Call sites of a function or method defined in the module."""
+    calls: List[SmallStatement]      # kind "call", in source order; nested defs/lambdas excluded
+    aliases: Dict[str, str] = field(default_factory=dict)  # imports inside the body
+    owner: Optional[str] = None      # class name for methods
+
+@dataclass
+class ModuleFacts:
+    """What a front end extracts from one module.
+
+    `lines` are the statements that run at import: module-level ones plus
+    those inside module-level if/try/with/for/while blocks (except under
+    `if __name__ == "__main__":`). `functions` is keyed by "name" or
+    "Class.method"; `classes` maps class names to their local base classes
+    and method names.
+    """
+    lines: List[StatementLine] = field(default_factory=list)
+    aliases: Dict[str, str] = field(default_factory=dict)
+    functions: Dict[str, FunctionFacts] = field(default_factory=dict)
+    classes: Dict[str, Tuple[List[str], Set[str]]] = field(default_factory=dict)
+
+# (rule, matched dotted name, first local callable of the chain leading to it,
+#  callable whose summary holds the rest of the chain or None, chain length,
+#  last CHAIN_ENDS callables of the chain). Only the next hop is stored, so
+#  summaries stay linear in the depth of the helper chain.
+Effect = Tuple[Rule, str, str, Optional[str], int, Tuple[str, ...]]
+# hops shown at each end of a long chain in a message
+CHAIN_ENDS = 3
+
+CONSTRUCTORS = ("__new__", "__init__", "__post_init__")
+
+def resolve_alias(name: Optional[str], aliases: Dict[str, str]) -> Optional[str]:
+    """Rewrite the first segment of `name` through import aliases
+    (`from boto3 import client as c`: `c` -> `boto3.client`)."""
+    if not name:
+        return name
+    head, dot, rest = name.partition(".")
+    target = aliases.get(head)
+    if target is None:
+        return name
+    return target + dot + rest
+
+def import_aliases(module: Optional[str], names: List[Tuple[str, Optional[str]]], level: int = 0) -> Dict[str, str]:
+    """Aliases bound by one import statement.
+
+    `module` is None for `import a.b as c`; otherwise the `from` module.
+    Relative imports bind nothing we can resolve.
+    """
+    out: Dict[str, str] = {}
+    if level:
+        return out
+    for name, asname in names:
+        if name == "*":
+            continue
+        if module is None:
+            if asname:
+                out[asname] = name
+        else:
+            out[asname or name] = f"{module}.{name}"
+    return out
+
+class ModuleChecks:
+    """Engine-neutral evaluation of the registered rules over ModuleFacts.
+
+    Front ends (cst_engine.ModuleLevelVisitor, ast_engine.AstModuleVisitor) lower
+    a module and implement position(); everything else, including findings
+    layout, is shared so both engines agree.
 
-    def __init__(self, filename: str, severities: Dict[str,str], hook_names: List[str], source_text: str):
+    Calls into functions and classes of the same module are followed: each
+    callable gets one memoized summary of the hazards its body reaches, and
+    those are reported on the import-time statement that calls it.
+
+    Set `rule_times` to a dict before checking to have the time spent in
+    each rule (predicate, suppression and reporting) added to it by rule id.
+    """
+
+    def __init__(self, filename: str, severities: Dict[str,str], hook_names: List[str], source_text: str,
+                 registry: Optional[RuleRegistry] = None):
+        self.registry = registry if registry is not None else default_registry()
         self.filename = filename
         self.sev = severities
         self.hook_names = set(hook_names)
         self.findings = []
         self.seen_hooks: Set[str] = set()
-        self._module_level_nodes: List[cst.CSTNode] = []
-        self._source_lines = source_text.splitlines()  # 0-indexed backing text
-
-    def visit_Module(self, node: cst.Module) -> None:
-        self._module_level_nodes = list(node.body)
-
-    def visit_FunctionDef(self, node: cst.FunctionDef) -> None:
-        fn = node.name.value
-        if fn in self.hook_names:
-            self.seen_hooks.add(fn)
-
-    def leave_Module(self, node: cst.Module) -> None:
-        for stmt in self._module_level_nodes:
-            comments = []
-            if hasattr(stmt, "leading_lines"):
-                comments = [ll.comment for ll in getattr(stmt, "leading_lines")]
-            trailing_comment = getattr(stmt, "trailing_whitespace", None)
-            if trailing_comment and trailing_comment.comment:
-                comments.append(trailing_comment.comment)
-
-            if isinstance(stmt, cst.SimpleStatementLine):
-                for small in stmt.body:
-                    # PY001 mutable literals at module import
-                    if isinstance(small, cst.Assign):
-                        value = small.value
-                        if isinstance(value, MUTABLE_LITERALS) or m.matches(value, m.Call(func=m.Name("set"))) or m.matches(value, m.Call(func=m.Name("list"))) or m.matches(value, m.Call(func=m.Name("dict"))):
-                            if not has_inline_ignore(comments, PY001):
-                                self._emit(PY001, "Mutable object created at module level; consider making immutable or moving to handler.", stmt)
-
-                    # Calls at module import
-                    if isinstance(small, cst.Expr) and isinstance(small.value, cst.Call):
-                        call = small.value
-                        dname = dotted_name(call.func)
-                        mod = dname.split(".")[0] if dname else ""
-                        func = dname.split(".")[-1] if dname else ""
-
-                        # PY002 non-idempotent side effects
-                        for mname, funcs in SIDE_EFFECT_FUNCS:
-                            if (mod == mname and func in funcs):
-                                if not has_inline_ignore(comments, PY002):
-                                    self._emit(PY002, f"Potential non-idempotent side-effect call '{dname}' at module import.", stmt)
-
-                        # PY006 boto3
-                        if dname in ("boto3.client","boto3.resource"):
-                            if not has_inline_ignore(comments, PY006):
-                                self._emit(PY006, "boto3 client/resource created at module level; recreate per invocation or in restore hook.", stmt)
-
-                        # PY004 sockets/files
-                        if dname in ("socket.socket",):
-                            if not has_inline_ignore(comments, PY004):
-                                self._emit(PY004, "Socket opened at module level; reopen per invocation or in restore hook.", stmt)
-                        if dname in ("open","pathlib.Path.open"):
-                            if not has_inline_ignore(comments, PY004):
-                                self._emit(PY004, "File opened at module level; use context manager in handler or reopen in restore hook.", stmt)
-
-                        # PY005 randomness/time/uuid
-                        if dname in ("random.seed","random.random","uuid.uuid4","uuid.uuid1","time.time","datetime.datetime.now","datetime.datetime.utcnow"):
-                            if not has_inline_ignore(comments, PY005):
-                                self._emit(PY005, f"Non-deterministic value computed at module import via '{dname}'.", stmt)
-
-                        # PY007 tmp (tempfile.* or open('/tmp/...'))
-                        if dname == "open" and call.args and isinstance(call.args[0].value, cst.SimpleString):
-                            s = call.args[0].value.evaluated_value
-                            if isinstance(s, str) and s.startswith("/tmp/"):
-                                if not has_inline_ignore(comments, PY007):
-                                    self._emit(PY007, "Writing/reading in /tmp at module import; defer to handler or restore hook.", stmt)
-                        if dname.startswith("tempfile."):
-                            if not has_inline_ignore(comments, PY007):
-                                self._emit(PY007, "Temporary file created at module import; may not survive snapshot/restore.", stmt)
-
-                    # PY003 background threads/executors created at import (assignment)
-                    if isinstance(small, cst.Assign) and isinstance(small.value, cst.Call):
-                        dname = dotted_name(small.value.func)
-                        if any(dname.endswith("." + n) for _, names in THREAD_NAMES for n in names):
-                            if not has_inline_ignore(comments, PY003):
-                                self._emit(PY003, f"Background thread/executor '{dname}' created at module level.", stmt)
-
-            # Also catch foo = Thread(...); foo.start() as a direct call
-            if isinstance(stmt, cst.SimpleStatementLine):
-                for small in stmt.body:
-                    if isinstance(small, cst.Expr) and isinstance(small.value, cst.Call):
-                        call = small.value
-                        if isinstance(call.func, cst.Attribute) and call.func.attr.value == "start":
-                            recv = call.func.value
-                            if isinstance(recv, cst.Call):
-                                dname = dotted_name(recv.func)
-                                if dname.endswith("threading.Thread") or dname.endswith("Thread"):
-                                    if not has_inline_ignore(getattr(stmt, "leading_lines", []), PY003):
-                                        self._emit(PY003, "Thread started at module level.", stmt)
-
-        hazardous = any(f["rule_id"] in {PY002, PY003, PY004, PY006, PY007} for f in self.findings)
+        self._source = source_text
+        self._lines: Optional[LineIndex] = None  # built on first use by source_line()
+        self._emitted: Set[Tuple[str, int, str]] = set()
+        self._facts = ModuleFacts()
+        self._summaries: Dict[str, Dict[Tuple[str, str], Effect]] = {}  # by (rule id, message)
+        self.rule_times: Optional[Dict[str, float]] = None
+        self.check_seconds = 0.0
+
+    def position(self, node: Any) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def source_line(self, n: int) -> str:
+        """Line n (1-indexed) of the source, "" past its end; sliced from the source, not split."""
+        if self._lines is None:
+            self._lines = LineIndex(self.filename, self._source)
+        return self._lines.line(n)
+
+    def check_module(self, facts: ModuleFacts, module_node: Any) -> None:
+        start = time.perf_counter()
+        registry = self.registry
+        self._facts = facts
+        for line in facts.lines:
+            comments = line.leading + ([line.trailing] if line.trailing else [])
+            for small in line.smalls:
+                name = resolve_alias(small.call, facts.aliases)
+                self._dispatch(registry.candidates(small.kind, name), small, name, comments, line.node)
+                sites = [(small, name)]
+                for site in small.nested:
+                    site_name = resolve_alias(site.call, facts.aliases)
+                    self._dispatch(registry.candidates("call", site_name), site, site_name, comments, line.node)
+                    sites.append((site, site_name))
+                for site, site_name in sites:
+                    if site_name and self._is_local(site_name):
+                        for effect in self._summary(site_name).values():
+                            self._report(effect[0], effect[1], comments, line.node, effect)
+            for small in line.smalls:
+                if small.started is not None:
+                    name = resolve_alias(small.started, facts.aliases)
+                    self._dispatch(registry.candidates("start", name), small, name, comments, line.node)
+
+        hazardous = any(f["rule_id"] in registry.hazard_ids for f in self.findings)
         if hazardous and not self.seen_hooks:
-            self._emit(PY008, "Hazardous init detected but no runtime restore hooks found. Define restore hooks (e.g., after_restore).", node)
- 
+            self._emit(PY008, "Hazardous init detected but no runtime restore hooks found. Define restore hooks (e.g., after_restore).", module_node)
+        self.check_seconds = time.perf_counter() - start
+
+    def _dispatch(self, rules: List[Rule], small: SmallStatement, name: Optional[str], comments: List[str], node: Any) -> None:
+        times = self.rule_times
+        for rule in rules:
+            start = time.perf_counter() if times is not None else 0.0
+            if rule.predicate is None or rule.predicate(small, name):
+                self._report(rule, name, comments, node)
+            if times is not None:
+                times[rule.rule_id] = times.get(rule.rule_id, 0.0) + time.perf_counter() - start
+
+    def _report(self, rule: Rule, name: Optional[str], comments: List[str], node: Any,
+                effect: Optional[Effect] = None) -> None:
+        if has_inline_ignore(comments, rule.rule_id):
+            return
+        message = rule.message.replace("{name}", name or "")
+        if effect is not None:
+            message += " (via " + " -> ".join(self._chain(effect, message)) + ")"
+        self._emit(rule.rule_id, message, node)
+
+    def _chain(self, effect: Effect, message: str) -> List[str]:
+        """The callables `effect` goes through, following the next hops. Beyond
+        2 * CHAIN_ENDS + 1 only both ends are shown, so each message is built in
+        constant time."""
+        depth, tail = effect[4], effect[5]
+        hops = [f"{effect[2]}()"]
+        limit = depth if depth <= 2 * CHAIN_ENDS + 1 else CHAIN_ENDS
+        key = (effect[0].rule_id, message)
+        while len(hops) < limit:
+            effect = self._summaries[effect[3]][key]
+            hops.append(f"{effect[2]}()")
+        if depth > limit:
+            hops.append(f"... {depth - 2 * CHAIN_ENDS} more")
+            hops.extend(f"{c}()" for c in tail)
+        return hops
+
+    # --- import-time call graph -------------------------------------------
 
-    def _emit(self, rule_id: str, message: str, node: cst.CSTNode) -> None:
+    def _is_local(self, name: str) -> bool:
+        return name in self._facts.functions or name in self._facts.classes
+
+    def _callee_name(self, fn: FunctionFacts, site: SmallStatement) -> Optional[str]:
+        name = resolve_alias(resolve_alias(site.call, fn.aliases), self._facts.aliases)
+        if fn.owner and name and name.split(".")[0] in ("self", "cls"):
+            name = fn.owner + name[name.index("."):] if "." in name else name
+        return name
+
+    def _local_callees(self, key: str) -> List[str]:
+        facts = self._facts
+        if key in facts.classes:
+            bases, methods = facts.classes[key]
+            ctors = [f"{key}.{m}" for m in CONSTRUCTORS if m in methods]
+            return ctors or [b for b in bases if b in facts.classes]
+        fn = facts.functions[key]
+        out = []
+        for site in fn.calls:
+            name = self._callee_name(fn, site)
+            if name and self._is_local(name):
+                out.append(name)
+        return out
+
+    def _summary(self, root: str) -> Dict[Tuple[str, str], Effect]:
+        """Hazards reached by calling local callable `root`, computed once per callable.
+
+        Iterative post-order over the local call graph, so deep helper chains
+        don't hit the recursion limit; recursive cycles contribute nothing.
+        """
+        if root in self._summaries:
+            return self._summaries[root]
+        in_progress: Set[str] = set()
+        stack = [root]
+        while stack:
+            key = stack[-1]
+            if key in self._summaries:
+                stack.pop()
+                continue
+            if key not in in_progress:
+                in_progress.add(key)
+                pending = [c for c in self._local_callees(key) if c not in self._summaries and c not in in_progress]
+                if pending:
+                    stack.extend(reversed(pending))
+                    continue
+            self._summaries[key] = self._build_summary(key)
+            stack.pop()
+        return self._summaries[root]
+
+    def _build_summary(self, key: str) -> Dict[Tuple[str, str], Effect]:
+        effects: Dict[Tuple[str, str], Effect] = {}
+
+        def add(effect: Effect) -> None:
+            effects.setdefault((effect[0].rule_id, effect[0].message.replace("{name}", effect[1] or "")), effect)
+
+        facts = self._facts
+        if key in facts.classes:
+            # a class call is its constructor's (or base's) call; the class itself is not a hop
+            for callee in self._local_callees(key):
+                for effect in self._summaries.get(callee, {}).values():
+                    add(effect)
+            return effects
+        fn = facts.functions[key]
+        times = self.rule_times
+        for site in fn.calls:
+            name = self._callee_name(fn, site)
+            for rule in self.registry.candidates("call", name):
+                start = time.perf_counter() if times is not None else 0.0
+                if rule.predicate is None or rule.predicate(site, name):
+                    add((rule, name, key, None, 1, (key,)))
+                if times is not None:
+                    times[rule.rule_id] = times.get(rule.rule_id, 0.0) + time.perf_counter() - start
+            if name and self._is_local(name):
+                for rule, hit, _, _, depth, tail in self._summaries.get(name, {}).values():
+                    add((rule, hit, key, name, depth + 1, ((key,) + tail)[-CHAIN_ENDS:]))
+        return effects
+
+    def _emit(self, rule_id: str, message: str, node: Any) -> None:
         try:
-            meta = self.get_metadata(cst.metadata.PositionProvider, node, None)
-            lineno = meta.start.line if meta else 1
-            col = meta.start.column if meta else 0
+            lineno, col = self.position(node)
         except Exception:
             lineno, col = 1, 0
 
+        # one finding per rule and message on a line, however many calls trigger it
+        if (rule_id, lineno, message) in self._emitted:
+            return
+        self._emitted.add((rule_id, lineno, message))
+
         # Slice the offending source line safely
         code_snippet = ""
         try:
-            # libcst lines are 1-indexed; our list is 0-indexed
-            line = self._source_lines[lineno - 1] if 1 <= lineno <= len(self._source_lines) else ""
-            code_snippet = line.strip()
+            code_snippet = self.source_line(lineno).strip()
             if len(code_snippet) > 160:
                 code_snippet = code_snippet[:157] + "..."
         except Exception:
@@ -206,3 +418,10 @@ class ModuleLevelVisitor(cst.CSTVisitor):
             "filename": self.filename,
             "code": code_snippet,
         })
+
+def __getattr__(name: str):
+    # the libcst front end lives in cst_engine so importing the rules doesn't load libcst
+    if name == "ModuleLevelVisitor":
+        from .cst_engine import ModuleLevelVisitor
+        return ModuleLevelVisitor
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
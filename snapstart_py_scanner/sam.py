@@ -0,0 +1,247 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Every Python function of a local SAM / CloudFormation template, in one scan.
+
+Functions come from `AWS::Serverless::Function` (CodeUri, Handler, Layers,
+with `Globals.Function` applied) and `AWS::Lambda::Function` with a local
+`Code` directory. Local nested `AWS::Serverless::Application` templates are
+followed. Each function's scope is the import graph of its handler,
+resolved against its CodeUri and the `python/` directory of its local
+layers, as on Lambda. A function whose handler file can't be found falls
+back to every `.py` file under its CodeUri.
+
+The scopes are unioned and each file is scanned once, so a monorepo of many
+functions sharing `common/` costs as much as its unique files. Findings are
+then attributed to every function whose scope contains them.
+"""
+
+from __future__ import annotations
+import os
+import pathlib
+import sys
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Set, Tuple
+import yaml
+from .config import RuleConfig
+from .findings import Finding, count_levels, exit_code_from_findings
+from .imports import ImportGraph
+from .rules import PY008
+from .scanner import scan_paths
+from .walker import iter_python_files
+
+SERVERLESS_FUNCTION = "AWS::Serverless::Function"
+LAMBDA_FUNCTION = "AWS::Lambda::Function"
+LAYER_TYPES = {"AWS::Serverless::LayerVersion": "ContentUri", "AWS::Lambda::LayerVersion": "Content"}
+APPLICATION = "AWS::Serverless::Application"
+
+class _TemplateLoader(yaml.SafeLoader):
+    """SafeLoader that reads intrinsic-function tags (`!Ref X`) as their long form."""
+
+def _intrinsic(loader: yaml.SafeLoader, suffix: str, node: yaml.Node):
+    key = "Ref" if suffix == "Ref" else f"Fn::{suffix}"
+    if isinstance(node, yaml.ScalarNode):
+        value = loader.construct_scalar(node)
+        if key == "Fn::GetAtt" and isinstance(value, str):
+            value = value.split(".", 1)
+    elif isinstance(node, yaml.SequenceNode):
+        value = loader.construct_sequence(node, deep=True)
+    else:
+        value = loader.construct_mapping(node, deep=True)
+    return {key: value}
+
+_TemplateLoader.add_multi_constructor("!", _intrinsic)
+
+def load_template(path: pathlib.Path) -> Dict:
+    """A YAML or JSON template as plain data."""
+    with open(path, encoding="utf-8") as fh:
+        data = yaml.load(fh, Loader=_TemplateLoader)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} is not a CloudFormation template")
+    return data
+
+@dataclass
+class Function:
+    name: str                        # logical ID, `Parent/Child` for nested applications
+    code_dir: pathlib.Path
+    handler: str
+    layers: List[pathlib.Path] = field(default_factory=list)
+
+    def handler_file(self) -> Optional[pathlib.Path]:
+        """The file Lambda imports for `module.function`, if it exists."""
+        module = self.handler.rpartition(".")[0]
+        if not module:
+            return None
+        base = self.code_dir / module.replace(".", "/")
+        for candidate in (base.with_name(base.name + ".py"), base / "__init__.py"):
+            if candidate.is_file():
+                return candidate
+        return None
+
+def _local_dir(base: pathlib.Path, value) -> Optional[pathlib.Path]:
+    """A local directory named by CodeUri/ContentUri/Code, or None for S3 and intrinsics."""
+    if not isinstance(value, str) or value.startswith("s3://"):
+        return None
+    path = (base / value).resolve()
+    return path if path.is_dir() else None
+
+def _layer_dirs(resources: Dict, base: pathlib.Path, refs) -> List[pathlib.Path]:
+    """Search-path entries of the local layers in `refs`: `python/` inside each, then its root."""
+    out = []
+    for ref in refs if isinstance(refs, list) else []:
+        logical = ref.get("Ref") if isinstance(ref, dict) else None
+        layer = resources.get(logical) if isinstance(logical, str) else None
+        if not isinstance(layer, dict) or layer.get("Type") not in LAYER_TYPES:
+            continue  # an ARN: not part of this tree
+        root = _local_dir(base, (layer.get("Properties") or {}).get(LAYER_TYPES[layer["Type"]]))
+        if root is None:
+            continue
+        if (root / "python").is_dir():
+            out.append(root / "python")
+        out.append(root)
+    return out
+
+def find_functions(template: pathlib.Path, prefix: str = "", _seen: Set[pathlib.Path] | None = None) -> List[Function]:
+    """Python functions with local code defined in `template`, in template order."""
+    template = template.resolve()
+    seen = _seen if _seen is not None else set()
+    if template in seen:
+        return []
+    seen.add(template)
+    data = load_template(template)
+    base = template.parent
+    defaults = ((data.get("Globals") or {}).get("Function") or {})
+    resources = data.get("Resources") or {}
+    out: List[Function] = []
+    for logical, resource in resources.items():
+        if not isinstance(resource, dict):
+            continue
+        kind, own = resource.get("Type"), resource.get("Properties") or {}
+        props = own
+        name = f"{prefix}{logical}"
+        if kind == APPLICATION:
+            location = props.get("Location")
+            if isinstance(location, str) and (base / location).is_file():
+                out.extend(find_functions(base / location, f"{name}/", seen))
+            continue
+        if kind == SERVERLESS_FUNCTION:
+            props = {**defaults, **own}
+            props["Layers"] = list(defaults.get("Layers") or []) + list(own.get("Layers") or [])
+            code = props.get("CodeUri", ".")
+        elif kind == LAMBDA_FUNCTION:
+            code = props.get("Code")
+        else:
+            continue
+        runtime = props.get("Runtime")
+        if props.get("PackageType") == "Image" or (isinstance(runtime, str) and not runtime.startswith("python")):
+            continue
+        handler = props.get("Handler")
+        code_dir = _local_dir(base, code)
+        if code_dir is None or not isinstance(handler, str):
+            print(f"[WARN] Skipping {name}: no local code directory or handler in {template}", file=sys.stderr)
+            continue
+        out.append(Function(name, code_dir, handler, _layer_dirs(resources, base, props.get("Layers"))))
+    return out
+
+@dataclass
+class FunctionScope:
+    function: Function
+    files: Set[str]                  # real paths of the sources loaded at init
+    handler_file: Optional[str] = None
+    findings: List[Finding] = field(default_factory=list)
+
+def build_scopes(functions: List[Function], cfg: RuleConfig) -> List[FunctionScope]:
+    """Each function's import graph; files shared between functions are parsed once."""
+    parsed: Dict[Tuple[str, str], tuple] = {}
+    scopes = []
+    for fn in functions:
+        handler = fn.handler_file()
+        if handler is not None:
+            files = ImportGraph(handler, fn.code_dir, fn.layers, parsed=parsed).build().files()
+        else:
+            print(f"[WARN] {fn.name}: handler {fn.handler!r} not found under {fn.code_dir}; "
+                  "scanning the whole code directory", file=sys.stderr)
+            files = list(iter_python_files(fn.code_dir, ignore_paths=cfg.ignore_paths))
+        scopes.append(FunctionScope(fn, {os.path.realpath(p) for p in files},
+                                    os.path.realpath(handler) if handler is not None else None))
+    return scopes
+
+def unique_files(scopes: List[FunctionScope]) -> List[pathlib.Path]:
+    return [pathlib.Path(p) for p in sorted(set().union(*(s.files for s in scopes)))]
+
+def scan_functions(scopes: List[FunctionScope], root: pathlib.Path, cfg: RuleConfig,
+                   **scan_kwargs) -> List[Tuple[Finding, List[str]]]:
+    """Scan every file once and pair each finding with the functions it affects.
+
+    As with --handler, `ignore_paths` does not apply to files a handler
+    imports, and PY008 is only kept for a function's own handler file.
+    """
+    found = scan_paths(root, unique_files(scopes), cfg=replace(cfg, ignore_paths=[]), **scan_kwargs)
+    out = []
+    for f in found:
+        names = []
+        for scope in scopes:
+            if f.filename not in scope.files:
+                continue
+            if f.rule_id == PY008 and f.filename != scope.handler_file and scope.handler_file is not None:
+                continue
+            scope.findings.append(f)
+            names.append(scope.function.name)
+        if names:
+            out.append((f, names))
+    return out
+
+def template_report(template: pathlib.Path, scopes: List[FunctionScope],
+                    hazards: List[Tuple[Finding, List[str]]], exit_on: str) -> Dict:
+    return {
+        "template": str(template),
+        "unique_files": len(unique_files(scopes)),
+        "functions": [
+            {"name": s.function.name, "handler": s.function.handler, "code_uri": str(s.function.code_dir),
+             "handler_file": s.handler_file, "layers": [str(p) for p in s.function.layers],
+             "files": len(s.files), "counts": count_levels(s.findings),
+             "exit_code": exit_code_from_findings(s.findings, exit_on)}
+            for s in scopes
+        ],
+        "findings": [dict(f.to_dict(), functions=names) for f, names in hazards],
+    }
+
+def exit_code(report: Dict) -> int:
+    """The worst per-function exit code."""
+    return max((fn["exit_code"] for fn in report["functions"]), default=0)
+
+def _names(names: List[str], limit: int = 5) -> str:
+    shown = ", ".join(names[:limit])
+    return shown + (f" and {len(names) - limit} more" if len(names) > limit else "")
+
+def format_template_text(report: Dict) -> str:
+    lines = []
+    if not report["findings"]:
+        lines.append("No findings.\n")
+    for f in report["findings"]:
+        lines.append(f"{f['level']} {f['rule_id']} {f['filename']}:{f['lineno']}:{f['col']}")
+        if f["code"]:
+            lines.append(f"→ {f['code']}")
+        lines.append(f"   {f['message']}")
+        lines.append(f"   in {_names(f['functions'])}\n")
+    functions = report["functions"]
+    width = max([8] + [len(fn["name"]) for fn in functions])
+    lines.append(f"{len(functions)} function(s) in {report['template']}, "
+                 f"{report['unique_files']} unique files:")
+    lines.append(f"  {'function':<{width}} {'files':>6} {'ERROR':>6} {'WARN':>6} {'INFO':>6} {'exit':>5}")
+    for fn in functions:
+        c = fn["counts"]
+        lines.append(f"  {fn['name']:<{width}} {fn['files']:>6} {c.get('ERROR', 0):>6} {c.get('WARN', 0):>6} "
+                     f"{c.get('INFO', 0):>6} {fn['exit_code']:>5}")
+    return "\n".join(lines)
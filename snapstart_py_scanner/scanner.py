@@ -13,13 +13,25 @@
 # limitations under the License.
 
 from __future__ import annotations
-from ast import mod
-import pathlib, fnmatch
-from typing import List
-import libcst as cst
-from .config import load_config, RuleConfig
-from .findings import Finding
-from .rules import ModuleLevelVisitor
+import ast, os, pathlib, fnmatch, sys, time
+from collections import deque
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple
+from .archives import is_archive, iter_members
+from .cache import ResultCache
+from .config import ENGINES, load_config, RuleConfig
+from .ast_engine import AstModuleVisitor
+from .budget import (
+    GENERATED, KILLED, MEMORY, PARSE_ERROR, READ_ERROR, TOO_LARGE, TRANSIENT, BudgetExceeded, Limits, Note,
+    generated_marker, limit_worker, outline_source, time_limit,
+)
+from .findings import FileStatus, Finding, FindingStore
+from .prefilter import is_candidate
+from .profiling import FileTiming, Profiler, phase
+from .walker import PathMatcher, iter_python_files
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
 
 def _match_any(path: pathlib.Path, globs: List[str]) -> bool:
     if not globs:
@@ -27,52 +39,398 @@ def _match_any(path: pathlib.Path, globs: List[str]) -> bool:
     s = str(path).replace("\\","/")
     return any(fnmatch.fnmatch(s, g) for g in globs)
 
-def gather_python_files(root: pathlib.Path, includes: List[str] | None = None, excludes: List[str] | None = None) -> List[pathlib.Path]:
-    files: List[pathlib.Path] = []
-    for p in root.rglob("*.py"):
-        if not p.is_file():
-            continue
-        s = str(p).replace("\\","/")
-        if includes and not any(fnmatch.fnmatch(s, pat) for pat in includes):
-            continue
-        if excludes and any(fnmatch.fnmatch(s, pat) for pat in excludes):
-            continue
-        files.append(p)
-    return files
+def gather_python_files(root: pathlib.Path, includes: List[str] | None = None, excludes: List[str] | None = None,
+                        ignore_paths: List[str] | None = None) -> List[pathlib.Path]:
+    return list(iter_python_files(root, includes=includes, excludes=excludes, ignore_paths=ignore_paths))
 
-def scan_paths(root: pathlib.Path, paths: List[pathlib.Path], extra_excludes: List[str] | None = None) -> List[Finding]:
-    cfg: RuleConfig = load_config(root)
-    findings: List[Finding] = []
-    for p in paths:
-        if cfg.path_ignored(p, extra_excludes):
-            continue
+# (rule_id, level, message, lineno, col, code) -- what workers send back per finding
+Record = Tuple[str, str, str, int, int, str]
+
+# files handed to a worker per task; keeps IPC overhead low without starving cores
+CHUNK_SIZE = 16
+
+_worker_cfg: Tuple[dict, list, str, bool, Limits, bool] | None = None
+
+def _init_worker(severity: dict, hook_names: list, engine: str = "cst", profile: bool = False,
+                 limits: Limits | None = None, pooled: bool = False) -> None:
+    """Set up a scanning process; `pooled` is true in pool workers, which the kernel may kill."""
+    global _worker_cfg
+    limits = limits if limits is not None else Limits()
+    _worker_cfg = (severity, hook_names, engine, profile, limits, pooled)
+    if pooled:
+        limit_worker(limits)
+
+def _records(visitor) -> List[Record]:
+    return [(f["rule_id"], f["level"], f["message"], f["lineno"], f["col"], f.get("code", ""))
+            for f in visitor.findings]
+
+def _scan_source(filename: str, code: str, severity: dict, hook_names: list, engine: str = "cst",
+                 timing: FileTiming | None = None) -> List[Record]:
+    """Findings of one file; with `timing`, also fills in where the time went."""
+    start, cpu = time.perf_counter(), time.process_time()
+    if engine == "ast":
+        tree = ast.parse(code)
+        visitor = AstModuleVisitor(filename, severity, hook_names, source_text=code)
+    else:
+        import libcst as cst  # loaded on first use: cache hits and the ast engine never need it
+        from .cst_engine import ModuleLevelVisitor
+        tree = cst.parse_module(code)
+        visitor = ModuleLevelVisitor(filename, severity, hook_names, source_text=code)
+    parsed = time.perf_counter()
+    if timing is not None:
+        visitor.rule_times = {}
+    visitor.run(tree)
+    if timing is not None:
+        end = time.perf_counter()
+        timing.update(file=filename, bytes=len(code.encode("utf-8")), start=start, pid=os.getpid(),
+                      cpu=time.process_time() - cpu, rule_times=visitor.rule_times, parse=parsed - start)
+        timing["visit"] = end - parsed - visitor.check_seconds
+        timing["rules"] = visitor.check_seconds
+    return _records(visitor)
+
+def _scan_outline(filename: str, code: str, severity: dict, hook_names: list) -> List[Record]:
+    """Findings of a file too big to parse whole: module-level code only, with the ast engine."""
+    visitor = AstModuleVisitor(filename, severity, hook_names, source_text=outline_source(code))
+    visitor.run()
+    return _records(visitor)
+
+# (filename, records, note, timing); records is None if the file was skipped
+Scanned = Tuple[str, List[Record] | None, Note | None, FileTiming | None]
+
+def _scan_chunk(chunk: List[Tuple[str, str]]) -> List[Scanned]:
+    """Worker entry point: scan a shard of (filename, source) pairs.
+
+    Returns one (filename, records, note, timing) tuple per file, in input
+    order. `note` says why a file was skipped (records is None) or only
+    partly analysed; timing is None unless the worker was started to profile.
+    """
+    severity, hook_names, engine, profile, limits, pooled = _worker_cfg
+    out = []
+    for filename, code in chunk:
+        timing = {} if profile else None
         try:
-            code = p.read_text(encoding="utf-8")
+            with time_limit(limits.seconds, hard=pooled):
+                if limits.parse_bytes and len(code) > limits.parse_bytes:
+                    records = _scan_outline(filename, code, severity, hook_names)
+                    note = (TOO_LARGE, f"{len(code) // 1024} KB is over the {limits.parse_bytes // 1024} KB parse "
+                                       "limit; function bodies were not analysed")
+                else:
+                    records, note = _scan_source(filename, code, severity, hook_names, engine, timing), None
+            out.append((filename, records, note, timing or None))
+        except BudgetExceeded as e:
+            out.append((filename, None, (e.reason, e.detail or "over the per-file time limit"), None))
+        except MemoryError:
+            limit = f"the {limits.memory_mb} MB worker limit" if limits.memory_mb else "available memory"
+            out.append((filename, None, (MEMORY, f"over {limit}"), None))
         except Exception as e:
-            print(f"[WARN] Could not read {p}: {e}")
-            continue
+            out.append((filename, None, (PARSE_ERROR, str(e)), None))
+    return out
+
+# (severity, hook_names, engine, limits): what a task of a shared pool scans with
+Settings = Tuple[dict, list, str, Limits]
+
+def scan_settings(cfg: RuleConfig) -> Settings:
+    return cfg.severity, cfg.hook_names, cfg.engine, cfg.limits
+
+def _scan_with(settings: Settings, chunk: List[Tuple[str, str]]) -> List[Scanned]:
+    """Worker entry point of a pool shared by several configs (see shared_pool)."""
+    global _worker_cfg
+    severity, hook_names, engine, limits = settings
+    # the memory limit is the pool's, set when the worker started
+    limits = replace(limits, memory_mb=_worker_cfg[4].memory_mb)
+    _worker_cfg = (severity, hook_names, engine, False, limits, True)
+    return _scan_chunk(chunk)
+
+def _chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
+class _Pool:
+    """Process pool for _scan_chunk that replaces itself when a worker is killed.
+
+    The chunks a killed worker took down with it are rerun one file per
+    task, so the file responsible is found and reported as KILLED while the
+    others are scanned normally.
+    """
+
+    def __init__(self, jobs: int, initargs: tuple):
+        self._jobs = jobs
+        self._initargs = initargs
+        self._generation = 0
+        self._pool = self._start()
+
+    def _start(self):
+        from concurrent.futures import ProcessPoolExecutor  # a single-process scan doesn't pay for multiprocessing
+        return ProcessPoolExecutor(max_workers=self._jobs, initializer=_init_worker, initargs=self._initargs)
+
+    def _restart(self, generation: int) -> None:
+        if generation == self._generation:  # not yet replaced since that task was submitted
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._start()
+            self._generation += 1
+
+    def submit(self, payload: list, settings: Settings | None = None) -> Tuple[int, Future]:
+        """Scan `payload` with the pool's config, or with `settings` if given."""
+        from concurrent.futures.process import BrokenProcessPool
+        args = (_scan_chunk, payload) if settings is None else (_scan_with, settings, payload)
         try:
-            mod = cst.parse_module(code)
-        except Exception as e:
-            print(f"[WARN] Skipping {p}: {e}")
+            return self._generation, self._pool.submit(*args)
+        except BrokenProcessPool:
+            self._restart(self._generation)
+            return self._generation, self._pool.submit(*args)
+
+    def result(self, payload: list, handle: Tuple[int, Future], settings: Settings | None = None) -> List[Scanned]:
+        from concurrent.futures.process import BrokenProcessPool
+        generation, fut = handle
+        try:
+            return fut.result()
+        except BrokenProcessPool:
+            self._restart(generation)
+        if len(payload) == 1:
+            return [self._killed(payload[0][0])]
+        out = []
+        for item in payload:
+            generation, fut = self.submit([item], settings)
+            try:
+                out.extend(fut.result())
+            except BrokenProcessPool:
+                self._restart(generation)
+                out.append(self._killed(item[0]))
+        return out
+
+    @staticmethod
+    def _killed(filename: str) -> Scanned:
+        return filename, None, (KILLED, "the worker scanning it died (a crash, or over the time or memory limit)"), None
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+def shared_pool(jobs: int, memory_mb: int = 0) -> _Pool:
+    """A warm pool for scanning several repositories at once; each task carries
+    its repository's scan_settings(). `memory_mb` limits every worker."""
+    return _Pool(max(1, jobs), ({}, [], "cst", False, Limits(memory_mb=memory_mb), True))
+
+def _map_ordered(pool: _Pool, tasks: Iterable[Tuple[object, list]], window: int) -> Iterator[Tuple[object, list]]:
+    """Like pool.map over (context, payload) pairs, yielding (context, result).
+
+    Keeps at most `window` tasks in flight so sources are read lazily instead
+    of all being loaded up front. Empty payloads are never sent to a worker.
+    """
+    pending: deque = deque()
+    it = iter(tasks)
+
+    def submit(task) -> None:
+        context, payload = task
+        pending.append((context, payload, pool.submit(payload) if payload else None))
+
+    for task in it:
+        submit(task)
+        if len(pending) >= window:
+            break
+    while pending:
+        context, payload, handle = pending.popleft()
+        for task in it:
+            submit(task)
+            break
+        yield context, (pool.result(payload, handle) if handle is not None else [])
+
+@dataclass
+class ScanStats:
+    """Per-run counters filled in by scan_paths."""
+    files_seen: int = 0
+    files_parsed: int = 0
+    files_cached: int = 0
+    files_prefiltered: int = 0
+    files_skipped: int = 0
+    files_degraded: int = 0
+    files_known: int = 0
+    statuses: List[FileStatus] = field(default_factory=list)  # the skipped and degraded files
+
+# (filename, source, raw bytes, known result); files known from the knowledge
+# base, unreadable or generated have a (records, note) result and no source
+Source = Tuple[str, str | None, bytes | None, Tuple[List[Record] | None, Note | None] | None]
+
+def _read_sources(cfg: RuleConfig, paths: Iterable[pathlib.Path], extra_excludes: List[str] | None,
+                  stats: ScanStats, prefilter: bool, profiler: Profiler | None = None,
+                  known: Dict[str, List[Record]] | None = None) -> Iterator[Source]:
+    if profiler is not None:
+        paths = profiler.timed("walk", paths)
+    skip = None
+    for p in paths:
+        archive = is_archive(p)
+        # an archive is only ever here because it was asked for; its members are filtered below
+        if not archive and cfg.path_ignored(p, extra_excludes):
             continue
+        if known and str(p) in known:
+            stats.files_seen += 1
+            stats.files_known += 1
+            yield str(p), None, None, (known[str(p)], None)
+            continue
+        if archive:
+            if skip is None:
+                skip = PathMatcher(list(cfg.ignore_paths) + list(extra_excludes or []))
+            members = iter_members(p, skip)
+        else:
+            members = ((str(p), p.read_bytes),)
+        for filename, read in members:
+            stats.files_seen += 1
+            marker = None
+            try:
+                with phase(profiler, "read"):
+                    data = read()
+                with phase(profiler, "prefilter"):
+                    candidate = not prefilter or is_candidate(data)
+                if not candidate:
+                    stats.files_prefiltered += 1
+                    continue
+                if not cfg.scan_generated:
+                    marker = generated_marker(data)
+                code = data.decode("utf-8")
+            except Exception as e:
+                yield filename, None, None, (None, (READ_ERROR, str(e)))
+                continue
+            if marker is not None:
+                yield filename, None, None, (None, (GENERATED, marker))
+                continue
+            yield filename, code, data, None
+
+def _plan(sources: Iterable[Source], cache: ResultCache | None, size: int,
+          profiler: Profiler | None = None) -> Iterator[Tuple[list, list]]:
+    """Group sources into chunks of (filename, key, cached) entries, paired
+    with the (filename, source) pairs that still have to be scanned."""
+    for chunk in _chunks(sources, size):
+        entries, misses = [], []
+        for filename, code, data, result in chunk:
+            key = hit = None
+            if result is not None:
+                hit = result
+            elif cache:
+                with phase(profiler, "cache"):
+                    key = cache.key(data)
+                    hit = cache.get(key)
+            entries.append((filename, key, hit))
+            if hit is None:
+                misses.append((filename, code))
+        yield entries, misses
+
+def plan_files(cfg: RuleConfig, paths: Iterable[pathlib.Path], stats: ScanStats, cache: ResultCache | None = None,
+               prefilter: bool = True, size: int = CHUNK_SIZE) -> Iterator[Tuple[list, list]]:
+    """Read, prefilter and look up `paths` for a caller running its own pool.
+
+    Yields (entries, misses) chunks: `misses` is what a worker still has to
+    scan, and collect_records() turns entries and the worker's results back
+    into (filename, records) pairs.
+    """
+    return _plan(_read_sources(cfg, paths, None, stats, prefilter), cache, size)
+
+def collect_records(results: Iterable[Tuple[list, list]], cache: ResultCache | None,
+                    stats: ScanStats) -> Iterator[Tuple[str, List[Record]]]:
+    return _collect(results, cache, stats)
+
+def iter_file_records(root: pathlib.Path, paths: Iterable[pathlib.Path], extra_excludes: List[str] | None = None,
+                      jobs: int = 1, cache: ResultCache | None = None, stats: ScanStats | None = None,
+                      prefilter: bool = True, cfg: RuleConfig | None = None, profiler: Profiler | None = None,
+                      known: Dict[str, List[Record]] | None = None) -> Iterator[Tuple[str, List[Record]]]:
+    """Yield `(filename, records)` for each file of `paths` in input order, as soon as it is done.
+
+    With jobs > 1 files are sharded across a process pool; the result is
+    identical to a single-process scan. Files whose content is already in
+    `cache`, or that the byte prefilter proves finding-free, are not parsed.
+    `cfg` defaults to the .snapstartpy.yaml found in `root`. Nothing is
+    retained between files, so memory does not grow with the finding count.
+    With a `profiler`, phase and per-file timings are recorded in it.
+    Files in `known` (path -> records, see knowledge.py) are not read at all.
+    Files skipped or only partly analysed under cfg's limits (see budget.py)
+    are listed in `stats.statuses`.
+    """
+    cfg = cfg if cfg is not None else load_config(root)
+    if cfg.engine not in ENGINES:
+        raise ValueError(f"unknown engine {cfg.engine!r}; expected one of {', '.join(ENGINES)}")
+    stats = stats if stats is not None else ScanStats()
+    sources = _read_sources(cfg, paths, extra_excludes, stats, prefilter, profiler, known)
+    profile = profiler is not None
+
+    limits = cfg.limits
+
+    if jobs <= 1 and not limits.memory_mb:
+        _init_worker(cfg.severity, cfg.hook_names, cfg.engine, profile, limits)
+        results = ((entries, _scan_chunk(misses)) for entries, misses in _plan(sources, cache, 1, profiler))
+        yield from _collect(results, cache, stats, profiler)
+        return
+
+    # a memory limit is only ever applied to worker processes, so it needs a pool even at -j1
+    jobs = max(1, jobs)
+    pool = _Pool(jobs, (cfg.severity, cfg.hook_names, cfg.engine, profile, limits, True))
+    try:
+        results = _map_ordered(pool, _plan(sources, cache, CHUNK_SIZE, profiler), window=jobs * 4)
+        yield from _collect(results, cache, stats, profiler)
+    finally:
+        pool.close()
+
+def iter_findings(root: pathlib.Path, paths: Iterable[pathlib.Path], extra_excludes: List[str] | None = None,
+                  jobs: int = 1, cache: ResultCache | None = None, stats: ScanStats | None = None,
+                  prefilter: bool = True, cfg: RuleConfig | None = None,
+                  profiler: Profiler | None = None, known: Dict[str, List[Record]] | None = None) -> Iterator[Finding]:
+    """Yield the findings of `paths` in input order, each file's as soon as it is done; see iter_file_records."""
+    for filename, records in iter_file_records(root, paths, extra_excludes=extra_excludes, jobs=jobs, cache=cache,
+                                               stats=stats, prefilter=prefilter, cfg=cfg, profiler=profiler,
+                                               known=known):
+        for rule_id, level, message, lineno, col, code in records:
+            yield Finding(
+                rule_id=rule_id,
+                level=level,
+                message=message,
+                filename=filename,
+                lineno=lineno,
+                col=col,
+                code=code
+            )
+
+def scan_paths(root: pathlib.Path, paths: Iterable[pathlib.Path], extra_excludes: List[str] | None = None,
+               jobs: int = 1, cache: ResultCache | None = None, stats: ScanStats | None = None,
+               prefilter: bool = True, cfg: RuleConfig | None = None,
+               profiler: Profiler | None = None, known: Dict[str, List[Record]] | None = None) -> FindingStore:
+    """Scan `paths` and return their findings in input order, in a FindingStore; see iter_file_records.
+
+    Records go into the store's columns directly; no Finding is built
+    unless the caller iterates over the store.
+    """
+    store = FindingStore()
+    for filename, records in iter_file_records(root, paths, extra_excludes=extra_excludes, jobs=jobs, cache=cache,
+                                               stats=stats, prefilter=prefilter, cfg=cfg, profiler=profiler,
+                                               known=known):
+        store.extend_records(filename, records)
+    return store
 
-      # after parsing and wrapping
-        wrapper = cst.metadata.MetadataWrapper(mod)
-        visitor = ModuleLevelVisitor(str(p), cfg.severity, cfg.hook_names, source_text=code)  # <-- pass code
-        wrapper.visit(visitor)
-
-        print(f"Scanning {p}")
-    
-        for f in visitor.findings:
-            findings.append(Finding(
-                rule_id=f["rule_id"],
-                level=f["level"],
-                message=f["message"],
-                filename=str(p),
-                lineno=f["lineno"],
-                col=f["col"],
-                code=f.get("code", "")
-            ))
-    return findings
+def _collect(results: Iterable[Tuple[list, list]], cache: ResultCache | None,
+             stats: ScanStats, profiler: Profiler | None = None) -> Iterator[Tuple[str, List[Record]]]:
+    for entries, scanned in results:
+        scanned = iter(scanned)
+        for filename, key, hit in entries:
+            if hit is None:
+                _, records, note, timing = next(scanned)
+                stats.files_parsed += 1
+                if timing is not None and profiler is not None:
+                    profiler.add_file(timing)
+                if cache is not None and not (note and note[0] in TRANSIENT):
+                    with phase(profiler, "cache"):
+                        cache.put(key, (records, note))
+            else:
+                records, note = hit
+                if key is not None:  # knowledge-base, read-error and generated results were counted when read
+                    stats.files_cached += 1
+            if note:
+                stats.statuses.append(FileStatus(filename, "skipped" if records is None else "degraded", *note))
+            if records is None:
+                stats.files_skipped += 1
+                continue
+            if note:
+                stats.files_degraded += 1
+            print(f"Scanning {filename}", file=sys.stderr)
+            yield filename, records
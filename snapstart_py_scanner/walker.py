@@ -0,0 +1,100 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import annotations
+import fnmatch
+import os
+import pathlib
+import re
+from typing import Iterable, Iterator, List
+
+def _union(patterns: Iterable[str]) -> re.Pattern | None:
+    parts = [f"(?:{fnmatch.translate(p)})" for p in patterns]
+    return re.compile("|".join(parts)) if parts else None
+
+class PathMatcher:
+    """A set of fnmatch-style globs compiled into a single regex.
+
+    Semantics match `any(fnmatch.fnmatch(path, p) for p in patterns)` on
+    forward-slash paths. `prunes(dir)` is True when every path below `dir` is
+    guaranteed to match, i.e. a pattern of the form `<prefix>/*` or
+    `<prefix>/**` whose prefix matches the directory itself (`*` also matches
+    `/` in fnmatch).
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns: List[str] = list(patterns)
+        self._rx = _union(self.patterns)
+        prefixes = []
+        for p in self.patterns:
+            if p.endswith("/**"):
+                prefixes.append(p[:-3])
+            elif p.endswith("/*"):
+                prefixes.append(p[:-2])
+        self._dir_rx = _union(prefixes)
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def match(self, path: str) -> bool:
+        return self._rx is not None and self._rx.match(path) is not None
+
+    def prunes(self, dirpath: str) -> bool:
+        return self._dir_rx is not None and self._dir_rx.match(dirpath) is not None
+
+def _norm(path: str) -> str:
+    return path if os.sep == "/" else path.replace(os.sep, "/")
+
+def iter_python_files(root: pathlib.Path, includes: List[str] | None = None, excludes: List[str] | None = None,
+                      ignore_paths: List[str] | None = None, archives: bool = False) -> Iterator[pathlib.Path]:
+    """Lazily yield `*.py` files under `root`, sorted per directory.
+
+    Directories matched by `ignore_paths`/`excludes` are never descended into.
+    Symlinked directories are followed once; loops are skipped. With
+    `archives`, `*.zip` files are yielded too (includes don't apply to them).
+    """
+    skip = PathMatcher(list(ignore_paths or []) + list(excludes or []))
+    include = PathMatcher(includes or [])
+    seen = set()
+    stack = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            st = os.stat(current)
+            if (st.st_dev, st.st_ino) in seen:
+                continue
+            seen.add((st.st_dev, st.st_ino))
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if not skip.prunes(_norm(entry.path)):
+                        subdirs.append(entry.path)
+                    continue
+                is_zip = archives and entry.name.lower().endswith(".zip")
+                if not (entry.name.endswith(".py") or is_zip) or not entry.is_file():
+                    continue
+            except OSError:
+                continue
+            s = _norm(entry.path)
+            if include and not is_zip and not include.match(s):
+                continue
+            if skip.match(s):
+                continue
+            yield pathlib.Path(entry.path)
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,160 @@
+# Copyright 2025 Vansh Madan
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming report writers.
+
+Writers take findings one at a time and never hold more than a batch of
+them, so memory stays flat however many findings a scan produces. Output
+is flushed every `batch` findings or `interval` seconds, whichever comes
+first, so consumers reading a pipe see results while the scan runs.
+"""
+
+from __future__ import annotations
+import json
+import pathlib
+import re
+import time
+from typing import Dict, IO, Iterable, Optional
+from . import __version__
+from .findings import FileStatus, Finding
+from .registry import default_registry
+from .rules import PY008
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_LEVELS = {"ERROR": "error", "WARN": "warning", "WARNING": "warning"}
+
+# "... via '{name}'." -> "...." for the per-rule descriptions
+_NAME_REF = re.compile(r"\s*(?:via\s+)?'?\{name\}'?")
+
+class StreamWriter:
+    def __init__(self, stream: IO[str], batch: int = 64, interval: float = 1.0):
+        self.stream = stream
+        self.batch = batch
+        self.interval = interval
+        self.counts: Dict[str, int] = {}  # findings per upper-cased level, for the exit code
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, finding: Finding) -> None:
+        level = finding.level.upper()
+        self.counts[level] = self.counts.get(level, 0) + 1
+        self._write(finding)
+        self._pending += 1
+        if self._pending >= self.batch or time.monotonic() - self._last_flush >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.stream.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def close(self, statuses: Iterable[FileStatus] = ()) -> None:
+        """Finish the output; `statuses` are the files the scan skipped or only partly analysed."""
+        self.flush()
+
+    def _write(self, finding: Finding) -> None:
+        raise NotImplementedError
+
+class JsonlWriter(StreamWriter):
+    """One JSON object per line, same fields as the `json` format."""
+
+    def _write(self, finding: Finding) -> None:
+        self.stream.write(json.dumps(finding.to_dict(), separators=(",", ":")) + "\n")
+
+class SarifWriter(StreamWriter):
+    """SARIF 2.1.0 log with a single run; results are appended as they arrive."""
+
+    def __init__(self, stream: IO[str], root: pathlib.Path, batch: int = 64, interval: float = 1.0):
+        super().__init__(stream, batch, interval)
+        self.root = root
+        self._first = True
+        self._last: Optional[tuple] = None
+        rules: Dict[str, str] = {}
+        for rule in default_registry().rules:
+            rules.setdefault(rule.rule_id, _NAME_REF.sub("", rule.message))
+        rules.setdefault(PY008, "Hazardous init detected but no runtime restore hooks found.")
+        head = json.dumps({
+            "$schema": SARIF_SCHEMA,
+            "version": "2.1.0",
+            "runs": [{
+                "tool": {"driver": {
+                    "name": "snapstart-py-scanner",
+                    "version": __version__,
+                    "rules": [{"id": rid, "shortDescription": {"text": text}} for rid, text in rules.items()],
+                }},
+                "originalUriBaseIds": {"SRCROOT": {"uri": root.resolve().as_uri() + "/"}},
+                "results": [],
+            }],
+        }, indent=2)
+        # everything up to the empty results array; close() writes the rest
+        cut = head.rindex('"results": [') + len('"results": [')
+        self._tail = head[cut:]
+        stream.write(head[:cut])
+
+    def _uri(self, filename: str) -> Optional[str]:
+        path = pathlib.Path(filename)
+        try:
+            return path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return None
+
+    def _artifact(self, filename: str) -> Dict[str, str]:
+        # findings arrive grouped by file, so one entry is enough
+        if self._last is None or self._last[0] != filename:
+            uri = self._uri(filename)
+            artifact = {"uri": uri, "uriBaseId": "SRCROOT"} if uri is not None else \
+                {"uri": pathlib.Path(filename).resolve().as_uri()}
+            self._last = (filename, artifact)
+        return self._last[1]
+
+    def _write(self, finding: Finding) -> None:
+        artifact = self._artifact(finding.filename)
+        region = {"startLine": finding.lineno, "startColumn": finding.col + 1}
+        if finding.code:
+            region["snippet"] = {"text": finding.code}
+        result = {
+            "ruleId": finding.rule_id,
+            "level": SARIF_LEVELS.get(finding.level.upper(), "note"),
+            "message": {"text": finding.message},
+            "locations": [{"physicalLocation": {"artifactLocation": artifact, "region": region}}],
+        }
+        self.stream.write(("\n" if self._first else ",\n") + json.dumps(result))
+        self._first = False
+
+    def _notification(self, status: FileStatus) -> Dict:
+        return {
+            "level": "warning" if status.status == "skipped" else "note",
+            "message": {"text": f"{status.status} ({status.reason}): {status.detail}"},
+            "descriptor": {"id": status.reason},
+            "locations": [{"physicalLocation": {"artifactLocation": self._artifact(status.filename)}}],
+        }
+
+    def close(self, statuses: Iterable[FileStatus] = ()) -> None:
+        notifications = [self._notification(s) for s in statuses]
+        tail = self._tail
+        if notifications:
+            # after the results array: "invocations" is the run's last member
+            invocation = {"executionSuccessful": True, "toolExecutionNotifications": notifications}
+            tail = "]," + "\n      \"invocations\": " + json.dumps([invocation]) + tail[1:]
+        self.stream.write(("" if self._first else "\n      ") + tail + "\n")
+        super().close()
+
+WRITERS = ("jsonl", "sarif")
+
+def make_writer(fmt: str, stream: IO[str], root: pathlib.Path) -> StreamWriter:
+    if fmt == "sarif":
+        return SarifWriter(stream, root)
+    if fmt == "jsonl":
+        return JsonlWriter(stream)
+    raise ValueError(f"no streaming writer for format {fmt!r}")
@@ -0,0 +1,21 @@
+import pathlib
+import textwrap
+from dataclasses import replace
+from typing import Callable, List
+
+import pytest
+
+from snapstart_py_scanner.config import RuleConfig
+from snapstart_py_scanner.findings import Finding
+from snapstart_py_scanner.scanner import iter_findings
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+@pytest.fixture
+def scan(tmp_path: pathlib.Path) -> Callable[..., List[Finding]]:
+    """scan(source, engine="cst", name="mod.py"): findings of one module written to tmp_path."""
+    def run(source: str, engine: str = "cst", name: str = "mod.py", prefilter: bool = True) -> List[Finding]:
+        path = tmp_path / name
+        path.write_text(textwrap.dedent(source), encoding="utf-8")
+        return list(iter_findings(tmp_path, [path], cfg=replace(RuleConfig(), engine=engine), prefilter=prefilter))
+    return run
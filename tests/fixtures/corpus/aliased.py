@@ -0,0 +1,17 @@
+import requests as rq
+import boto3 as b3
+import tempfile as tf
+from socket import socket as S
+from random import random as rnd
+from time import time as now
+from threading import Thread as T
+from concurrent.futures import ThreadPoolExecutor as Pool
+
+session = rq.get("https://example.com")
+client = b3.client("s3")
+sock = S()
+seed = rnd()
+started_at = now()
+T(target=print).start()
+scratch = tf.mkdtemp()
+pool = Pool(2)
@@ -0,0 +1,8 @@
+"""Nothing here runs anything at import."""
+from typing import Tuple
+
+LIMIT: Tuple[int, int] = (1, 2)
+
+
+def handler(event, context):
+    return {"limit": LIMIT, "name": event["name"]}
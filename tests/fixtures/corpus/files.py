@@ -0,0 +1,7 @@
+import pathlib
+import socket
+
+log = open("/tmp/app.log", "a")
+data = open("data.json")
+handle = pathlib.Path("x").open()
+conn = socket.socket()
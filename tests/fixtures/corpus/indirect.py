@@ -0,0 +1,20 @@
+import datetime
+import uuid
+import os
+
+
+def token():
+    return uuid.uuid4()
+
+
+class Loader:
+    def __init__(self):
+        self.stamp = datetime.datetime.now()
+        os.system("true")
+
+
+TOKEN = token()
+LOADER = Loader()
+
+if __name__ == "__main__":
+    os.system("false")
@@ -0,0 +1,9 @@
+CACHE = {}
+ITEMS = [
+    1,
+]
+SEEN = set()
+NAMES = list ()
+CONFIG = dict(  # comment between name and call
+    a=1,
+)
@@ -0,0 +1,13 @@
+import json
+import random
+import time as clock
+
+SETTINGS = json.loads(json.dumps({"seed": random.seed(4)}))
+print(clock.time())
+with open("settings.ini") as fh:
+    RAW = fh.read()
+try:
+    import requests
+    requests.post("https://example.com", data=b"")
+except ImportError:
+    pass
@@ -0,0 +1,9 @@
+from boto3 import *
+from threading import *
+from requests import *
+from subprocess import *
+
+client = client("s3")
+Thread(target=print).start()
+get("https://example.com")
+run(["true"])
@@ -0,0 +1,27 @@
+"""Handler with comments on the lines the fixer rewrites."""
+import random
+import boto3
+import functools
+from snapshot_restore_py import register_after_restore
+
+@functools.lru_cache(maxsize=None)
+def get_s3():  # region comes from AWS_REGION
+    return boto3.client("s3")
+
+# snapstart: ignore[PY005_RANDOM_TIME_UUID_AT_INIT] re-run in the restore hook
+SEED = random.random()  # per-process seed
+# snapstart: ignore[PY005_RANDOM_TIME_UUID_AT_INIT] re-run in the restore hook
+random.seed()  # reseed the global generator
+TOKEN = random.getrandbits(32)
+
+
+def handler(event, context):
+    return get_s3().list_buckets(), SEED, TOKEN
+
+
+@register_after_restore
+def after_restore():
+    global SEED
+    get_s3.cache_clear()
+    SEED = random.random()  # per-process seed
+    random.seed()  # reseed the global generator
@@ -0,0 +1,24 @@
+import random
+import boto3
+from snapshot_restore_py import register_after_restore
+import functools
+
+@functools.lru_cache(maxsize=None)
+def get_dynamo():  # snapstart: ignore[PY001]
+    return boto3.resource("dynamodb")
+
+# snapstart: ignore[PY005_RANDOM_TIME_UUID_AT_INIT] re-run in the restore hook
+SEED = random.random()  # snapstart: ignore[PY001] seeded once per sandbox
+
+
+@register_after_restore
+def after_restore():
+    """Refresh state in every restored sandbox."""
+    global SEED
+    get_dynamo.cache_clear()
+    SEED = random.random()  # snapstart: ignore[PY001] seeded once per sandbox
+    return None
+
+
+def handler(event, context):
+    return get_dynamo().Table("t").get_item(Key={"id": SEED})
@@ -0,0 +1,19 @@
+import boto3
+import functools
+from snapshot_restore_py import register_after_restore
+
+S3 = boto3.client("s3")
+DYNAMO = boto3.resource("dynamodb")
+
+@functools.lru_cache(maxsize=None)
+def get_events():
+    return boto3.client("events")
+
+
+def handler(event, context):
+    return S3.list_buckets(), DYNAMO.Table("t"), get_events().put_events(Entries=[])
+
+
+@register_after_restore
+def after_restore():
+    get_events.cache_clear()
@@ -0,0 +1,7 @@
+import boto3
+
+QUEUE = boto3.client("sqs")
+
+
+def send(body):
+    return QUEUE.send_message(QueueUrl="q", MessageBody=body)
@@ -0,0 +1,5 @@
+from clients import S3
+
+
+def upload(key, body):
+    return S3.put_object(Bucket="b", Key=key, Body=body)
@@ -0,0 +1,9 @@
+import boto3
+
+S3 = boto3.client("s3")
+DYNAMO = boto3.resource("dynamodb")
+EVENTS = boto3.client("events")
+
+
+def handler(event, context):
+    return S3.list_buckets(), DYNAMO.Table("t"), EVENTS.put_events(Entries=[])
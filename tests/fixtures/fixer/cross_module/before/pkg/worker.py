@@ -0,0 +1,5 @@
+from .queue import QUEUE
+
+
+def drain():
+    return QUEUE.receive_message(QueueUrl="q")
@@ -0,0 +1,5 @@
+import clients
+
+
+def table(name):
+    return clients.DYNAMO.Table(name)
@@ -0,0 +1,17 @@
+import os  # snapstart: ignore
+import random
+
+# snapstart: ignore
+SEED = random.random()
+TOKEN = os.urandom(8)  # a comment that is not a marker
+STAMP = random.random()  # snapstart: ignore
+VALUE = random.randint(  # snapstart: ignore
+    1,
+    6,
+)
+LATER = random.randint(
+    1,
+    6,  # snapstart: ignore
+)
+# a plain comment
+CACHE = {}  # noqa
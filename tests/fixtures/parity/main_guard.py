@@ -0,0 +1,18 @@
+import random
+import requests
+
+SEED = random.random()
+
+def handler(event, context):
+    return requests.get("https://example.com")
+
+if __name__ == "__main__":
+    requests.get("https://example.com")
+    SEED = random.random()
+elif random.random():
+    pass
+
+if "__main__" == __name__:
+    random.seed(0)
+if __name__ != "__main__":
+    random.seed(1)
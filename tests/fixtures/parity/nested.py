@@ -0,0 +1,29 @@
+import random
+import threading
+
+def outer():
+    SEED = random.random()
+    def inner():
+        threading.Thread(target=print).start()
+    class Local:
+        value = random.random()
+    return inner
+
+class Service:
+    seed = random.random()
+
+    class Settings:
+        cache = {}
+        token = random.random()
+
+        def method(self):
+            return random.random()
+
+    @staticmethod
+    def build():
+        return threading.Thread(target=print)
+
+async def handler(event, context):
+    async def helper():
+        return random.random()
+    return await helper()
@@ -0,0 +1,3 @@
+import random; import uuid; SEED = random.random(); ID = uuid.uuid4()
+import os; os.system("true"); CACHE = {};
+x = 1; y = random.randint(1, 6)  # snapstart: ignore
@@ -0,0 +1,8 @@
+import random, time, os
+if os.environ.get("DEBUG"): SEED = random.random()
+else: SEED = 4
+while False: time.sleep(1)
+for _ in range(1): STAMP = time.time(); CACHE = {}
+with open("/tmp/x.log", "a") as fh: fh.write("x")
+class Config: started = time.time(); seen = []
+def lazy(): return random.random()
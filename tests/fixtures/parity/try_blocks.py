@@ -0,0 +1,23 @@
+import random
+import uuid
+import requests
+
+try:
+    SESSION = requests.Session()
+except* ValueError:
+    ID = uuid.uuid4()
+except* (KeyError, TypeError) as group:
+    pass
+else:
+    SEED = random.random()
+finally:
+    CACHE = {}
+
+try:
+    import ujson as json
+except ImportError:
+    import json
+else:
+    TOKEN = uuid.uuid4()
+finally:
+    STAMP = random.random()
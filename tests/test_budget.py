@@ -0,0 +1,36 @@
+import pathlib
+
+from snapstart_py_scanner.budget import GENERATED, generated_marker
+from snapstart_py_scanner.scanner import ScanStats, iter_findings
+
+PROSE = b'''"""Helpers for building trees.
+
+A tree can be generated by passing a source string to parse(); the
+auto-generated parts of the output say "do not edit" in their header.
+"""
+import boto3
+
+client = boto3.client("s3")
+'''
+
+def test_docstring_prose_is_not_a_marker():
+    assert generated_marker(PROSE) is None
+
+def test_prose_docstring_file_is_scanned(tmp_path: pathlib.Path):
+    path = tmp_path / "trees.py"
+    path.write_bytes(PROSE)
+    stats = ScanStats()
+    found = list(iter_findings(tmp_path, [path], stats=stats))
+    assert "PY006_BOTO3_CLIENT_AT_INIT" in {f.rule_id for f in found}
+    assert not any(s.reason == GENERATED for s in stats.statuses)
+
+def test_header_markers():
+    for header in (b"# -*- coding: utf-8 -*-\n# Generated by the protocol buffer compiler.  DO NOT EDIT!\n",
+                   b"# Code generated by stubgen. DO NOT EDIT.\n",
+                   b"#!/usr/bin/env python\n# @generated\n",
+                   b"# This file was automatically generated by SWIG (http://www.swig.org).\n"):
+        assert generated_marker(header + b"import os\n") is not None
+
+def test_marker_after_code_does_not_count():
+    assert generated_marker(b"import os\n# Generated by hand, then edited\n") is None
+    assert generated_marker(b"# do not edit this list by hand\nHOOKS = []\n") is None
@@ -0,0 +1,20 @@
+import pathlib
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+def test_missing_handler_is_a_usage_error(tmp_path):
+    proc = subprocess.run([sys.executable, str(ROOT / "cli.py"), str(tmp_path), "--handler", str(tmp_path / "app.py")],
+                          capture_output=True, text=True, cwd=ROOT)
+    assert proc.returncode == 2
+    assert "--handler" in proc.stderr and "no such file" in proc.stderr
+    assert "Traceback" not in proc.stderr
+
+def test_file_over_the_time_limit_fails_the_run(tmp_path):
+    helpers = "".join(f"def f{i}(x):\n    return [y for y in range(x) if y % 3 == {i % 3}]\n" for i in range(6000))
+    (tmp_path / "app.py").write_text("import boto3\nS3 = boto3.client('s3')\n" + helpers)
+    proc = subprocess.run([sys.executable, str(ROOT / "cli.py"), str(tmp_path), "--format", "json", "--no-cache",
+                           "--no-knowledge-base", "--max-file-seconds", "0.01"], capture_output=True, text=True, cwd=ROOT)
+    assert "timeout" in proc.stderr
+    assert proc.returncode == 2
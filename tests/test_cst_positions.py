@@ -0,0 +1,37 @@
+import pathlib
+
+import libcst as cst
+import pytest
+
+from snapstart_py_scanner import cst_engine
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+def _statements(module):
+    found = set()
+    class Collect(cst.CSTVisitor):
+        def on_visit(self, node):
+            if isinstance(node, (cst.BaseStatement, cst.BaseSmallStatement)):
+                found.add(node)
+            return True
+    module.visit(Collect())
+    return found
+
+@pytest.mark.parametrize("path", sorted(FIXTURES.glob("*/*.py")), ids=lambda p: f"{p.parent.name}/{p.name}")
+def test_statement_starts_match_position_provider(path):
+    module = cst.parse_module(path.read_text(encoding="utf-8"))
+    wanted = _statements(module)
+    assert cst_engine.statement_starts(module, wanted) == cst_engine.provider_starts(module, wanted)
+    assert cst_engine._fast_starts  # the codegen pass ran, not the fallback
+
+def test_falls_back_when_codegen_internals_change(monkeypatch):
+    class Broken:
+        def __init__(self, module, wanted):
+            raise TypeError("unexpected keyword argument 'provider'")
+    monkeypatch.setattr(cst_engine, "_StartState", Broken)
+    monkeypatch.setattr(cst_engine, "_fast_starts", True)
+    module = cst.parse_module("import os\n\nif True:\n    x = 1; y = 2\n")
+    wanted = _statements(module)
+    starts = cst_engine.statement_starts(module, wanted)
+    assert sorted(starts.values()) == [(1, 0), (1, 0), (3, 0), (4, 4), (4, 4), (4, 11)]
+    assert cst_engine._fast_starts is False
@@ -0,0 +1,41 @@
+import json
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+ROOT = pathlib.Path(__file__).parent.parent
+PARITY = pathlib.Path(__file__).parent / "fixtures" / "parity"
+
+def _json_report(engine, target):
+    proc = subprocess.run([sys.executable, str(ROOT / "cli.py"), str(target), "--engine", engine, "--format", "json",
+                           "--no-cache", "--no-knowledge-base"], capture_output=True, text=True, cwd=ROOT)
+    return json.loads(proc.stdout)
+
+@pytest.fixture(scope="module")
+def reports():
+    return {engine: _json_report(engine, PARITY) for engine in ("cst", "ast")}
+
+def test_engines_write_the_same_json(reports):
+    assert reports["ast"] == reports["cst"]
+
+@pytest.mark.parametrize("name", sorted(p.name for p in PARITY.glob("*.py")))
+def test_engines_agree_per_fixture(reports, name):
+    per_engine = {e: [f for f in r if pathlib.Path(f["filename"]).name == name] for e, r in reports.items()}
+    assert per_engine["ast"] == per_engine["cst"]
+
+@pytest.mark.parametrize("name, expected", [
+    # the ignore comment suppresses the statement it sits on, wherever in the statement it is
+    ("comments.py", {(17, 0, "PY001_MUTABLE_MODULE_STATE")}),
+    ("suites.py", {(2, 28, "PY005_RANDOM_TIME_UUID_AT_INIT"), (5, 19, "PY005_RANDOM_TIME_UUID_AT_INIT"),
+                   (5, 19, "PY001_MUTABLE_MODULE_STATE")}),
+    ("main_guard.py", {(4, 0, "PY005_RANDOM_TIME_UUID_AT_INIT"), (18, 4, "PY005_RANDOM_TIME_UUID_AT_INIT")}),
+    ("try_blocks.py", {(8, 4, "PY005_RANDOM_TIME_UUID_AT_INIT"), (12, 4, "PY005_RANDOM_TIME_UUID_AT_INIT"),
+                       (14, 4, "PY001_MUTABLE_MODULE_STATE"), (21, 4, "PY005_RANDOM_TIME_UUID_AT_INIT"),
+                       (23, 4, "PY005_RANDOM_TIME_UUID_AT_INIT")}),
+    ("nested.py", set()),      # only definitions at module level
+])
+def test_parity_fixtures_are_not_vacuous(reports, name, expected):
+    found = {(f["lineno"], f["col"], f["rule_id"]) for f in reports["cst"] if pathlib.Path(f["filename"]).name == name}
+    assert found == expected
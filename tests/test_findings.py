@@ -0,0 +1,22 @@
+import io
+import json
+
+from snapstart_py_scanner.findings import Finding, FindingStore
+
+FINDINGS = [
+    Finding("PY006_BOTO3_CLIENT_AT_INIT", "ERROR", "boto3 client", "a.py", 3, 0, "S3 = boto3.client('s3')"),
+    Finding("PY001_MUTABLE_MODULE_STATE", "WARN", "mutable \"state\"", "a.py", 4, 0, "CACHE = {}  # ünïcode"),
+    Finding("PY006_BOTO3_CLIENT_AT_INIT", "ERROR", "boto3 client", "b.py", 1, 4, ""),
+    Finding("PY001_MUTABLE_MODULE_STATE", "WARN", "mutable \"state\"", "a.py", 9, 0, "CACHE = {}  # ünïcode"),
+]
+
+def test_store_round_trips_findings():
+    store = FindingStore.from_findings(FINDINGS)
+    assert list(store) == FINDINGS
+    assert store.filenames == ["a.py", "b.py", "a.py"]  # one entry per run of a file
+    assert store.counts() == {"ERROR": 2, "WARN": 2}
+
+def test_write_json_matches_json_dumps():
+    out = io.StringIO()
+    FindingStore.from_findings(FINDINGS).write_json(out, indent=2)
+    assert out.getvalue() == json.dumps([f.to_dict() for f in FINDINGS], indent=2)
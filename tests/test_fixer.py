@@ -0,0 +1,60 @@
+import ast
+import io
+import pathlib
+import tokenize
+from dataclasses import replace
+
+import libcst as cst
+import pytest
+
+from snapstart_py_scanner.config import RuleConfig
+from snapstart_py_scanner.fixer import FIXABLE, fix_paths, fix_source
+from snapstart_py_scanner.scanner import iter_findings
+from snapstart_py_scanner.walker import iter_python_files
+
+FIXER = pathlib.Path(__file__).parent / "fixtures" / "fixer"
+CASES = sorted(p.name for p in (FIXER / "before").glob("*.py"))
+CROSS = FIXER / "cross_module"
+
+def _comments(code):
+    return [t.string for t in tokenize.generate_tokens(io.StringIO(code).readline) if t.type == tokenize.COMMENT]
+
+@pytest.mark.parametrize("name", CASES)
+def test_fix_matches_expected(name):
+    before = (FIXER / "before" / name).read_text(encoding="utf-8")
+    result = fix_source(name, before, RuleConfig())
+    assert not result.error and not result.skipped
+    assert result.fixed == (FIXER / "after" / name).read_text(encoding="utf-8")
+
+@pytest.mark.parametrize("name", CASES)
+def test_fix_keeps_user_comments(name):
+    before = (FIXER / "before" / name).read_text(encoding="utf-8")
+    fixed = fix_source(name, before, RuleConfig()).fixed
+    after = _comments(fixed)
+    assert all(comment in after for comment in _comments(before))
+    # the ignore the fixer adds is a comment of its own
+    assert all(c.startswith("# snapstart: ignore[PY005_") or c in _comments(before) for c in after)
+
+@pytest.mark.parametrize("engine", ["cst", "ast"])
+@pytest.mark.parametrize("name", CASES)
+def test_fixed_source_parses_and_rescans_clean(tmp_path, name, engine):
+    fixed = fix_source(name, (FIXER / "before" / name).read_text(encoding="utf-8"), RuleConfig()).fixed
+    ast.parse(fixed)
+    cst.parse_module(fixed)
+    path = tmp_path / name
+    path.write_text(fixed, encoding="utf-8")
+    found = iter_findings(tmp_path, [path], cfg=replace(RuleConfig(), engine=engine))
+    assert [f.rule_id for f in found if f.rule_id in FIXABLE] == []
+
+def test_names_imported_by_other_modules_stay_bound():
+    before = CROSS / "before"
+    fixes = {pathlib.Path(f.filename).relative_to(before).as_posix(): f
+             for f in fix_paths(list(iter_python_files(before)), RuleConfig(), root=before)}
+    assert sorted((name, line, why) for name, f in fixes.items() for _, line, why in f.skipped) == [
+        ("clients.py", 3, "'S3' is imported by another module"),
+        ("clients.py", 4, "'DYNAMO' is imported by another module"),
+        ("pkg/queue.py", 3, "'QUEUE' is imported by another module"),
+    ]
+    for name, f in fixes.items():
+        expected = (CROSS / "after" / name).read_text(encoding="utf-8")
+        assert (f.fixed if f.fixed is not None else f.original) == expected, name
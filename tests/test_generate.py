@@ -0,0 +1,19 @@
+import pytest
+
+from benchmarks.generate import MANIFEST, Params, generate
+
+SMALL = Params(files=4, lines=20)
+
+def test_refuses_to_replace_a_directory_it_did_not_generate(tmp_path):
+    (tmp_path / "keep.py").write_text("precious = True\n")
+    with pytest.raises(ValueError):
+        generate(tmp_path, SMALL)
+    assert (tmp_path / "keep.py").read_text() == "precious = True\n"
+
+def test_replaces_empty_or_generated_directory(tmp_path):
+    out = tmp_path / "repo"
+    out.mkdir()
+    generate(out, SMALL)
+    (out / "stale.py").write_text("")
+    generate(out, SMALL)
+    assert (out / MANIFEST).is_file() and not (out / "stale.py").exists()
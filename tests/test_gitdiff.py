@@ -0,0 +1,35 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from snapstart_py_scanner.rules import PY006
+
+ROOT = pathlib.Path(__file__).parent.parent
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(tmp_path):
+    _git(tmp_path, "init", "-q")
+    _git(tmp_path, "config", "user.email", "test@example.com")
+    _git(tmp_path, "config", "user.name", "test")
+    app = tmp_path / "app.py"
+    app.write_text("import boto3\n\n\ndef handler(event, context):\n    return event\n")
+    _git(tmp_path, "add", "app.py")
+    _git(tmp_path, "commit", "-q", "-m", "base")
+    app.write_text("import boto3\n\nS3 = boto3.client('s3')\n\ndef handler(event, context):\n    return S3\n")
+    _git(tmp_path, "commit", "-q", "-am", "client at init")
+    return tmp_path
+
+@pytest.mark.parametrize("setting", [None, "diff.mnemonicPrefix", "diff.noprefix"])
+def test_changed_since_ignores_diff_prefix_config(repo, setting):
+    if setting:
+        _git(repo, "config", setting, "true")
+    proc = subprocess.run([sys.executable, str(ROOT / "cli.py"), str(repo), "--changed-since", "HEAD~1",
+                           "--format", "text", "--no-cache", "--no-knowledge-base"],
+                          capture_output=True, text=True, cwd=ROOT)
+    assert PY006 in proc.stdout
+    assert proc.returncode == 2
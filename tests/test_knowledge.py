@@ -0,0 +1,54 @@
+import base64
+import hashlib
+from dataclasses import replace
+
+from snapstart_py_scanner.config import RuleConfig
+from snapstart_py_scanner.knowledge import KnowledgeBase, known_records, read_distribution
+
+SOURCE = b"import random\nSEED = random.random()\n"
+
+def _install(site, files):
+    """A dist-info for `files` (relative path -> bytes) with a pip-style RECORD."""
+    dist_info = site / "demo-1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text("Name: demo\nVersion: 1.0\n\n")
+    rows = []
+    for rel, data in files.items():
+        (site / rel).parent.mkdir(parents=True, exist_ok=True)
+        (site / rel).write_bytes(data)
+        digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode()
+        rows.append(f"{rel},sha256={digest},{len(data)}\n")
+    (dist_info / "RECORD").write_text("".join(rows) + "demo-1.0.dist-info/RECORD,,\n")
+    return dist_info
+
+def _kb(tmp_path):
+    return KnowledgeBase(tmp_path / "kb.json", replace(RuleConfig(), engine="ast"))
+
+def test_record_hash_is_read(tmp_path):
+    dist = read_distribution(str(_install(tmp_path / "site", {"demo/__init__.py": SOURCE})))
+    size, digest = dist.files["demo/__init__.py"]
+    assert size == len(SOURCE) and digest.startswith("sha256=")
+
+def test_same_size_patch_is_not_served_from_the_knowledge_base(tmp_path):
+    site = tmp_path / "site"
+    _install(site, {"demo/__init__.py": SOURCE, "demo/util.py": b"X = 1\n"})
+    kb = _kb(tmp_path)
+    records = known_records(kb, [site])
+    assert [r[0] for r in records[str(site / "demo/__init__.py")]] == ["PY005_RANDOM_TIME_UUID_AT_INIT"]
+
+    kb.save()
+
+    (site / "demo/__init__.py").write_bytes(SOURCE.replace(b"SEED", b"SEEE"))  # same size, other hash
+    kb = _kb(tmp_path)
+    records = known_records(kb, [site])
+    assert kb.learned == []
+    assert str(site / "demo/__init__.py") not in records
+    assert str(site / "demo/util.py") in records
+
+def test_patched_install_is_not_learned(tmp_path):
+    site = tmp_path / "site"
+    _install(site, {"demo/__init__.py": SOURCE})
+    (site / "demo/__init__.py").write_bytes(b"import os\nos.system('patched')\n")
+    kb = _kb(tmp_path)
+    assert known_records(kb, [site]) == {}
+    assert kb.learned == []
@@ -0,0 +1,52 @@
+import pathlib
+import sysconfig
+from dataclasses import replace
+
+import pytest
+
+from snapstart_py_scanner.config import RuleConfig
+from snapstart_py_scanner.registry import default_registry
+from snapstart_py_scanner.rules import PY008, PY009
+from snapstart_py_scanner.scanner import ScanStats, iter_findings
+
+CORPUS = pathlib.Path(__file__).parent / "fixtures" / "corpus"
+
+def _findings(paths, engine, prefilter, stats=None):
+    cfg = replace(RuleConfig(), engine=engine)
+    return [f.to_dict() for f in iter_findings(CORPUS, paths, cfg=cfg, prefilter=prefilter, stats=stats)]
+
+def _trigger_files(root: pathlib.Path):
+    """For every name a rule matches: a call through `import`, an alias and `import *`."""
+    paths = []
+    for i, name in enumerate(sorted({n for rule in default_registry().rules for n in rule.names()})):
+        mod, _, leaf = name.rpartition(".")
+        if mod:
+            sources = {"import": f"import {mod}\nvalue = {name}('/tmp/x')\n",
+                       "alias": f"from {mod} import {leaf} as alias_{i}\nvalue = alias_{i}('/tmp/x')\n",
+                       "star": f"from {mod} import *\nvalue = {leaf}('/tmp/x')\n"}
+        else:
+            sources = {"bare": f"value = {name}('/tmp/x')\n",
+                       "attr": f"import factory\nvalue = factory.{name}('/tmp/x')\n",
+                       "started": f"import factory\nfactory.{name}().start()\n"}
+        for style, source in sources.items():
+            path = root / f"t{i:03d}_{style}.py"
+            path.write_text(source, encoding="utf-8")
+            paths.append(path)
+    return paths
+
+@pytest.mark.parametrize("engine", ["cst", "ast"])
+def test_prefilter_keeps_every_finding(tmp_path, engine):
+    paths = sorted(CORPUS.glob("*.py")) + _trigger_files(tmp_path)
+    unfiltered = _findings(paths, engine, prefilter=False)
+    stats = ScanStats()
+    assert _findings(paths, engine, prefilter=True, stats=stats) == unfiltered
+    assert stats.files_prefiltered >= 1            # clean.py
+    fired = {f["rule_id"] for f in unfiltered}
+    assert {r.rule_id for r in default_registry().rules} - {PY009} <= fired | {PY008}
+
+def test_prefilter_on_stdlib_sample():
+    stdlib = pathlib.Path(sysconfig.get_paths()["stdlib"])
+    paths = sorted(stdlib.glob("*.py"))[:120]
+    stats = ScanStats()
+    assert _findings(paths, "ast", prefilter=True, stats=stats) == _findings(paths, "ast", prefilter=False)
+    assert stats.files_prefiltered > 0
@@ -0,0 +1,40 @@
+import pytest
+
+from snapstart_py_scanner.rules import PY003, PY006
+
+ENGINES = ("cst", "ast")
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("source", [
+    "import threading\nthreading.Thread(target=print).start()\n",
+    "from threading import Thread\nThread(target=print).start()\n",
+    "from threading import Thread as T\nT(target=print).start()\n",
+    "import threading as th\nth.Thread(target=print).start()\n",
+])
+def test_thread_start_through_aliases(scan, engine, source):
+    found = [f for f in scan(source, engine) if f.rule_id == PY003]
+    assert [(f.lineno, f.col) for f in found] == [(2, 0)]
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_unrelated_start_is_not_a_thread(scan, engine):
+    source = "from server import App as T\nT().start()\n"
+    assert not [f for f in scan(source, engine) if f.rule_id == PY003]
+
+def _helper_chain(depth):
+    """f0 creates a client, f<i> calls f<i-1>, and module level calls every f<i>."""
+    defs = "".join(f"\ndef f{i}():\n    return f{i - 1}()\n" for i in range(1, depth))
+    calls = "".join(f"X{i} = f{i}()\n" for i in range(depth))
+    return "import boto3\n\ndef f0():\n    return boto3.client('s3')\n" + defs + calls
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_helper_chain_in_message(scan, engine):
+    found = {f.code: f.message for f in scan(_helper_chain(10), engine) if f.rule_id == PY006}
+    assert found["X2 = f2()"].endswith("(via f2() -> f1() -> f0())")
+    assert found["X6 = f6()"].endswith("(via f6() -> f5() -> f4() -> f3() -> f2() -> f1() -> f0())")
+    assert found["X9 = f9()"].endswith("(via f9() -> f8() -> f7() -> ... 4 more -> f2() -> f1() -> f0())")
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_deep_helper_chains_stay_linear(scan, engine):
+    found = [f for f in scan(_helper_chain(3000), engine) if f.rule_id == PY006]
+    assert len(found) == 3000
+    assert max(len(f.message) for f in found) < 250
@@ -0,0 +1,6 @@
+from benchmarks.startup import DEFAULT_BUDGET_MS, check
+
+def test_cli_startup_within_budget():
+    result = check(DEFAULT_BUDGET_MS, repeat=3)
+    assert result["eager"] == []
+    assert result["ok"], f"import cli took {result['import_ms']} ms, budget {DEFAULT_BUDGET_MS} ms"